@@ -0,0 +1,93 @@
+"""Compare a DeliveryHashTable behind one global lock with ConcurrentDeliveryHashTable.
+
+Reader threads look packages up while writer threads update their statuses,
+the mix a tracking page sees while the simulation runs. With one global lock
+every lookup waits for every write; the concurrent table only locks the stripe
+being written and lets lookups run without locking. Run from the repository root:
+    python -m benchmarks.concurrent_table_benchmark
+"""
+
+import dataclasses
+import datetime
+import threading
+import time
+
+from lib.delivery_data_structure import ConcurrentDeliveryHashTable, DeliveryHashTable
+from models.package import DeliveryStatus, Package
+
+PACKAGES = 10_000
+READERS = 8
+WRITERS = 2
+OPERATIONS_PER_THREAD = 50_000
+
+
+def make_package(package_id: int) -> Package:
+    return Package(
+        package_id, "1 Main St", "Salt Lake City", "UT", "84101", 1.0, datetime.time(17)
+    )
+
+
+class GlobalLockTable:
+    """The plain table with every operation serialized by a single lock."""
+
+    def __init__(self, length: int) -> None:
+        self.table = DeliveryHashTable(length)
+        self.lock = threading.Lock()
+
+    def insert(self, package_id: int, package: Package):
+        with self.lock:
+            self.table.insert(package_id=package_id, package=package)
+
+    def lookup(self, package_id: int) -> Package | None:
+        with self.lock:
+            return self.table.lookup(package_id)
+
+    def update(self, package_id: int, **changes) -> Package | None:
+        # the same read-copy-update as ConcurrentDeliveryHashTable.update, under the one lock
+        with self.lock:
+            node = self.table.table[self.table.hash_index(package_id)].find_node(package_id)
+            if node is None:
+                return None
+            node.package = dataclasses.replace(node.package, **changes)
+            return node.package
+
+
+def run(table) -> float:
+    for package_id in range(1, PACKAGES + 1):
+        table.insert(package_id=package_id, package=make_package(package_id))
+
+    def read(offset: int):
+        for i in range(OPERATIONS_PER_THREAD):
+            table.lookup((i * 7919 + offset) % PACKAGES + 1)
+
+    def write(offset: int):
+        for i in range(OPERATIONS_PER_THREAD):
+            table.update(
+                (i * 104729 + offset) % PACKAGES + 1,
+                delivery_status=DeliveryStatus.EN_ROUTE,
+                truck_id=i % 3 + 1,
+            )
+
+    threads = [threading.Thread(target=read, args=(offset,)) for offset in range(READERS)]
+    threads += [threading.Thread(target=write, args=(offset,)) for offset in range(WRITERS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    operations = (READERS + WRITERS) * OPERATIONS_PER_THREAD
+    print(f"{READERS} readers, {WRITERS} writers, {PACKAGES:,} packages:")
+    for label, table in [
+        ("DeliveryHashTable, global lock", GlobalLockTable(PACKAGES)),
+        ("ConcurrentDeliveryHashTable", ConcurrentDeliveryHashTable(PACKAGES)),
+    ]:
+        elapsed = run(table)
+        print(f"  {label:<32} {elapsed:6.2f} s  {operations / elapsed:>10,.0f} ops/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare CSV ingest throughput of `csv_utils` with the bulk parser in `lib.bulk_csv`.
+
+Writes a package file of `PACKAGE_ROWS` rows (the WGUPS packages repeated with new ids)
+and a lower-triangular distance table with about `DISTANCE_CELLS` distances,
+then times loading each with the current and the bulk functions. Run from the repository root:
+    python -m benchmarks.csv_ingest_benchmark
+"""
+
+import csv
+import gc
+import math
+import os
+import random
+import tempfile
+import time
+
+from lib.bulk_csv import csv_to_distances_bulk, csv_to_package_columns, csv_to_packages_bulk
+from lib.csv_utils import csv_to_distances, csv_to_packages
+
+PACKAGE_ROWS = 1_000_000
+DISTANCE_CELLS = 1_000_000
+WORKERS = max(2, os.cpu_count() or 1)
+
+
+def write_package_file(filepath: str, rows: int):
+    with open("data/WGUPSPackageFile.csv", newline="") as package_file:
+        header, *templates = list(csv.reader(package_file))
+    with open(filepath, "w", newline="") as package_file:
+        writer = csv.writer(package_file)
+        writer.writerow(header)
+        for package_id in range(1, rows + 1):
+            row = templates[(package_id - 1) % len(templates)]
+            writer.writerow([package_id, *row[1:]])
+
+
+def write_distance_file(filepath: str, locations: int):
+    rng = random.Random(42)
+    with open(filepath, "w", newline="") as distance_file:
+        writer = csv.writer(distance_file)
+        for i in range(locations):
+            distances = [f"{rng.uniform(0.5, 15):.1f}" for _ in range(i)] + ["0.0"]
+            writer.writerow(
+                [f"Location {i}", f"{i} Main St (84{i:03d})", *distances]
+                + [""] * (locations - i - 1)
+            )
+
+
+def timed(load, *args, **kwargs) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    result = load(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    del result
+    return elapsed
+
+
+def main():
+    locations = math.isqrt(2 * DISTANCE_CELLS)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        package_path = os.path.join(tmp_dir, "packages.csv")
+        distance_path = os.path.join(tmp_dir, "distances.csv")
+        write_package_file(package_path, PACKAGE_ROWS)
+        write_distance_file(distance_path, locations)
+
+        print(f"{PACKAGE_ROWS:,} package rows ({os.path.getsize(package_path) / 1e6:.0f} MB):")
+        parallel = {"workers": WORKERS}
+        for label, load, kwargs in [
+            ("csv_to_packages", csv_to_packages, {}),
+            ("csv_to_packages_bulk", csv_to_packages_bulk, {}),
+            (f"csv_to_packages_bulk, {WORKERS} workers", csv_to_packages_bulk, parallel),
+            # columns only, without building packages and the hash table
+            ("csv_to_package_columns", csv_to_package_columns, {}),
+            (f"csv_to_package_columns, {WORKERS} workers", csv_to_package_columns, parallel),
+        ]:
+            elapsed = timed(load, package_path, **kwargs)
+            print(f"  {label:<40} {elapsed:6.2f} s  {PACKAGE_ROWS / elapsed:>10,.0f} rows/s")
+
+        cells = locations * (locations + 1) // 2
+        print(f"{locations:,} locations, {cells:,} distances:")
+        for label, load in [
+            ("csv_to_distances", csv_to_distances),
+            ("csv_to_distances_bulk", csv_to_distances_bulk),
+        ]:
+            elapsed = timed(load, distance_path)
+            print(f"  {label:<40} {elapsed:6.2f} s  {cells / elapsed:>10,.0f} cells/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measure how the exact route solver's time grows with the number of stops.
+
+Solves random sets of stops from the WGUPS distance table, with and without deadlines,
+and compares the exact tour length against nearest-neighbor ordering.
+Run from the repository root:
+    python -m benchmarks.exact_route_benchmark
+"""
+
+import random
+import time
+
+from lib.csv_utils import csv_to_distances
+from lib.exact_route import EXACT_MAX_STOPS, MINUTES_PER_MILE, shortest_stop_order
+from models.truck import DEFAULT_HUB
+
+DISTANCE_FILE = "data/WGUPSDistanceTable.csv"
+RUNS = 5
+DEPARTURE_TIME = 8 * 60
+
+
+def nearest_neighbor_length(stops, distance_table, hub=DEFAULT_HUB) -> float:
+    remaining, location, length = set(stops), hub, 0.0
+    while remaining:
+        closest = min(remaining, key=distance_table[location].__getitem__)
+        length += distance_table[location][closest]
+        remaining.remove(closest)
+        location = closest
+    return length + distance_table[location][hub]
+
+
+def tour_length(order, distance_table, hub=DEFAULT_HUB) -> float:
+    stops = [hub, *order, hub]
+    return sum(distance_table[a][b] for a, b in zip(stops, stops[1:]))
+
+
+def main():
+    distance_table = csv_to_distances(DISTANCE_FILE)
+    locations = [location for location in distance_table if location != DEFAULT_HUB]
+    rng = random.Random(0)
+
+    print(f"{'stops':>5} {'solve (ms)':>11} {'w/ deadlines':>13} {'exact mi':>9} {'greedy mi':>10}")
+    for stop_count in range(4, EXACT_MAX_STOPS + 1):
+        timings, deadline_timings, exact, greedy = [], [], 0.0, 0.0
+        for _ in range(RUNS):
+            stops = rng.sample(locations, stop_count)
+
+            start = time.perf_counter()
+            order = shortest_stop_order(stops, distance_table, DEFAULT_HUB, time_limit=None)
+            timings.append(time.perf_counter() - start)
+            exact += tour_length(order, distance_table)
+            greedy += nearest_neighbor_length(stops, distance_table)
+
+            # a deadline on every other stop, loose enough to usually be feasible,
+            # tight enough to prune part of the search
+            deadlines = [
+                DEPARTURE_TIME + distance_table[DEFAULT_HUB][stop] * MINUTES_PER_MILE + 45
+                if i % 2 == 0
+                else float("inf")
+                for i, stop in enumerate(stops)
+            ]
+            start = time.perf_counter()
+            shortest_stop_order(
+                stops,
+                distance_table,
+                DEFAULT_HUB,
+                departure_time=DEPARTURE_TIME,
+                deadlines=deadlines,
+                time_limit=None,
+            )
+            deadline_timings.append(time.perf_counter() - start)
+
+        median = sorted(timings)[RUNS // 2] * 1000
+        deadline_median = sorted(deadline_timings)[RUNS // 2] * 1000
+        print(
+            f"{stop_count:>5} {median:>11.2f} {deadline_median:>13.2f} "
+            f"{exact / RUNS:>9.1f} {greedy / RUNS:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Compare the dense CSV distance table with coordinate-based distances and a KD-tree.
+
+The dense table from `csv_to_distances` grows quadratically, so it is measured
+at a few thousand locations and extrapolated to `GEO_LOCATION_COUNT`;
+the `GeoDistanceTable` is measured directly at that size.
+Run from the repository root:
+    python -m benchmarks.geo_distance_benchmark
+"""
+
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from lib.csv_utils import csv_to_distances
+from lib.geo_distances import GeoDistanceTable
+
+DENSE_LOCATION_COUNTS = (500, 1000, 2000)
+GEO_LOCATION_COUNT = 50_000
+QUERIES = 200
+
+
+def random_coordinates(count: int, seed: int = 0) -> dict[str, tuple[float, float]]:
+    rng = random.Random(seed)
+    return {
+        f"{i} Main St": (rng.uniform(40.5, 40.9), rng.uniform(-112.1, -111.7))
+        for i in range(count)
+    }
+
+
+def write_dense_csv(filepath: str, table: GeoDistanceTable):
+    """Write the lower-triangular distance CSV read by `csv_to_distances`."""
+    locations = list(table)
+    with open(filepath, "w", newline="", encoding="utf-8") as distance_file:
+        writer = csv.writer(distance_file)
+        for i, location in enumerate(locations):
+            writer.writerow(
+                [location, location]
+                + [f"{table[location][other]:.1f}" for other in locations[: i + 1]]
+            )
+
+
+def median_query_ms(query, arguments) -> float:
+    timings = []
+    for argument in arguments:
+        start = time.perf_counter()
+        query(argument)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def measure_dense(count: int) -> tuple[float, float]:
+    """Return the dense table's memory (MiB) and median nearest-location query time (ms)."""
+    coordinates = GeoDistanceTable(random_coordinates(count))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, "distances.csv")
+        write_dense_csv(filepath, coordinates)
+        tracemalloc.start()
+        distance_table = csv_to_distances(filepath)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    locations = list(distance_table)
+    origins = random.Random(1).sample(locations, QUERIES)
+
+    def nearest(origin):
+        row = distance_table[origin]
+        return min((location for location in locations if location != origin), key=row.__getitem__)
+
+    return memory / 2**20, median_query_ms(nearest, origins)
+
+
+def measure_geo(count: int) -> tuple[float, float, float, float]:
+    """Return the geo table's memory (MiB), index build time (s),
+    and median 1-nearest and 10-nearest query times (ms)."""
+    coordinates = random_coordinates(count)
+    tracemalloc.start()
+    table = GeoDistanceTable(coordinates)
+    start = time.perf_counter()
+    table.index
+    build_seconds = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    origins = random.Random(1).sample(list(table), QUERIES)
+    one = median_query_ms(lambda origin: table.nearest(origin), origins)
+    ten = median_query_ms(lambda origin: table.nearest(origin, k=10), origins)
+    return memory / 2**20, build_seconds, one, ten
+
+
+def main():
+    print(f"{'dense locations':>15} {'memory (MiB)':>13} {'nearest (ms)':>13}")
+    dense = []
+    for count in DENSE_LOCATION_COUNTS:
+        memory, query_ms = measure_dense(count)
+        dense.append((count, memory, query_ms))
+        print(f"{count:>15} {memory:>13.1f} {query_ms:>13.3f}")
+
+    count, memory, query_ms = dense[-1]
+    scale = GEO_LOCATION_COUNT / count
+    print(
+        f"{GEO_LOCATION_COUNT:>15} {memory * scale**2:>13.0f} {query_ms * scale:>13.1f}"
+        "   (extrapolated)"
+    )
+
+    memory, build_seconds, one, ten = measure_geo(GEO_LOCATION_COUNT)
+    print()
+    print(f"geo table, {GEO_LOCATION_COUNT} locations:")
+    print(f"  memory (coordinates + index): {memory:.1f} MiB")
+    print(f"  KD-tree build:                {build_seconds:.2f} s")
+    print(f"  nearest location:             {one:.3f} ms")
+    print(f"  10 nearest locations:         {ten:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare bucket distribution and lookup speed of the package hash tables.
+
+Fills `DeliveryHashTable` (package id modulo the table size) and `KeyedDeliveryHashTable`
+(seeded, mixed hash over a power-of-two table) with sequential, strided and random ids,
+and the keyed table also with alphanumeric tracking numbers and composite keys,
+then reports the chain lengths and the time to look every key up.
+Also times hashing tracking numbers with a pure-Python FNV-1a, for comparison
+with the keyed table's seeded BLAKE2b string hash. Run from the repository root:
+    python -m benchmarks.hash_distribution_benchmark
+"""
+
+import datetime
+import random
+import time
+
+from lib.delivery_data_structure import DeliveryHashTable, KeyedDeliveryHashTable
+from models.package import Package
+
+KEYS = 100_000
+# a power of two, like the keyed table's size
+BUCKETS = 1 << 17
+STRIDE = 1024
+
+_FNV_OFFSET_BASIS = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+
+
+def fnv1a_64(key: str) -> int:
+    value = _FNV_OFFSET_BASIS
+    for byte in key.encode("utf-8"):
+        value = ((value ^ byte) * _FNV_PRIME) & 0xFFFFFFFFFFFFFFFF
+    return value
+
+
+def key_sets() -> dict[str, list]:
+    rng = random.Random(42)
+    return {
+        "sequential ids": list(range(1, KEYS + 1)),
+        f"ids with stride {STRIDE}": list(range(STRIDE, STRIDE * (KEYS + 1), STRIDE)),
+        "random ids": rng.sample(range(1, 10**12), KEYS),
+        "tracking numbers": [f"1Z{rng.randrange(16**6):06X}{n:08d}" for n in range(KEYS)],
+        "composite keys": [
+            ("SLC", route, stop) for route in range(KEYS // 100) for stop in range(100)
+        ],
+    }
+
+
+def main():
+    package = Package(1, "1 Main St", "Salt Lake City", "UT", "84101", 1.0, datetime.time(17))
+    print(f"{KEYS:,} keys, {BUCKETS:,} buckets:")
+    print(f"  {'keys':<22} {'table':<24} {'max chain':>9} {'probes/hit':>10} {'lookups/s':>12}")
+    for name, keys in key_sets().items():
+        tables = [KeyedDeliveryHashTable(BUCKETS)]
+        if isinstance(keys[0], int):
+            tables.insert(0, DeliveryHashTable(BUCKETS))
+        for table in tables:
+            for key in keys:
+                table.insert(key, package)
+            stats = table.bucket_stats()
+            start = time.perf_counter()
+            for key in keys:
+                table.lookup(key)
+            elapsed = time.perf_counter() - start
+            print(
+                f"  {name:<22} {type(table).__name__:<24} {stats.max_chain:>9} "
+                f"{stats.mean_probes_hit:>10.2f} {KEYS / elapsed:>12,.0f}"
+            )
+
+    tracking_numbers = key_sets()["tracking numbers"]
+    table = KeyedDeliveryHashTable(BUCKETS)
+    for label, hash_key in [("fnv1a_64", fnv1a_64), ("hash_index", table.hash_index)]:
+        start = time.perf_counter()
+        for key in tracking_numbers:
+            hash_key(key)
+        elapsed = time.perf_counter() - start
+        print(f"  hashing tracking numbers with {label:<12} {KEYS / elapsed:>12,.0f} keys/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Measure the cost of journaling a day of deliveries, and of recovering from the journal.
+
+Builds a table of `PACKAGES` packages, then loads and delivers every one of them
+with `TRUCKS` trucks, once without a journal and once with one, to show the
+group-committed journal's overhead on the delivery loop. Then rebuilds the table
+with `recover`, replaying the whole day's journal, and again after a checkpoint. Run from the repository root:
+    python -m benchmarks.journal_benchmark
+"""
+
+import datetime
+import os
+import tempfile
+import time
+
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.journal import JOURNAL_FILENAME, DeliveryJournal, recover
+from models.package import Package
+from models.truck import Truck
+
+PACKAGES = 500_000
+TRUCKS = 3
+PACKAGES_PER_TRIP = 16
+ADDRESSES = 50
+HUB = "HUB"
+
+
+def make_packages() -> DeliveryHashTable:
+    packages = DeliveryHashTable(PACKAGES)
+    for package_id in range(1, PACKAGES + 1):
+        packages.insert(
+            package_id=package_id,
+            package=Package(
+                package_id,
+                f"{package_id % ADDRESSES} Main St",
+                "Salt Lake City",
+                "UT",
+                "84101",
+                1.0,
+                datetime.time(17),
+            ),
+        )
+    return packages
+
+
+def make_distance_table() -> dict[str, dict[str, float]]:
+    locations = [HUB] + [f"{i} Main St (84101)" for i in range(ADDRESSES)]
+    return {
+        location: {other: 0.0 if other == location else 0.1 for other in locations}
+        for location in locations
+    }
+
+
+def run_day(packages: DeliveryHashTable, journal=None) -> float:
+    """Deliver every package in trips of `PACKAGES_PER_TRIP`, shared among the trucks."""
+    distance_table = make_distance_table()
+    trucks = [
+        Truck(truck_id=truck_id, distance_table=distance_table, hub=HUB, journal=journal)
+        for truck_id in range(1, TRUCKS + 1)
+    ]
+    start = time.perf_counter()
+    for trip, first_id in enumerate(range(1, PACKAGES + 1, PACKAGES_PER_TRIP)):
+        truck = trucks[trip % TRUCKS]
+        for package_id in range(first_id, min(first_id + PACKAGES_PER_TRIP, PACKAGES + 1)):
+            truck.load_package(packages.lookup(package_id))
+        truck.deliver_packages_in_load_order()
+    if journal is not None:
+        journal.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    records = 2 * PACKAGES
+    print(f"{PACKAGES:,} packages, {records:,} loads and deliveries:")
+    elapsed = run_day(make_packages())
+    print(f"  {'without a journal':<28} {elapsed:6.2f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        packages = make_packages()
+        # no checkpoints during the day, so recovering replays the whole journal
+        journal = DeliveryJournal(directory, packages, checkpoint_interval=None)
+        elapsed = run_day(packages, journal)
+        size = os.path.getsize(os.path.join(directory, JOURNAL_FILENAME))
+        print(f"  {'with a journal':<28} {elapsed:6.2f} s  ({size / 1e6:.1f} MB journal)")
+
+        start = time.perf_counter()
+        recovered, _ = recover(directory)
+        elapsed = time.perf_counter() - start
+        print(f"  {'recover, full day':<28} {elapsed:6.2f} s  {records / elapsed:>10,.0f} records/s")
+        assert recovered.lookup(PACKAGES) == packages.lookup(PACKAGES)
+
+        start = time.perf_counter()
+        journal.checkpoint()
+        journal.close()
+        print(f"  {'checkpoint':<28} {time.perf_counter() - start:6.2f} s")
+        start = time.perf_counter()
+        recover(directory)
+        print(f"  {'recover, from checkpoint':<28} {time.perf_counter() - start:6.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measure how long validating a large plan takes.
+
+Builds the columns of a synthetic 100k-package plan once, as a search-based planner would,
+then times `validate_columns` on a valid plan and on one with scattered violations.
+Run from the repository root:
+    python -m benchmarks.plan_validation_benchmark
+"""
+
+import random
+import time
+from array import array
+
+from lib.plan_validation import PlanColumns, PlanRules, validate_columns
+
+PACKAGE_COUNT = 100_000
+PACKAGES_PER_TRIP = 16
+TRUCKS = 50
+RUNS = 11
+
+
+def synthetic_columns(count: int, violation_rate: float = 0.0, seed: int = 0) -> PlanColumns:
+    """A plan of 16-package trips spread over `TRUCKS` trucks, one driver each."""
+    rng = random.Random(seed)
+    columns = PlanColumns()
+    trip_count = -(-count // PACKAGES_PER_TRIP)
+    trips_per_truck = -(-trip_count // TRUCKS)
+    trip_minutes = 600 / trips_per_truck
+    for trip in range(trip_count):
+        truck_id, index = trip % TRUCKS + 1, trip // TRUCKS
+        start = 480 + index * trip_minutes
+        columns.trip_truck_ids.append(truck_id)
+        columns.trip_starts.append(start)
+        columns.trip_ends.append(start + trip_minutes - 1)
+    for row in range(count):
+        trip = row // PACKAGES_PER_TRIP
+        loaded = columns.trip_starts[trip]
+        delivered = loaded + rng.uniform(1, trip_minutes - 2)
+        deadline = delivered + rng.uniform(0, 120)
+        if rng.random() < violation_rate:
+            deadline = delivered - 5
+        columns.package_ids.append(row + 1)
+        columns.truck_ids.append(columns.trip_truck_ids[trip])
+        columns.required_truck_ids.append(0)
+        columns.earliest_load_times.append(0.0)
+        columns.load_times.append(loaded)
+        columns.delivery_times.append(delivered)
+        columns.deadlines.append(deadline)
+    columns.total_mileage = 0.0
+    return columns
+
+
+def median_ms(columns: PlanColumns, rules: PlanRules) -> tuple[float, int]:
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        report = validate_columns(columns, rules)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[RUNS // 2] * 1000, len(report.violations)
+
+
+def main():
+    rules = PlanRules(drivers=TRUCKS, max_total_mileage=None)
+    for label, rate in (("valid plan", 0.0), ("1% late", 0.01)):
+        columns = synthetic_columns(PACKAGE_COUNT, violation_rate=rate)
+        milliseconds, violations = median_ms(columns, rules)
+        print(
+            f"{label:>10}: validated {PACKAGE_COUNT} packages in {milliseconds:.1f} ms "
+            f"({violations} violations)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure how fast the streaming report writer renders statuses, and its peak memory.
+
+Packages are generated lazily, so the peak memory reported is the writer's own.
+Run from the repository root:
+    python -m benchmarks.report_writer_benchmark
+"""
+
+import datetime
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from lib.report_writer import ReportFormat, write_status_report_file
+from models.package import DeliveryStatus, Package
+
+PACKAGE_COUNT = 1_000_000
+MEMORY_PACKAGE_COUNTS = (10_000, 50_000)
+
+
+def synthetic_packages(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    deadlines = [datetime.time(9, 0), datetime.time(10, 30), datetime.time(23, 59)]
+    for package_id in range(1, count + 1):
+        load_minutes = rng.randrange(8 * 60, 11 * 60)
+        delivered_minutes = load_minutes + rng.randrange(5, 180)
+        package = Package(
+            package_id=package_id,
+            delivery_address=f"{rng.randrange(1, 9999)} S {rng.randrange(1, 99)}00 E",
+            delivery_city="Salt Lake City",
+            delivery_state="UT",
+            delivery_zip_code="84115",
+            package_weight=2.0,
+            delivery_deadline=rng.choice(deadlines),
+        )
+        package.delivery_status = DeliveryStatus.DELIVERED
+        package.truck_id = rng.randrange(1, 4)
+        package.time_loaded_onto_truck = datetime.time(*divmod(load_minutes, 60))
+        package.time_delivered = datetime.time(*divmod(delivered_minutes, 60))
+        yield package
+
+
+def main():
+    generation_start = time.perf_counter()
+    for _ in synthetic_packages(PACKAGE_COUNT):
+        pass
+    generation_time = time.perf_counter() - generation_start
+    print(f"generating {PACKAGE_COUNT:,} packages alone takes {generation_time:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for report_format in ReportFormat:
+            path = os.path.join(tmp_dir, f"report.{report_format}")
+            start = time.perf_counter()
+            written = write_status_report_file(
+                path,
+                synthetic_packages(PACKAGE_COUNT),
+                datetime.time(10, 0),
+                report_format=report_format,
+            )
+            elapsed = time.perf_counter() - start - generation_time
+
+            # tracemalloc slows everything down, so memory is measured on separate,
+            # smaller runs; the peak should not grow with the package count
+            peaks = []
+            for count in MEMORY_PACKAGE_COUNTS:
+                tracemalloc.start()
+                write_status_report_file(
+                    path,
+                    synthetic_packages(count),
+                    datetime.time(10, 0),
+                    report_format=report_format,
+                )
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+                tracemalloc.stop()
+            print(
+                f"{report_format:>5}: {written:,} rows rendered in {elapsed:.2f}s, peak memory "
+                + ", ".join(
+                    f"{peak:.1f} MiB at {count:,} rows"
+                    for peak, count in zip(peaks, MEMORY_PACKAGE_COUNTS)
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Measure the CLI's time-to-first-prompt.
+
+Starts `main.py` in a subprocess and times how long it takes to print its first `>> ` prompt,
+both from the CSVs and from a saved plan snapshot. Run from the repository root:
+    python -m benchmarks.startup_benchmark
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 15
+
+
+def time_to_first_prompt(args: list[str]) -> float:
+    """Return the median time, in seconds, until the CLI prints its first prompt."""
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "main", *args],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        output = b""
+        while not output.endswith(b">> "):
+            char = process.stdout.read(1)
+            if not char:
+                raise RuntimeError(f"CLI exited before prompting: {output!r}")
+            output += char
+        timings.append(time.perf_counter() - start)
+        process.communicate(b"q\n")
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, "plan.snap")
+        subprocess.run(
+            [sys.executable, "-m", "main", "--save-snapshot", snapshot_path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        from_csv = time_to_first_prompt([])
+        from_snapshot = time_to_first_prompt(["--snapshot", snapshot_path])
+
+    print(f"time to first prompt from CSVs:     {from_csv * 1000:.1f} ms")
+    print(f"time to first prompt from snapshot: {from_snapshot * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Measure request throughput of the status server on localhost.
+
+Run from the repository root:
+    python -m benchmarks.status_server_benchmark
+"""
+
+import asyncio
+import time
+
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import deliver_packages
+from lib.status_server import StatusServer
+
+CONNECTIONS = 32
+REQUESTS_PER_CONNECTION = 500
+
+
+async def _client(port: int, package_count: int) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(REQUESTS_PER_CONNECTION):
+        package_id = i % package_count + 1
+        writer.write(f"GET /packages/{package_id}?time=10:{i % 60:02d} HTTP/1.1\r\n\r\n".encode())
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+        await reader.readexactly(length)
+    writer.close()
+
+
+async def run() -> None:
+    packages = csv_to_packages("data/WGUPSPackageFile.csv")
+    distance_table = csv_to_distances("data/WGUPSDistanceTable.csv")
+    packages, _ = deliver_packages(packages, distance_table=distance_table)
+
+    status_server = StatusServer(packages)
+    server = await status_server.start()
+    async with server:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(_client(status_server.port, len(packages)) for _ in range(CONNECTIONS))
+        )
+        elapsed = time.perf_counter() - start
+    total = CONNECTIONS * REQUESTS_PER_CONNECTION
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:,.0f} req/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
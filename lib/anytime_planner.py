@@ -0,0 +1,265 @@
+"""Anytime planning: keep improving a plan until it is provably good enough or time runs out.
+
+`plan_anytime` starts from the cheapest-insertion plan of `plan_routes` and improves it
+by large neighbourhood search: each iteration takes a few loading units out of the best
+plan so far (either at random or a cluster of units near each other), inserts them back
+in a random order at their cheapest on-time places, reorders every trip exactly,
+and keeps the result if it is shorter without delivering more packages late.
+
+After every improvement the plan's mileage is compared with a lower bound
+(see `lib.lower_bounds`), and the search stops as soon as the gap between them reaches
+`target_gap`, or after `time_budget` seconds. A manifest whose first plan is already
+within the target gap costs nothing more, and the search only spends time
+on manifests that still have miles to gain.
+"""
+
+import datetime
+import random
+import time
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Callable, Optional
+
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.exact_route import DEFAULT_TIME_LIMIT, minutes_after_midnight
+from lib.insertion_planner import Route, RoutePlan, _InsertionPlanner, plan_routes
+from lib.lower_bounds import mileage_lower_bound, optimality_gap
+from lib.truck_loading import MAX_PACKAGES_PER_TRUCK, START_OF_DAY, build_loading_units
+from models.truck import DEFAULT_HUB, TRUCK_SPEED_MPH
+
+DEFAULT_TIME_BUDGET = 2.0
+DEFAULT_TARGET_GAP = 0.0
+
+# the most loading units taken out of the plan in one iteration
+MAX_REMOVED_UNITS = 8
+
+
+class StopReason(StrEnum):
+    TARGET_GAP = "target_gap"
+    TIME_BUDGET = "time_budget"
+    MAX_ITERATIONS = "max_iterations"
+
+
+@dataclass
+class AnytimeProgress:
+    """The best plan's quality at one point of the search."""
+
+    elapsed_seconds: float
+    iterations: int
+    mileage: float
+    lower_bound: float
+    late_package_count: int
+
+    @property
+    def gap(self) -> float:
+        return optimality_gap(self.mileage, self.lower_bound)
+
+
+@dataclass
+class AnytimeResult:
+    """The best plan found, with the progress of the search that found it.
+
+    `history` has an entry for the first plan and one for every improvement after it.
+    """
+
+    plan: RoutePlan
+    lower_bound: float
+    iterations: int
+    stop_reason: StopReason
+    history: list[AnytimeProgress] = field(default_factory=list)
+
+    @property
+    def mileage(self) -> float:
+        return self.history[-1].mileage
+
+    @property
+    def gap(self) -> float:
+        return self.history[-1].gap
+
+
+def _copy_routes(routes: dict[int, list[Route]]) -> dict[int, list[Route]]:
+    return {
+        truck_id: [route.copy() for route in truck_routes]
+        for truck_id, truck_routes in routes.items()
+    }
+
+
+def _reorder_within_budget(
+    planner: _InsertionPlanner,
+    routes: dict[int, list[Route]],
+    start_minutes: dict[int, float],
+    exact_time_limit: Optional[float],
+    time_budget: Optional[float],
+    started: float,
+):
+    """Reorder every trip exactly, as `plan_routes` does, within what is left of the budget.
+
+    Each trip gets at most `exact_time_limit` seconds, and at most its share
+    of the time left, so the exact solver never runs far past the budget.
+    """
+    unordered = sum(len(truck_routes) for truck_routes in routes.values())
+    for truck_id, truck_routes in routes.items():
+        for route in truck_routes:
+            limit = exact_time_limit
+            if time_budget is not None:
+                share = max(0.0, time_budget - (time.perf_counter() - started)) / unordered
+                limit = share if limit is None else min(limit, share)
+            if limit != 0:
+                planner.reorder_exactly(route, limit)
+            unordered -= 1
+        planner.update_truck(truck_routes, start_minutes[truck_id])
+
+
+def plan_anytime(
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    truck_start_times: dict[int, datetime.time],
+    target_gap: float = DEFAULT_TARGET_GAP,
+    time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+    max_iterations: Optional[int] = None,
+    max_packages: int = MAX_PACKAGES_PER_TRUCK,
+    hub: str = DEFAULT_HUB,
+    exact_time_limit: Optional[float] = DEFAULT_TIME_LIMIT,
+    speed_mph: float = TRUCK_SPEED_MPH,
+    seed: Optional[int] = None,
+    on_progress: Optional[Callable[[AnytimeProgress], None]] = None,
+) -> AnytimeResult:
+    """Plan like `plan_routes`, then keep improving the plan until a stopping rule is met.
+
+    The search stops once the gap to the lower bound is at most `target_gap`
+    (a fraction of the plan's mileage), after `time_budget` seconds,
+    or after `max_iterations` iterations, whichever comes first.
+    `on_progress` is called with the first plan's progress and after every improvement.
+    Pass a `seed` to make the search repeatable (for a given number of iterations).
+    Exact reordering (see `plan_routes`) shares what is left of `time_budget` among the trips,
+    so it cannot keep the search running far past the budget.
+    The gap rarely reaches zero, so without a `time_budget` or `max_iterations`
+    a positive `target_gap` is required, or a ValueError is raised.
+    """
+    if time_budget is None and max_iterations is None and target_gap <= 0:
+        raise ValueError(
+            "The search needs a time_budget, max_iterations or a positive target_gap to stop."
+        )
+    started = time.perf_counter()
+    planner = _InsertionPlanner(distance_table, hub, minutes_per_mile=60 / speed_mph)
+    start_minutes = {
+        truck_id: minutes_after_midnight(start) for truck_id, start in truck_start_times.items()
+    }
+    # the first plan's trips are reordered here rather than in `plan_routes`,
+    # so that reordering them stays within the budget too
+    plan = plan_routes(
+        packages,
+        distance_table,
+        truck_start_times,
+        max_packages=max_packages,
+        hub=hub,
+        exact_time_limit=0,
+        speed_mph=speed_mph,
+    )
+    if exact_time_limit != 0:
+        planner.relaxed_package_ids = set(plan.late_package_ids)
+        _reorder_within_budget(
+            planner, plan.routes, start_minutes, exact_time_limit, time_budget, started
+        )
+    lower_bound = mileage_lower_bound(packages, distance_table, hub, max_packages)
+    result = AnytimeResult(
+        plan=plan, lower_bound=lower_bound, iterations=0, stop_reason=StopReason.TARGET_GAP
+    )
+
+    def report(mileage: float, late_package_count: int):
+        progress = AnytimeProgress(
+            elapsed_seconds=time.perf_counter() - started,
+            iterations=result.iterations,
+            mileage=mileage,
+            lower_bound=lower_bound,
+            late_package_count=late_package_count,
+        )
+        result.history.append(progress)
+        if on_progress is not None:
+            on_progress(progress)
+
+    best_mileage = plan.total_mileage
+    best_routes = plan.routes
+    best_late_ids = set(plan.late_package_ids)
+    report(best_mileage, len(best_late_ids))
+
+    units = build_loading_units(packages)
+    release_minutes = {
+        package.package_id: minutes_after_midnight(max(unit.release_time, START_OF_DAY))
+        for unit in units
+        for package in unit.packages
+    }
+    anchors = [distance_table[unit.anchor] for unit in units]
+    rng = random.Random(seed)
+
+    while True:
+        if result.gap <= target_gap:
+            result.stop_reason = StopReason.TARGET_GAP
+            break
+        if time_budget is not None and time.perf_counter() - started >= time_budget:
+            result.stop_reason = StopReason.TIME_BUDGET
+            break
+        if max_iterations is not None and result.iterations >= max_iterations:
+            result.stop_reason = StopReason.MAX_ITERATIONS
+            break
+        result.iterations += 1
+
+        # ruin: take out a few units, either anywhere or a cluster around one of them
+        count = rng.randint(1, min(MAX_REMOVED_UNITS, len(units)))
+        if rng.random() < 0.5:
+            removed = rng.sample(range(len(units)), count)
+        else:
+            seed_unit = units[rng.randrange(len(units))]
+            removed = sorted(
+                range(len(units)), key=lambda i: anchors[i][seed_unit.anchor]
+            )[:count]
+        removed_ids = {
+            package.package_id for i in removed for package in units[i].packages
+        }
+        routes = _copy_routes(best_routes)
+        for truck_id, truck_routes in routes.items():
+            kept_routes = []
+            for route in truck_routes:
+                route.packages = [
+                    package for package in route.packages
+                    if package.package_id not in removed_ids
+                ]
+                if route.packages:
+                    route.release_time = max(
+                        release_minutes[package.package_id] for package in route.packages
+                    )
+                    kept_routes.append(route)
+            routes[truck_id] = kept_routes
+            planner.update_truck(kept_routes, start_minutes[truck_id])
+
+        # recreate: insert them back in a random order, then reorder every trip exactly
+        rng.shuffle(removed)
+        # removed units that were late get another chance to be on time
+        late_ids = best_late_ids - removed_ids
+        planner.relaxed_package_ids = set(late_ids)
+        for i in removed:
+            unit = units[i]
+            truck_ids = (
+                [unit.required_truck_id] if unit.required_truck_id is not None else list(routes)
+            )
+            late_ids.update(
+                planner.insert_unit(routes, start_minutes, unit, truck_ids, max_packages)
+            )
+        if exact_time_limit != 0:
+            _reorder_within_budget(
+                planner, routes, start_minutes, exact_time_limit, time_budget, started
+            )
+
+        candidate = RoutePlan(
+            routes=routes,
+            late_package_ids=sorted(late_ids),
+            distance_table=distance_table,
+            hub=hub,
+        )
+        mileage = candidate.total_mileage
+        if (len(late_ids), mileage) < (len(best_late_ids), best_mileage - 1e-9):
+            result.plan = candidate
+            best_routes, best_mileage, best_late_ids = routes, mileage, late_ids
+            report(best_mileage, len(best_late_ids))
+
+    return result
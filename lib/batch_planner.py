@@ -0,0 +1,166 @@
+"""Plan many depots and days in parallel.
+
+Each `PlanningJob` is one package manifest, distance table and hub.
+`run_batch` plans the jobs across a pool of worker processes,
+saving each finished plan as a snapshot and appending its result to `results.jsonl`
+as soon as it completes, so long backfills can be followed (and survive) while they run.
+
+Run from the repository root with a CSV of jobs (columns: name, package_file, distance_file, hub):
+    python -m lib.batch_planner jobs.csv --output-dir plans/
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterable, Optional
+
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import default_trucks, deliver_packages
+from lib.snapshot import save_state
+from models.truck import DEFAULT_HUB
+
+RESULTS_FILENAME = "results.jsonl"
+
+
+@dataclass
+class PlanningJob:
+    name: str
+    package_file: str
+    distance_file: str
+    hub: str = DEFAULT_HUB
+
+
+@dataclass
+class JobResult:
+    name: str
+    hub: str
+    package_count: int = 0
+    total_mileage: float = 0.0
+    elapsed_seconds: float = 0.0
+    snapshot_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+def plan_job(job: PlanningJob, output_dir: str) -> JobResult:
+    """Plan a single job and save its snapshot to `output_dir/<name>.snap`.
+
+    Errors are reported on the result instead of raised, so one bad manifest
+    does not stop the rest of the batch.
+    """
+    start = time.perf_counter()
+    result = JobResult(name=job.name, hub=job.hub)
+    try:
+        packages = csv_to_packages(job.package_file)
+        distance_table = csv_to_distances(job.distance_file)
+        if job.hub not in distance_table:
+            raise ValueError(f"Hub {job.hub!r} is not in {job.distance_file}")
+
+        trucks = default_trucks(distance_table, hub=job.hub)
+        packages, total_mileage = deliver_packages(
+            packages, distance_table=distance_table, trucks=trucks, hub=job.hub
+        )
+
+        snapshot_path = os.path.join(output_dir, f"{job.name}.snap")
+        save_state(snapshot_path, packages, trucks)
+
+        result.package_count = len(packages)
+        result.total_mileage = total_mileage
+        result.snapshot_path = snapshot_path
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed_seconds = time.perf_counter() - start
+    return result
+
+
+def run_batch(
+    jobs: Iterable[PlanningJob],
+    output_dir: str,
+    max_workers: Optional[int] = None,
+    on_result: Optional[Callable[[JobResult], None]] = None,
+) -> list[JobResult]:
+    """Plan every job across `max_workers` processes (default: one per CPU).
+
+    Each result is appended to `output_dir/results.jsonl` and passed to `on_result`
+    as soon as its job finishes, so results arrive in completion order.
+    If a worker process dies, the jobs it takes down with the pool are reported
+    as failed rather than aborting the batch.
+    """
+    jobs = list(jobs)
+    names = [job.name for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Job names must be unique, since they name the snapshot files.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    results: list[JobResult] = []
+    results_path = os.path.join(output_dir, RESULTS_FILENAME)
+    with open(results_path, "a", encoding="utf-8") as results_file, ProcessPoolExecutor(
+        max_workers=max_workers
+    ) as executor:
+        futures = {executor.submit(plan_job, job, output_dir): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                job = futures[future]
+                result = JobResult(name=job.name, hub=job.hub, error=f"{type(e).__name__}: {e}")
+            results_file.write(json.dumps(asdict(result)) + "\n")
+            results_file.flush()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+def read_jobs(filepath: str) -> list[PlanningJob]:
+    """Read jobs from a CSV with a header of name, package_file, distance_file and hub.
+
+    The hub column is optional and defaults to "HUB".
+    """
+    with open(filepath, newline="", encoding="utf-8") as jobs_file:
+        return [
+            PlanningJob(
+                name=row["name"],
+                package_file=row["package_file"],
+                distance_file=row["distance_file"],
+                hub=row.get("hub") or DEFAULT_HUB,
+            )
+            for row in csv.DictReader(jobs_file)
+        ]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plan many WGUPS depots and days.")
+    parser.add_argument("jobs", help="CSV of name, package_file, distance_file, hub")
+    parser.add_argument("--output-dir", default="plans")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def report(result: JobResult):
+        if result.error is not None:
+            print(f"{result.name}: FAILED after {result.elapsed_seconds:.2f}s - {result.error}")
+        else:
+            print(
+                f"{result.name}: {result.package_count} packages, "
+                f"{result.total_mileage:.1f} miles in {result.elapsed_seconds:.2f}s"
+            )
+
+    results = run_batch(
+        read_jobs(args.jobs), args.output_dir, max_workers=args.workers, on_result=report
+    )
+    succeeded = [result for result in results if result.error is None]
+    print(
+        f"Planned {len(succeeded)}/{len(results)} jobs in {time.perf_counter() - start:.2f}s, "
+        f"{sum(result.total_mileage for result in succeeded):.1f} total miles"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Bulk parsing of large package manifests and distance tables.
+
+`csv_to_packages` converts every cell of every row on its own,
+including a `datetime.strptime` call per deadline, although a manifest only has
+a handful of distinct deadlines. Here the file is read in large chunks of whole lines,
+rows are transposed into columns, and each column is converted in one `map` call
+(deadlines through a cache of the distinct values), so the per-row Python work
+is mostly building the `Package` objects themselves.
+The cyclic garbage collector is paused while loading: none of the millions of rows
+and strings created form cycles, but each collection would still scan all of them.
+Large manifests can also be split by byte range and parsed in several processes.
+
+Both files are expected to keep each record on one line (no quoted line breaks),
+which is what lets a chunk or byte range be cut at any line boundary.
+"""
+
+import csv
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import zip_longest
+from typing import Iterator, Optional
+
+from lib.csv_utils import parse_delivery_time
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.gc_utils import collection_paused
+from models.package import Package
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# package file columns: id, address, city, state, zip, deadline, weight, special notes
+_PACKAGE_COLUMNS = 8
+
+
+@dataclass
+class PackageColumns:
+    """A manifest in columnar form, one entry per package in file order."""
+
+    package_ids: array = field(default_factory=lambda: array("q"))
+    addresses: list[str] = field(default_factory=list)
+    cities: list[str] = field(default_factory=list)
+    states: list[str] = field(default_factory=list)
+    zip_codes: list[str] = field(default_factory=list)
+    deadlines: list = field(default_factory=list)
+    weights: array = field(default_factory=lambda: array("d"))
+    special_notes: list[Optional[str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.package_ids)
+
+    def extend(self, other: "PackageColumns"):
+        self.package_ids.extend(other.package_ids)
+        self.addresses.extend(other.addresses)
+        self.cities.extend(other.cities)
+        self.states.extend(other.states)
+        self.zip_codes.extend(other.zip_codes)
+        self.deadlines.extend(other.deadlines)
+        self.weights.extend(other.weights)
+        self.special_notes.extend(other.special_notes)
+
+    def packages(self) -> Iterator[Package]:
+        return map(
+            Package,
+            self.package_ids,
+            self.addresses,
+            self.cities,
+            self.states,
+            self.zip_codes,
+            self.weights,
+            self.deadlines,
+            self.special_notes,
+        )
+
+
+def _read_line_chunks(
+    filepath: str, start: int, end: Optional[int], chunk_size: int
+) -> Iterator[list[str]]:
+    """Yield the lines starting in the byte range `[start, end)`, a chunk at a time.
+
+    A line belongs to the range its first byte is in, so adjacent ranges
+    split the file's lines between them without overlap.
+    """
+    with open(filepath, "rb") as csv_file:
+        if start > 0:
+            # skip the rest of a line that started in the previous range
+            csv_file.seek(start - 1)
+            csv_file.readline()
+        position = csv_file.tell()
+        leftover = b""
+        while end is None or position < end:
+            size = chunk_size if end is None else min(chunk_size, end - position)
+            data = csv_file.read(size)
+            if not data:
+                break
+            position += len(data)
+            if end is not None and position >= end and not data.endswith(b"\n"):
+                # finish the last line that starts inside the range
+                data += csv_file.readline()
+            cut = data.rfind(b"\n") + 1
+            if cut == 0:
+                leftover += data
+                continue
+            lines = (leftover + data[:cut]).decode("utf-8").split("\n")
+            leftover = data[cut:]
+            yield lines
+        if leftover:
+            yield leftover.decode("utf-8").split("\n")
+
+
+def _convert_rows(rows: list[list[str]], deadline_cache: dict) -> PackageColumns:
+    """Convert a chunk of package rows column by column."""
+    columns = PackageColumns()
+    if not rows:
+        return columns
+    if min(map(len, rows)) < _PACKAGE_COLUMNS:
+        return _convert_rows_one_by_one(rows, deadline_cache)
+    ids, addresses, cities, states, zip_codes, deadlines, weights, notes = list(
+        zip(*rows)
+    )[:_PACKAGE_COLUMNS]
+    try:
+        columns.package_ids = array("q", map(int, ids))
+        columns.weights = array("d", map(float, weights))
+        for deadline in set(deadlines).difference(deadline_cache):
+            deadline_cache[deadline] = parse_delivery_time(deadline)
+    except ValueError:
+        # a bad row somewhere in the chunk: find and skip it, as `csv_to_packages` does
+        return _convert_rows_one_by_one(rows, deadline_cache)
+    columns.addresses = list(addresses)
+    columns.cities = list(cities)
+    columns.states = list(states)
+    columns.zip_codes = list(zip_codes)
+    columns.deadlines = list(map(deadline_cache.__getitem__, deadlines))
+    columns.special_notes = [note or None for note in notes]
+    return columns
+
+
+def _convert_rows_one_by_one(rows: list[list[str]], deadline_cache: dict) -> PackageColumns:
+    columns = PackageColumns()
+    for row in rows:
+        try:
+            package_id = int(row[0])
+            weight = float(row[6])
+            deadline = deadline_cache.get(row[5]) or parse_delivery_time(row[5])
+        except Exception as e:
+            print(f"Error: {e}")
+            continue
+        deadline_cache[row[5]] = deadline
+        columns.package_ids.append(package_id)
+        columns.addresses.append(row[1])
+        columns.cities.append(row[2])
+        columns.states.append(row[3])
+        columns.zip_codes.append(row[4])
+        columns.deadlines.append(deadline)
+        columns.weights.append(weight)
+        columns.special_notes.append(row[7] or None)
+    return columns
+
+
+def _parse_package_range(
+    filepath: str, start: int, end: Optional[int], chunk_size: int
+) -> PackageColumns:
+    columns = PackageColumns()
+    deadline_cache: dict = {}
+    skip_header = start == 0
+    with collection_paused():
+        for lines in _read_line_chunks(filepath, start, end, chunk_size):
+            if skip_header:
+                lines = lines[1:]
+                skip_header = False
+            # blank lines (and the empty string after the last newline) come out as empty rows
+            rows = list(filter(None, csv.reader(lines)))
+            columns.extend(_convert_rows(rows, deadline_cache))
+    return columns
+
+
+def csv_to_package_columns(
+    filepath: str, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> PackageColumns:
+    """Parse a package file into columns, in chunks of about `chunk_size` bytes.
+
+    With more than one worker, the file is split into that many byte ranges,
+    parsed in separate processes and joined back in file order.
+    Rows that cannot be parsed are reported and skipped, like `csv_to_packages`.
+    """
+    if workers <= 1:
+        return _parse_package_range(filepath, 0, None, chunk_size)
+
+    size = os.path.getsize(filepath)
+    bounds = [size * worker // workers for worker in range(workers + 1)]
+    context = multiprocessing.get_context(
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    )
+    columns = PackageColumns()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        for part in executor.map(
+            _parse_package_range,
+            [filepath] * workers,
+            bounds[:-1],
+            bounds[1:],
+            [chunk_size] * workers,
+        ):
+            columns.extend(part)
+    return columns
+
+
+def csv_to_packages_bulk(
+    filepath: str, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> DeliveryHashTable:
+    """Load a package file like `csv_to_packages`, through the bulk column parser.
+
+    The hash table gets one bucket per package, so lookups stay short for large manifests.
+    """
+    columns = csv_to_package_columns(filepath, workers=workers, chunk_size=chunk_size)
+    with collection_paused():
+        packages = DeliveryHashTable(max(len(columns), 1))
+        for package_id, package in zip(columns.package_ids, columns.packages()):
+            packages.insert(package_id=package_id, package=package)
+    return packages
+
+
+def csv_to_distances_bulk(filepath: str) -> dict:
+    """Load a distance table like `csv_to_distances`, converting each row in one call.
+
+    A lower-triangular table (row i holds the distances to the first i + 1 locations)
+    is mirrored by transposing it, so no distance is stored one at a time.
+    """
+    with collection_paused():
+        with open(file=filepath, encoding="utf-8-sig") as distance_file:
+            rows = list(csv.reader(distance_file, delimiter=","))
+
+        locations = [row[1] for row in rows]
+        triangle = []
+        for row in rows:
+            try:
+                stop = row.index("", 2)
+            except ValueError:
+                stop = len(row)
+            triangle.append(list(map(float, row[2:stop])))
+
+        if all(len(values) == i + 1 for i, values in enumerate(triangle)):
+            # columns[j][k] is row k's distance to location j (None above the diagonal)
+            columns = list(zip_longest(*triangle))
+            return {
+                location: dict(zip(locations, triangle[i][:i] + list(columns[i][i:])))
+                for i, location in enumerate(locations)
+            }
+
+        # any other shape is filled in both directions, with later rows taking precedence
+        distance_map: dict = {location: {} for location in locations}
+        for location, values in zip(locations, triangle):
+            distance_map[location].update(zip(locations, values))
+            for to_location, distance in zip(locations, values):
+                distance_map[to_location][location] = distance
+        return distance_map
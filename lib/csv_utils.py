@@ -1,8 +1,9 @@
 import csv
+from collections.abc import Mapping
 from datetime import datetime, time
+from typing import Optional
 from models.package import Package
 from lib.delivery_data_structure import DeliveryHashTable, DeliveryStatus
-from copy import deepcopy
 
 
 def parse_delivery_time(time_str: str) -> datetime.time:
@@ -75,3 +76,34 @@ def csv_to_distances(filepath: str) -> dict:
             distance_map[to_location][location] = float(distance)
 
     return distance_map
+
+
+class LazyDistanceTable(Mapping):
+    """Distance table that is only read from its CSV the first time it is used.
+
+    Behaves like the dict returned by `csv_to_distances`,
+    so it can be passed anywhere a distance table is expected.
+    """
+
+    def __init__(self, filepath: str) -> None:
+        self.filepath = filepath
+        self._distances: Optional[dict] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._distances is not None
+
+    @property
+    def distances(self) -> dict:
+        if self._distances is None:
+            self._distances = csv_to_distances(self.filepath)
+        return self._distances
+
+    def __getitem__(self, location: str) -> dict:
+        return self.distances[location]
+
+    def __iter__(self):
+        return iter(self.distances)
+
+    def __len__(self) -> int:
+        return len(self.distances)
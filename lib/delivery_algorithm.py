@@ -2,16 +2,38 @@
 
 """
 
-from typing import Optional
-from lib.delivery_data_structure import DeliveryHashTable
+from typing import TYPE_CHECKING, Optional
+from lib.delivery_data_structure import ConcurrentDeliveryHashTable, DeliveryHashTable
 from models import Truck
+from models.truck import DEFAULT_HUB, TruckState
 from models.package import Package, DeliveryStatus
 import datetime
+import warnings
 
+if TYPE_CHECKING:
+    from lib.journal import DeliveryJournal
 
 START_TIME = datetime.datetime.strptime("08:00:00", "%H:%M:%S")
 
 
+def delivery_status_at_time(
+    selected_package: Package, current_time: datetime.time
+) -> DeliveryStatus:
+    """Return the simulated delivery status of a package at a given time.
+
+    Uses the same rules as `package_status_at_provided_time`,
+    but returns only the status so callers can format it themselves.
+    """
+    if (
+        selected_package.time_delivered is None
+        or current_time < selected_package.time_loaded_onto_truck
+    ):
+        return DeliveryStatus.AT_HUB
+    if selected_package.time_delivered < current_time:
+        return selected_package.delivery_status
+    return DeliveryStatus.EN_ROUTE
+
+
 def package_status_at_provided_time(
     selected_package: Package, current_time: datetime.time
 ) -> str:
@@ -59,9 +81,13 @@ def package_status_at_provided_time(
 
 
 def deliver_packages(
-    packages: DeliveryHashTable, distance_table: dict[str, dict[str, float]]
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    trucks: Optional[list[Truck]] = None,
+    hub: str = DEFAULT_HUB,
+    journal: Optional["DeliveryJournal"] = None,
 ) -> tuple[DeliveryHashTable, float]:
-    """Nearest-Neighbor Greedy Algorithm to deliver packages.
+    """Cheapest-Insertion Algorithm (with delivery time windows) to deliver packages.
 
     Assumptions:
         •  Each truck can carry a maximum of 16 packages, and the ID number of each package is unique.
@@ -75,99 +101,143 @@ def deliver_packages(
         •  The distances provided in the "WGUPS Distance Table" are equal regardless of the direction traveled.
         •  The day ends when all 40 packages have been delivered.
 
-        
-    **NOTE: All the special cases were handled by putting them all on truck 2's first trip.**
+    Every package's earliest load time and delivery deadline are treated as a hard time window.
+    Packages are inserted one at a time, tightest deadline first,
+    wherever they add the fewest miles to a truck's trips without making any delivery late
+    (see `lib.insertion_planner`), and the trucks then drive the planned trips in order.
+    Packages that cannot be delivered on time are still delivered, with a warning listing them.
+
+    `trucks` may be provided to keep a reference to the trucks' final states
+    (location, time, mileage, trips); by default two trucks are created,
+    with truck 2 starting at 9:05am.
+    `hub` is the depot's name in the distance table, where every trip starts and ends.
+    With a `journal` (see `lib.journal`), every address correction, load and delivery
+    is recorded in it, and the last batch is committed before returning.
+    A shared `Manifest` (see `lib.plan_state`) is planned with `plan_manifest` instead,
+    so it is left unchanged, and the planned packages are returned as a new table.
+    """
+    # imported here, since the planners build on `correct_package_address` from this module
+    from lib.insertion_planner import deliver_routes, plan_routes
+    from lib.plan_state import Manifest, plan_manifest
+
+    if trucks is None:
+        trucks = default_trucks(distance_table, hub=hub)
+
+    if journal is not None:
+        # addresses are corrected as the packages are loaded, and journaled with the truck's journal
+        for truck in trucks:
+            truck.journal = journal
+
+    if isinstance(packages, Manifest):
+        state, total_mileage = plan_manifest(packages, distance_table, trucks=trucks, hub=hub)
+        if journal is not None:
+            journal.commit()
+        return state.packages(), total_mileage
+
+    plan = plan_routes(
+        packages,
+        distance_table,
+        truck_start_times={truck.truck_id: truck.current_time for truck in trucks},
+        hub=hub,
+        # planning at the slowest truck's pace keeps every trip on time
+        speed_mph=min(truck.speed_mph for truck in trucks),
+    )
+    if plan.late_package_ids:
+        warnings.warn(
+            f"Packages {plan.late_package_ids} cannot be delivered by their deadlines"
+        )
+
+    # total truck mileage must be less than 140 miles
+    total_mileage = deliver_routes(plan, trucks)
+    if journal is not None:
+        journal.commit()
+
+    return packages, total_mileage
+
+
+def fleet_state_at(
+    trucks: list[Truck], current_time: datetime.time
+) -> list[TruckState]:
+    """Return every truck's location, load and mileage at the given time.
+
+    Each truck's state is reconstructed from the leg log recorded while delivering,
+    in O(log legs) per truck.
     """
+    return [truck.state_at(current_time) for truck in trucks]
+
 
+def total_mileage_at(trucks: list[Truck], current_time: datetime.time) -> float:
+    """Return the combined mileage driven by all trucks by the given time."""
+    return sum(state.mileage for state in fleet_state_at(trucks, current_time))
+
+
+def default_trucks(
+    distance_table: dict[str, dict[str, float]], hub: str = DEFAULT_HUB
+) -> list[Truck]:
+    """Create the trucks used by `deliver_packages` when none are provided."""
     # three trucks are available, but only two drivers, so only two can be utilized.
-    truck_1 = Truck(truck_id=1, distance_table=distance_table)
-    truck_2 = Truck(truck_id=2, distance_table=distance_table)
+    truck_1 = Truck(truck_id=1, distance_table=distance_table, hub=hub)
+    truck_2 = Truck(truck_id=2, distance_table=distance_table, hub=hub)
 
     # default truck start time is 8:00am
     # simulate the second truck starting at 9:05am
     # so all delayed packages are loaded onto truck 2
     truck_2.current_time = datetime.time(9, 5)
+    return [truck_1, truck_2]
 
-    # Package-Loading Algorithm
-    max_packages_per_truck = 16
-    i: int = 0
-    current_package_truck_1: Optional[Package] = None
-    current_package_truck_2: Optional[Package] = None
-    
-    # iterate through packages and load them onto trucks, 16 at a time.
-    # truck 1 is fully loaded before truck 2, with its "priority deadline"
-    # set to focus on the packages due before 10:30.
-
-    while i < len(packages):
-        j = i
-        while j < i + max_packages_per_truck and j < len(packages):
-            current_package_truck_1 = get_next_closest_package(
-                current_package=current_package_truck_1,
-                packages=packages,
-                distance_table=distance_table,
-                current_time=truck_1.current_time,
-                truck_id=truck_1.truck_id,
-                priority_deadline=datetime.time(10, 30),
-            )
-            if current_package_truck_1 is not None:
-                truck_1.load_package(current_package_truck_1)
-            j += 1
-
-        # repeat loading operation with second truck
-        j = i
-        while j < i + max_packages_per_truck and j < len(packages):
-            current_package_truck_2 = get_next_closest_package(
-                current_package=current_package_truck_2,
-                packages=packages,
-                distance_table=distance_table,
-                current_time=truck_2.current_time,
-                truck_id=truck_2.truck_id,
-                priority_deadline=datetime.time(10, 30),
-            )
-            if current_package_truck_2 is not None:
-                truck_2.load_package(current_package_truck_2)
-            j += 1
-        i += max_packages_per_truck
-
-        # deliver packages on both trucks
-        truck_1.deliver_all_packages()
-        truck_2.deliver_all_packages()
-
-        # double-check that no packages were missed
-        # if all other packages are delivered before the earliest load time of a package,
-        # the delivery loop can end without trucks every picking up the package.
-        if current_package_truck_1 is None and current_package_truck_2 is None:
-            needs_reset = False
-            # iterate through packages and make sure all have been loaded onto a truck
-            for package_id in packages.package_ids:
-                package = packages.lookup(package_id)
-                # if any were never loaded,
-                # allow some time to pass and restart delivery loop
-                # only undelivered packages will be attempted to be delivered on next loop
-                if package.truck_id is None:
-                    needs_reset = True
-                    # allow some time to pass
-                    truck_1.current_time = datetime.time(
-                        truck_1.current_time.hour,
-                        (truck_1.current_time.minute + 5) % 60,
-                    )
-                    truck_2.current_time = datetime.time(
-                        truck_2.current_time.hour,
-                        (truck_2.current_time.minute + 5) % 60,
-                    )
-                    # reset the loops
-                    i = 0
-                    current_package_truck_1 = None
-                    current_package_truck_2 = None
-                    break
-
-            if not needs_reset:
-                break
 
-    # total truck mileage must be less than 140 miles
-    total_mileage = truck_1.current_mileage + truck_2.current_mileage
+# the known address corrections: package id to (address, city, state, zip code)
+ADDRESS_CORRECTIONS = {9: ("410 S State St", "Salt Lake City", "UT", "84111")}
 
-    return packages, total_mileage
+
+def corrected_address(package: Package) -> str:
+    """Return the address the package will be delivered to, in the distance table's form.
+
+    Unlike `correct_package_address`, this never changes the package,
+    so planners can place a package on the map before its correction becomes known.
+    """
+    correction = ADDRESS_CORRECTIONS.get(package.package_id)
+    if correction is None:
+        return package.address
+    address, _, _, zip_code = correction
+    return f"{address} ({zip_code})"
+
+
+def correct_package_address(
+    package: Package,
+    journal: Optional["DeliveryJournal"] = None,
+    package_table: Optional[ConcurrentDeliveryHashTable] = None,
+) -> Package:
+    """Apply the address correction for package #9, which becomes known at 10:20am.
+
+    Callers must only call this once the package may be loaded
+    (its `earliest_load_time` is the time the correction becomes known).
+    The correction is recorded in `journal`, if given.
+    With a `package_table`, the package is replaced there by a corrected copy
+    instead of being changed in place (see `Truck.package_table`).
+    Returns the corrected package.
+    """
+    correction = ADDRESS_CORRECTIONS.get(package.package_id)
+    # packages that are already corrected (such as a `Manifest`'s) are left untouched
+    if correction is None or package.delivery_address == correction[0]:
+        return package
+    address, city, state, zip_code = correction
+    if package_table is not None:
+        package = package_table.update(
+            package.package_id,
+            delivery_address=address,
+            delivery_city=city,
+            delivery_state=state,
+            delivery_zip_code=zip_code,
+        )
+    else:
+        package.delivery_address = address
+        package.delivery_city = city
+        package.delivery_state = state
+        package.delivery_zip_code = zip_code
+    if journal is not None:
+        journal.record_address(package)
+    return package
 
 
 def get_next_closest_package(
@@ -178,6 +248,7 @@ def get_next_closest_package(
     current_time: datetime.time,
     truck_id: int,
     priority_deadline: Optional[datetime.time] = None,
+    hub: str = DEFAULT_HUB,
 ) -> Optional[Package]:
     """Get the next package for delivery.
     Iterates through all the packages returns the one closest to the current location, 
@@ -185,11 +256,13 @@ def get_next_closest_package(
     earliest pickup time from the depot, a specific truck for delivery, 
     and allows the user to specify a "priority deadline" -- that is, it will prioritize
     packages with delivery deadlines before the provided time.
+    `distance_table` may also be a `GeoDistanceTable`,
+    whose spatial index is used to find the closest package.
+    The packages are never changed, so this may be called on a shared `Manifest`.
     """
 
 
-    closest_package: Optional[Package] = None
-    min_distance: float = float("inf")
+    eligible_packages: list[Package] = []
 
     for candidate_id in packages.package_ids:
         # make sure it's not the same package
@@ -216,40 +289,44 @@ def get_next_closest_package(
         ):
             continue
 
-        # if the current delivery has an early deadline it's prioritizing,
-        # and the current time is before that deadline,
-        # skip the package if its deadline is later
-        # unless no package has been selected for delivery
-        # (we must deliver all morning packages by 10:30)
-        if priority_deadline is not None:
-            if current_time < priority_deadline:
-                if candidate.delivery_deadline > priority_deadline:
-                    if closest_package is not None:
-                        continue
-
-        # package 9 cannot be loaded til 10:20am (when its correct address becomes known)
-        # after that time, correct the address.
-        # I acknowledge that this side effect is bad practice,
-        # but wanted to put it here to simulate learning the correct address
-        # only after 10:20am.
-        if candidate.package_id == 9:
-            candidate.delivery_address = "410 S State St"
-            candidate.delivery_city = "Salt Lake City"
-            candidate.delivery_state = "UT"
-            candidate.delivery_zip_code = "84111"
-
-        # otherwise, get the next closest point
-        # if no current package was provided,
-        # we are currently at the HUB
-        current_location = (
-            current_package.address if current_package is not None else "HUB"
+        # package 9 cannot be loaded til 10:20am (when its correct address becomes known);
+        # its distance is measured to the corrected address, which is applied when it is loaded
+        eligible_packages.append(candidate)
+
+    # if the current delivery has an early deadline it's prioritizing,
+    # and the current time is before that deadline,
+    # only consider packages due by that deadline, unless there are none
+    # (we must deliver all morning packages by 10:30)
+    if priority_deadline is not None and current_time < priority_deadline:
+        eligible_packages = [
+            candidate
+            for candidate in eligible_packages
+            if candidate.delivery_deadline <= priority_deadline
+        ] or eligible_packages
+
+    # get the next closest point
+    # if no current package was provided,
+    # we are currently at the hub
+    current_location = corrected_address(current_package) if current_package is not None else hub
+
+    # distance tables with a spatial index find the closest address themselves,
+    # without computing the distance to every candidate
+    closest = getattr(distance_table, "closest", None)
+    if closest is not None:
+        closest_address = closest(
+            current_location, (corrected_address(candidate) for candidate in eligible_packages)
+        )
+        return next(
+            (
+                candidate
+                for candidate in eligible_packages
+                if corrected_address(candidate) == closest_address
+            ),
+            None,
         )
-        distance_to_candidate = distance_table[current_location][candidate.address]
-
-        # if the candidate is closer than the last identified package,
-        # select it for the next visit
-        if distance_to_candidate < min_distance:
-            closest_package = candidate
-            min_distance = distance_to_candidate
 
-    return closest_package
+    return min(
+        eligible_packages,
+        key=lambda candidate: distance_table[current_location][corrected_address(candidate)],
+        default=None,
+    )
@@ -1,6 +1,10 @@
 import csv
+import dataclasses
+import hashlib
+import threading
+from dataclasses import dataclass
 from enum import StrEnum
-from typing import Optional
+from typing import Hashable, Iterator, Optional
 from models.package import Package
 
 
@@ -27,11 +31,14 @@ class LinkedList:
         return self.length
 
     def insert_package(self, package: Package):
-        new_node: Node = Node(package=package)
+        self.append_node(Node(package=package))
+
+    def append_node(self, new_node: Node):
         if self.head is None:
             self.head = new_node
             self.tail = new_node
         else:
+            new_node.previous = self.tail
             self.tail.next = new_node
             self.tail = new_node
         self.length += 1
@@ -39,6 +46,8 @@ class LinkedList:
     def remove_node(self, node: Node) -> Node:
         if node == self.head:
             self.head = node.next
+            if node.next is not None:
+                node.next.previous = None
             node.next = None
             if self.length == 1:
                 self.tail = None
@@ -64,7 +73,33 @@ class LinkedList:
         return None
 
 
+@dataclass(frozen=True)
+class BucketStats:
+    """How evenly a hash table's entries are spread over its buckets.
+
+    A successful lookup walks its bucket's chain up to the entry, so on average
+    `mean_probes_hit` nodes; a lookup for a missing key walks a whole chain,
+    `mean_probes_miss` (the load factor) nodes on average.
+    """
+
+    buckets: int
+    entries: int
+    empty_buckets: int
+    max_chain: int
+    # over the buckets holding at least one entry
+    mean_chain: float
+    mean_probes_hit: float
+    mean_probes_miss: float
+
+    @property
+    def load_factor(self) -> float:
+        return self.entries / self.buckets
+
+
 class DeliveryHashTable:
+    # the linked list used for each bucket
+    bucket_type = LinkedList
+
     def __init__(self, length: int):
         if length < 1:
             raise ValueError(
@@ -74,11 +109,41 @@ class DeliveryHashTable:
         self.package_ids: list[int] = []
         
         # list of linked lists to act as the hash table itself
-        self.table = [LinkedList() for _ in range(length)]
+        self.table = [self.bucket_type() for _ in range(length)]
 
     def __len__(self):
         return len(self.package_ids)
 
+    def __iter__(self) -> Iterator[Package]:
+        """Iterate over every package, bucket by bucket.
+
+        This walks the linked lists directly instead of looking up each id,
+        so packages come out in bucket order rather than insertion order.
+        """
+        for linked_list in self.table:
+            current = linked_list.head
+            while current is not None:
+                yield current.package
+                current = current.next
+
+    def bucket_stats(self) -> BucketStats:
+        """Measure the chain lengths, to check that lookups stay O(1) for the stored keys."""
+        lengths = [len(linked_list) for linked_list in self.table]
+        entries = sum(lengths)
+        used = [length for length in lengths if length]
+        return BucketStats(
+            buckets=len(lengths),
+            entries=entries,
+            empty_buckets=len(lengths) - len(used),
+            max_chain=max(lengths),
+            mean_chain=entries / len(used) if used else 0.0,
+            # the i-th node of a chain takes i probes to reach
+            mean_probes_hit=(
+                sum(length * (length + 1) / 2 for length in used) / entries if entries else 0.0
+            ),
+            mean_probes_miss=entries / len(lengths),
+        )
+
     def hash_index(self, package_id: int) -> int:
         """Hash the package id to use as an index for the linked list."""
         if package_id < 1:
@@ -111,3 +176,210 @@ class DeliveryHashTable:
             self.package_ids.remove(package_id)
             return node
         return None
+
+
+DEFAULT_HASH_SEED = 0
+_MASK_64 = (1 << 64) - 1
+_GOLDEN_RATIO_64 = 0x9E3779B97F4A7C15
+
+
+def _mix64(value: int) -> int:
+    """Spread every bit of a 64-bit value over all the others (the MurmurHash3 finalizer)."""
+    value &= _MASK_64
+    value ^= value >> 33
+    value = (value * 0xFF51AFD7ED558CCD) & _MASK_64
+    value ^= value >> 33
+    value = (value * 0xC4CEB9FE1A85EC53) & _MASK_64
+    value ^= value >> 33
+    return value
+
+
+def _stable_hash(key: Hashable) -> int:
+    """Hash a key the same way in every process.
+
+    Python salts `hash` of strings and bytes per process (PYTHONHASHSEED),
+    so they are hashed with BLAKE2b instead (or packed into one word, if short),
+    and tuples combine their items' stable hashes.
+    Other keys (ints, among them) use `hash`, which is already the same everywhere.
+    """
+    if type(key) is int:
+        return hash(key)
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    if isinstance(key, bytes):
+        # up to 7 bytes fit in one word with their length, and the finalizer spreads them
+        if len(key) < 8:
+            return int.from_bytes(key, "little") | len(key) << 56
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+    if isinstance(key, tuple):
+        value = len(key)
+        for item in key:
+            value = _mix64(value * _GOLDEN_RATIO_64 + _stable_hash(item))
+        return value
+    return hash(key)
+
+
+def _nodes(linked_list: LinkedList) -> Iterator[Node]:
+    current = linked_list.head
+    while current is not None:
+        yield current
+        current = current.next
+
+
+class _KeyedNode(Node):
+    def __init__(self, package: Package, key: Hashable) -> None:
+        super().__init__(package)
+        self.key = key
+
+
+class _KeyedLinkedList(LinkedList):
+    def insert_keyed(self, key: Hashable, package: Package):
+        self.append_node(_KeyedNode(package, key))
+
+    def find_key(self, key: Hashable) -> _KeyedNode | None:
+        current = self.head
+        while current is not None:
+            if current.key == key:
+                return current
+            current = current.next
+        return None
+
+
+class KeyedDeliveryHashTable(DeliveryHashTable):
+    """A `DeliveryHashTable` keyed by any hashable key, such as a tracking number.
+
+    Keys may be ints, strings (alphanumeric tracking numbers) or tuples of them
+    (composite keys, such as a route and a stop). The key's hash is mixed with `seed`
+    and a 64-bit finalizer, so sequential, strided and otherwise patterned keys
+    still spread evenly, and the table has a power-of-two number of buckets,
+    indexed with a bit mask. Strings are hashed with BLAKE2b rather than Python's
+    per-process salted `hash`, so for ints, strings, bytes and tuples of them
+    a given `seed` gives the same layout (and `bucket_stats`) in every run.
+    The table doubles once it holds more entries than buckets, keeping chains short.
+    Keys are passed as `package_id`, as in the base class, so callers can use either table,
+    and `package_ids` holds the keys, in insertion order.
+    """
+
+    bucket_type = _KeyedLinkedList
+
+    def __init__(self, length: int, seed: int = DEFAULT_HASH_SEED):
+        if length < 1:
+            raise ValueError(
+                "The hash table must be initialized with a positive length."
+            )
+        # round up to a power of two, so the index is the hash's low bits
+        super().__init__(1 << (length - 1).bit_length())
+        self.seed = seed
+
+    def hash_index(self, key: Hashable) -> int:
+        """Hash any key to the index of its bucket."""
+        return _mix64(_stable_hash(key) ^ self.seed) & (len(self.table) - 1)
+
+    def _grow(self):
+        nodes = [node for linked_list in self.table for node in _nodes(linked_list)]
+        self.table = [self.bucket_type() for _ in range(2 * len(self.table))]
+        for node in nodes:
+            self.table[self.hash_index(node.key)].insert_keyed(node.key, node.package)
+
+    def insert(self, package_id: Hashable, package: Package):
+        """Add a package to the hash table under the key `package_id`."""
+        if len(self.package_ids) >= len(self.table):
+            self._grow()
+        self.table[self.hash_index(package_id)].insert_keyed(package_id, package)
+        self.package_ids.append(package_id)
+
+    def lookup(self, package_id: Hashable) -> Package | None:
+        """Return the package stored under the key `package_id`, or None."""
+        node = self.table[self.hash_index(package_id)].find_key(package_id)
+        if node is not None:
+            return node.package
+        return None
+
+    def remove(self, package_id: Hashable) -> Package | None:
+        """Remove and return the package stored under the key `package_id`, or return None."""
+        linked_list = self.table[self.hash_index(package_id)]
+        node = linked_list.find_key(package_id)
+        if node is None:
+            return None
+        linked_list.remove_node(node)
+        self.package_ids.remove(package_id)
+        return node.package
+
+
+DEFAULT_LOCK_STRIPES = 16
+
+
+class _ReaderSafeLinkedList(LinkedList):
+    def remove_node(self, node: Node) -> Node:
+        # unlink the node, but leave its own links in place,
+        # so a reader standing on it can still walk on to the rest of the list
+        if node.previous is None:
+            self.head = node.next
+        else:
+            node.previous.next = node.next
+        if node.next is None:
+            self.tail = node.previous
+        else:
+            node.next.previous = node.previous
+        self.length -= 1
+        return node
+
+
+class ConcurrentDeliveryHashTable(DeliveryHashTable):
+    """A `DeliveryHashTable` that many threads can read while others write.
+
+    Writers lock only the stripe of buckets they change (bucket index modulo the stripe count),
+    so writes to different stripes proceed independently.
+    Readers take no locks at all: nodes are fully built before they are linked in,
+    removed nodes keep their links so a reader walking over one is never cut off,
+    and `update` replaces a package with an updated copy in a single assignment
+    (read-copy-update), so readers see either the old package or the new one, never a mix.
+
+    This only holds while the packages in the table are never changed in place:
+    every change must go through `update`. Trucks do so when given the table
+    as their `package_table`, as does `correct_package_address`.
+    """
+
+    bucket_type = _ReaderSafeLinkedList
+
+    def __init__(self, length: int, stripes: int = DEFAULT_LOCK_STRIPES):
+        super().__init__(length)
+        if stripes < 1:
+            raise ValueError("The table must have at least one lock stripe.")
+        self._locks = [threading.Lock() for _ in range(min(stripes, length))]
+        self._package_ids_lock = threading.Lock()
+
+    def _lock_for(self, index: int) -> threading.Lock:
+        return self._locks[index % len(self._locks)]
+
+    def insert(self, package_id: int, package: Package):
+        index: int = self.hash_index(package_id)
+        with self._lock_for(index):
+            self.table[index].insert_package(package)
+        with self._package_ids_lock:
+            self.package_ids.append(package_id)
+
+    def remove(self, package_id: int) -> Package | None:
+        index: int = self.hash_index(package_id)
+        with self._lock_for(index):
+            node = self.table[index].find_node(package_id)
+            if node is None:
+                return None
+            self.table[index].remove_node(node)
+        with self._package_ids_lock:
+            self.package_ids.remove(package_id)
+        return node.package
+
+    def update(self, package_id: int, **changes) -> Package | None:
+        """Replace a package with a copy that has the given fields changed.
+
+        Returns the new package, or None if the package is not in the table.
+        Readers holding the old package keep an unchanged snapshot of it.
+        """
+        index: int = self.hash_index(package_id)
+        with self._lock_for(index):
+            node = self.table[index].find_node(package_id)
+            if node is None:
+                return None
+            node.package = dataclasses.replace(node.package, **changes)
+            return node.package
@@ -0,0 +1,220 @@
+"""The delivery simulation as a stream of events.
+
+`deliver_packages` drives every truck to the end of its day before returning,
+so its results can only be read from the finished package table.
+`route_events` instead drives the planned trips lazily and yields an event
+for every package loaded, truck departure, delivery and return, in the order they happen
+across all trucks; each truck only moves as far as the consumer has read.
+
+`EventFanOut` passes one stream to several asyncio subscribers (such as the tracking page
+and analytics), each through its own bounded queue: when a subscriber falls behind
+and its queue fills, publishing waits for it, so memory stays bounded by the queue sizes.
+Subscribers read inside `async with`, so one that stops early is closed
+and never holds up the others.
+"""
+
+import asyncio
+import datetime
+import heapq
+import warnings
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from lib.delivery_algorithm import correct_package_address, default_trucks
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.insertion_planner import RoutePlan, plan_routes
+from lib.time_utils import minutes_to_time
+from models.truck import DEFAULT_HUB, Truck
+
+DEFAULT_QUEUE_SIZE = 64
+
+
+class EventType(StrEnum):
+    PACKAGE_LOADED = "package_loaded"
+    TRUCK_DEPARTED = "truck_departed"
+    PACKAGE_DELIVERED = "package_delivered"
+    TRUCK_RETURNED = "truck_returned"
+
+
+@dataclass(frozen=True)
+class DeliveryEvent:
+    """Something that happened to a truck, at `location` with `mileage` on its odometer.
+
+    `package_id` is set for loads and deliveries.
+    """
+
+    time: datetime.time
+    event_type: EventType
+    truck_id: int
+    location: str
+    mileage: float
+    package_id: Optional[int] = None
+
+
+def _truck_events(truck: Truck, plan: RoutePlan) -> Iterator[DeliveryEvent]:
+    for route in plan.routes.get(truck.truck_id, []):
+        truck.current_time = max(truck.current_time, minutes_to_time(route.departure_time))
+        for package in route.packages:
+            package = correct_package_address(
+                package, journal=truck.journal, package_table=truck.package_table
+            )
+            truck.load_package(package)
+            yield DeliveryEvent(
+                truck.current_time,
+                EventType.PACKAGE_LOADED,
+                truck.truck_id,
+                truck.current_location,
+                truck.current_mileage,
+                package.package_id,
+            )
+        yield DeliveryEvent(
+            truck.current_time,
+            EventType.TRUCK_DEPARTED,
+            truck.truck_id,
+            truck.current_location,
+            truck.current_mileage,
+        )
+        for leg, package in truck.drive_trip(in_load_order=True):
+            yield DeliveryEvent(
+                leg.arrival_time,
+                EventType.PACKAGE_DELIVERED if package is not None else EventType.TRUCK_RETURNED,
+                truck.truck_id,
+                leg.to_location,
+                leg.end_mileage,
+                package.package_id if package is not None else None,
+            )
+
+
+def route_events(plan: RoutePlan, trucks: list[Truck]) -> Iterator[DeliveryEvent]:
+    """Drive every planned trip, yielding each truck's events in time order.
+
+    Each truck's events are generated lazily and merged by time,
+    so stopping early leaves every truck where the last event read left it.
+    Once exhausted, the trucks and packages end in the same state as after `deliver_routes`.
+    """
+    return heapq.merge(
+        *(_truck_events(truck, plan) for truck in trucks), key=lambda event: event.time
+    )
+
+
+def stream_deliveries(
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    trucks: Optional[list[Truck]] = None,
+    hub: str = DEFAULT_HUB,
+) -> Iterator[DeliveryEvent]:
+    """Plan the day like `deliver_packages`, then yield its events as the trucks drive."""
+    if trucks is None:
+        trucks = default_trucks(distance_table, hub=hub)
+    plan = plan_routes(
+        packages,
+        distance_table,
+        truck_start_times={truck.truck_id: truck.current_time for truck in trucks},
+        hub=hub,
+        speed_mph=min(truck.speed_mph for truck in trucks),
+    )
+    if plan.late_package_ids:
+        warnings.warn(
+            f"Packages {plan.late_package_ids} cannot be delivered by their deadlines"
+        )
+    return route_events(plan, trucks)
+
+
+# marks the end of the stream in each subscriber's queue
+_END = object()
+
+
+class Subscription:
+    """One subscriber's view of an `EventFanOut`, read with `async for`.
+
+    Read it inside `async with`, so it is closed however the reading stops
+    (a `break` or an exception): the publisher waits for room in every open queue,
+    so a subscription left open but no longer read would stall the whole stream.
+    """
+
+    def __init__(self, fan_out: "EventFanOut", maxsize: int) -> None:
+        self._fan_out = fan_out
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.closed = False
+        # publishing has finished: the stream ends once the queue is drained
+        self._ended = False
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def __aiter__(self) -> AsyncIterator[DeliveryEvent]:
+        return self
+
+    async def __anext__(self) -> DeliveryEvent:
+        if self.closed or (self._ended and self._queue.empty()):
+            self.closed = True
+            raise StopAsyncIteration
+        event = await self._queue.get()
+        if event is _END:
+            self.closed = True
+            raise StopAsyncIteration
+        return event
+
+    def _end(self):
+        """Mark the end of the stream without waiting for room in the queue."""
+        self._ended = True
+        # wake a reader waiting on an empty queue; a full one is drained before it ends
+        if not self._queue.full():
+            self._queue.put_nowait(_END)
+
+    async def aclose(self):
+        self.close()
+
+    def close(self):
+        """Stop receiving events, without holding up the other subscribers."""
+        self.closed = True
+        if self in self._fan_out.subscriptions:
+            self._fan_out.subscriptions.remove(self)
+        # free a publisher waiting for room in this queue
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+
+class EventFanOut:
+    """Publish one event stream to every subscriber, through bounded queues.
+
+    Subscribe before publishing; each subscriber receives every event published after it
+    subscribed, in order, and its iteration ends when publishing finishes.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer.")
+        self.maxsize = maxsize
+        self.subscriptions: list[Subscription] = []
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.maxsize)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    async def publish(self, events: Iterable[DeliveryEvent]) -> int:
+        """Send every event to every open subscriber, then end their streams.
+
+        Waits whenever a subscriber's queue is full (backpressure),
+        so the events are only generated as fast as the slowest subscriber reads them.
+        Ending the streams never waits, so a subscriber that stopped reading
+        cannot keep publishing from returning.
+        Returns the number of events published.
+        """
+        count = 0
+        try:
+            for event in events:
+                for subscription in list(self.subscriptions):
+                    if not subscription.closed:
+                        await subscription._queue.put(event)
+                count += 1
+        finally:
+            for subscription in list(self.subscriptions):
+                if not subscription.closed:
+                    subscription._end()
+        return count
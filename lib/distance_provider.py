@@ -0,0 +1,236 @@
+"""Distance providers: distance tables whose distances are looked up (or fetched) on demand.
+
+`csv_to_distances` materializes every pair of locations up front,
+but a day of routing only touches a small fraction of them.
+A `DistanceProvider` behaves like that dict of dicts (`provider[a][b]` is the distance from a to b),
+so it can be passed to `Truck`, `deliver_packages` and the other planners in its place,
+while its distances come from somewhere else.
+
+`CachedDistanceProvider` fetches distances from an expensive source
+(such as a routing engine) through a callback, only when they are first needed.
+Misses are batched into bulk requests, recently used pairs are kept in a bounded LRU cache,
+and hit/miss statistics show how well the cache is working.
+"""
+
+from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+DEFAULT_MAX_CACHED_PAIRS = 100_000
+DEFAULT_BATCH_SIZE = 1_000
+
+# fetches the distance for each (from, to) pair, in order
+FetchDistances = Callable[[list[tuple[str, str]]], list[float]]
+
+
+class DistanceRow(Mapping):
+    """The distances from one location to every other, looked up through its provider."""
+
+    def __init__(self, provider: "DistanceProvider", origin: str) -> None:
+        self.provider = provider
+        self.origin = origin
+
+    def __getitem__(self, location: str) -> float:
+        return self.provider.distance(self.origin, location)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.provider)
+
+    def __len__(self) -> int:
+        return len(self.provider)
+
+
+class DistanceProvider(Mapping):
+    """A distance table that looks up distances on demand.
+
+    Subclasses implement `distances_from`, and `__contains__`, `__iter__` and `__len__`
+    over the locations; indexing the provider by a location returns a row of distances from it.
+    """
+
+    @abstractmethod
+    def distances_from(self, origin: str, destinations: Iterable[str]) -> list[float]:
+        """Return the distance from `origin` to each destination, in order."""
+
+    @abstractmethod
+    def __contains__(self, location) -> bool: ...
+
+    def distance(self, from_location: str, to_location: str) -> float:
+        return self.distances_from(from_location, [to_location])[0]
+
+    def distances_to(self, destination: str, origins: Iterable[str]) -> list[float]:
+        """Return the distance from each origin to `destination`, in order."""
+        return [self.distance(origin, destination) for origin in origins]
+
+    def __getitem__(self, location: str) -> DistanceRow:
+        if location not in self:
+            raise KeyError(location)
+        return DistanceRow(self, location)
+
+    def closest(self, location: str, candidates: Iterable[str]) -> Optional[str]:
+        """Return the candidate closest to `location`, or None if there are none.
+
+        All candidate distances are looked up in one request.
+        """
+        candidates = list(dict.fromkeys(candidates))
+        if not candidates:
+            return None
+        distances = self.distances_from(location, candidates)
+        return min(zip(distances, candidates))[1]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # bulk requests made to the fetch callback
+    fetches: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CachedDistanceProvider(DistanceProvider):
+    """Fetch distances through a callback on first use, keeping recent pairs in an LRU cache.
+
+    `fetch` receives a list of (from, to) pairs and returns their distances in the same order;
+    each call fetches at most `batch_size` pairs.
+    Distances are assumed symmetric (as in the WGUPS distance table) unless `symmetric` is False,
+    so a pair and its reverse share one cache entry.
+    At most `max_cached_pairs` pairs are cached; the least recently used are evicted first.
+    """
+
+    def __init__(
+        self,
+        locations: Iterable[str],
+        fetch: FetchDistances,
+        max_cached_pairs: int = DEFAULT_MAX_CACHED_PAIRS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        symmetric: bool = True,
+    ) -> None:
+        if max_cached_pairs < 1 or batch_size < 1:
+            raise ValueError("max_cached_pairs and batch_size must be positive integers.")
+        self.locations = list(dict.fromkeys(locations))
+        self._location_set = set(self.locations)
+        self.fetch = fetch
+        self.max_cached_pairs = max_cached_pairs
+        self.batch_size = batch_size
+        self.symmetric = symmetric
+        self.stats = CacheStats()
+        self._cache: OrderedDict[tuple[str, str], float] = OrderedDict()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.locations)
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def __contains__(self, location) -> bool:
+        return location in self._location_set
+
+    def _key(self, from_location: str, to_location: str) -> tuple[str, str]:
+        if self.symmetric and to_location < from_location:
+            return to_location, from_location
+        return from_location, to_location
+
+    def distance(self, from_location: str, to_location: str) -> float:
+        if from_location == to_location:
+            return 0.0
+        key = self._key(from_location, to_location)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats.hits += 1
+            return self._cache[key]
+        self.prefetch([key])
+        return self._cache[key]
+
+    def distances_from(self, origin: str, destinations: Iterable[str]) -> list[float]:
+        return self._distances([(origin, destination) for destination in destinations])
+
+    def distances_to(self, destination: str, origins: Iterable[str]) -> list[float]:
+        if self.symmetric:
+            return self.distances_from(destination, origins)
+        return self._distances([(origin, destination) for origin in origins])
+
+    def _distances(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """Return the distance for each (from, to) pair, fetching the uncached ones together."""
+        keys = [self._key(from_location, to_location) for from_location, to_location in pairs]
+        self.prefetch(
+            key
+            for key, (from_location, to_location) in zip(keys, pairs)
+            if from_location != to_location
+        )
+        # everything requested is cached now, unless the batch itself overflowed the cache
+        distances = []
+        for key, (from_location, to_location) in zip(keys, pairs):
+            if from_location == to_location:
+                distances.append(0.0)
+            elif key in self._cache:
+                distances.append(self._cache[key])
+            else:
+                distances.append(self._fetch_batch([key])[0])
+        return distances
+
+    def prefetch(self, pairs: Iterable[tuple[str, str]]):
+        """Fetch every uncached pair, in as few bulk requests as possible."""
+        missing: dict[tuple[str, str], None] = {}
+        for from_location, to_location in pairs:
+            key = self._key(from_location, to_location)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats.hits += 1
+            elif key in missing:
+                # the same pair twice in one request is fetched once
+                self.stats.hits += 1
+            else:
+                for location in key:
+                    if location not in self._location_set:
+                        raise KeyError(location)
+                missing[key] = None
+                self.stats.misses += 1
+        missing_keys = list(missing)
+        for start in range(0, len(missing_keys), self.batch_size):
+            self._fetch_batch(missing_keys[start : start + self.batch_size])
+
+    def _fetch_batch(self, keys: list[tuple[str, str]]) -> list[float]:
+        distances = self.fetch(keys)
+        if len(distances) != len(keys):
+            raise ValueError(
+                f"Distance source returned {len(distances)} distances for {len(keys)} pairs"
+            )
+        self.stats.fetches += 1
+        for key, distance in zip(keys, distances):
+            self._cache[key] = float(distance)
+        while len(self._cache) > self.max_cached_pairs:
+            self._cache.popitem(last=False)
+            self.stats.evictions += 1
+        return distances
+
+    @property
+    def cached_pairs(self) -> int:
+        return len(self._cache)
+
+
+def distances_from(distance_table, origin: str, destinations: Iterable[str]) -> list[float]:
+    """Return the distance from `origin` to each destination in any distance table.
+
+    Providers look the distances up in one bulk request; plain dicts are indexed directly.
+    """
+    if isinstance(distance_table, DistanceProvider):
+        return distance_table.distances_from(origin, destinations)
+    row = distance_table[origin]
+    return [row[destination] for destination in destinations]
+
+
+def distances_to(distance_table, destination: str, origins: Iterable[str]) -> list[float]:
+    """Return the distance from each origin to `destination` in any distance table.
+
+    Like `distances_from`, for tables whose distances may differ by direction.
+    """
+    if isinstance(distance_table, DistanceProvider):
+        return distance_table.distances_to(destination, origins)
+    return [distance_table[origin][destination] for origin in origins]
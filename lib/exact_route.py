@@ -0,0 +1,154 @@
+"""Exact delivery order for a single truck trip.
+
+A trip visits few enough distinct stops that the shortest order can be found exactly
+with the Held-Karp dynamic program over subsets of stops: for every set of visited stops
+and every last stop, keep only the shortest path from the hub.
+Trucks drive at a constant speed, so the shortest path to a state is also the earliest,
+and any extension that misses a stop's deadline can be pruned without losing the optimum.
+
+The DP takes O(2^n * n^2) time and O(2^n * n) memory for n stops,
+so it is only used for trips with up to `EXACT_MAX_STOPS` stops,
+and gives up (leaving the heuristic order in place) once its time limit is reached.
+"""
+
+import datetime
+import math
+import time
+from typing import Callable, Optional
+
+from lib.delivery_algorithm import corrected_address
+from lib.distance_provider import distances_from
+from models.package import Package
+from models.truck import TRUCK_SPEED_MPH
+
+EXACT_MAX_STOPS = 13
+DEFAULT_TIME_LIMIT = 0.5
+
+MINUTES_PER_MILE = 60 / TRUCK_SPEED_MPH
+
+# how many subsets are expanded between checks of the time limit
+_TIME_CHECK_INTERVAL = 256
+
+
+def minutes_after_midnight(value: datetime.time) -> float:
+    return value.hour * 60 + value.minute + value.second / 60 + value.microsecond / 6e7
+
+
+def shortest_stop_order(
+    stops: list[str],
+    distance_table: dict[str, dict[str, float]],
+    hub: str,
+    departure_time: float = 0.0,
+    deadlines: Optional[list[float]] = None,
+    latest_return: float = math.inf,
+    time_limit: Optional[float] = DEFAULT_TIME_LIMIT,
+    minutes_per_mile: float = MINUTES_PER_MILE,
+) -> Optional[list[str]]:
+    """Return the order of `stops` giving the shortest round trip from the hub.
+
+    Times are minutes after midnight: the trip leaves the hub at `departure_time`,
+    must reach `stops[i]` by `deadlines[i]` (if given) and be back by `latest_return`.
+    Returns None if no order meets every deadline, there are more than `EXACT_MAX_STOPS`
+    distinct stops, or solving takes longer than `time_limit` seconds.
+    `minutes_per_mile` is the truck's driving pace (by default, at `TRUCK_SPEED_MPH`).
+    """
+    if len(set(stops)) != len(stops):
+        raise ValueError("Stops must be distinct; merge packages for the same address first.")
+    stop_count = len(stops)
+    if stop_count == 0:
+        return []
+    if stop_count > EXACT_MAX_STOPS:
+        return None
+    started = time.perf_counter()
+
+    # deadlines become mileage budgets, since arrival time grows linearly with distance
+    budgets = [
+        (deadline - departure_time) / minutes_per_mile
+        for deadline in (deadlines or [math.inf] * stop_count)
+    ]
+    distances = [distances_from(distance_table, stop, stops) for stop in stops]
+    from_hub = distances_from(distance_table, hub, stops)
+
+    # best[mask][last]: shortest distance from the hub visiting `mask`, ending at `last`
+    full = (1 << stop_count) - 1
+    best = [[math.inf] * stop_count for _ in range(full + 1)]
+    previous = [[-1] * stop_count for _ in range(full + 1)]
+    for stop in range(stop_count):
+        if from_hub[stop] <= budgets[stop]:
+            best[1 << stop][stop] = from_hub[stop]
+
+    for mask in range(1, full + 1):
+        if (
+            time_limit is not None
+            and mask % _TIME_CHECK_INTERVAL == 0
+            and time.perf_counter() - started > time_limit
+        ):
+            return None
+        row = best[mask]
+        for last in range(stop_count):
+            distance = row[last]
+            if distance == math.inf:
+                continue
+            last_distances = distances[last]
+            for following in range(stop_count):
+                bit = 1 << following
+                if mask & bit:
+                    continue
+                extended = distance + last_distances[following]
+                if extended <= budgets[following] and extended < best[mask | bit][following]:
+                    best[mask | bit][following] = extended
+                    previous[mask | bit][following] = last
+
+    total, last = min(
+        (best[full][stop] + from_hub[stop], stop) for stop in range(stop_count)
+    )
+    if total == math.inf or departure_time + total * minutes_per_mile > latest_return:
+        return None
+
+    order = []
+    mask = full
+    while last != -1:
+        order.append(stops[last])
+        last, mask = previous[mask][last], mask & ~(1 << last)
+    order.reverse()
+    return order
+
+
+def exact_package_order(
+    packages: list[Package],
+    distance_table: dict[str, dict[str, float]],
+    hub: str,
+    departure_time: float = 0.0,
+    deadline: Optional[Callable[[Package], float]] = None,
+    latest_return: float = math.inf,
+    time_limit: Optional[float] = DEFAULT_TIME_LIMIT,
+    minutes_per_mile: float = MINUTES_PER_MILE,
+) -> Optional[list[Package]]:
+    """Return the packages in the shortest on-time delivery order, or None.
+
+    Packages for the same address are delivered at a single stop,
+    whose deadline is the earliest `deadline(package)` among them (in minutes after midnight).
+    Returns None in the same cases as `shortest_stop_order`,
+    in which case the caller should keep its heuristic order.
+    """
+    by_address: dict[str, list[Package]] = {}
+    for package in packages:
+        by_address.setdefault(corrected_address(package), []).append(package)
+    stops = list(by_address)
+    order = shortest_stop_order(
+        stops,
+        distance_table,
+        hub,
+        departure_time=departure_time,
+        deadlines=(
+            [min(map(deadline, by_address[stop])) for stop in stops]
+            if deadline is not None
+            else None
+        ),
+        latest_return=latest_return,
+        time_limit=time_limit,
+        minutes_per_mile=minutes_per_mile,
+    )
+    if order is None:
+        return None
+    return [package for stop in order for package in by_address[stop]]
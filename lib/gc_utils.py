@@ -0,0 +1,20 @@
+"""Helpers for code that creates or loads very many objects at once."""
+
+import gc
+from contextlib import contextmanager
+
+
+@contextmanager
+def collection_paused():
+    """Pause the cyclic garbage collector for the duration of the block.
+
+    Loading millions of packages and strings creates no reference cycles,
+    but every collection triggered along the way would still scan all of them.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
@@ -0,0 +1,225 @@
+"""Distances computed from coordinates, for depots too large for a dense distance table.
+
+`csv_to_distances` stores every pair of locations, which takes O(n²) memory.
+A `GeoDistanceTable` instead stores one coordinate pair per location
+and computes distances on demand, as straight-line (Euclidean) or great-circle (haversine)
+distance scaled by a road factor to approximate driving distance.
+It is a `DistanceProvider`, so it behaves like the dict of dicts returned by `csv_to_distances`
+(`table[a][b]` is the distance from a to b) and can be passed anywhere a distance table is.
+
+Nearest-neighbor queries go through a KD-tree over the locations,
+so finding the closest eligible stop does not need a distance to every location.
+"""
+
+import csv
+import heapq
+import math
+from enum import StrEnum
+from typing import Callable, Iterable, Iterator, Optional
+
+from lib.distance_provider import DistanceProvider
+
+EARTH_RADIUS_MILES = 3958.8
+
+# straight-line distance underestimates driving distance on a street grid by about this much
+DEFAULT_ROAD_FACTOR = 1.3
+
+# below this many candidates, comparing each one directly beats searching the KD-tree
+LINEAR_SCAN_LIMIT = 64
+
+
+class DistanceMetric(StrEnum):
+    # coordinates are (x, y) in miles on a flat projection
+    EUCLIDEAN = "euclidean"
+    # coordinates are (latitude, longitude) in degrees
+    HAVERSINE = "haversine"
+
+
+class KDTree:
+    """A static KD-tree over named points, for k-nearest-neighbor queries.
+
+    The tree is stored implicitly in one list: the subtree over `order[lo:hi]`
+    is rooted at the median `order[(lo + hi) // 2]`, split on the axis `depth % dimensions`.
+    """
+
+    def __init__(self, points: dict[str, tuple[float, ...]]) -> None:
+        self.names = list(points)
+        self.points = [points[name] for name in self.names]
+        self.dimensions = len(self.points[0]) if self.points else 0
+        self.order = list(range(len(self.points)))
+        self._build(0, len(self.order), 0)
+
+    def _build(self, lo: int, hi: int, depth: int):
+        # iterative, so deep trees don't hit the recursion limit
+        stack = [(lo, hi, depth)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= 1:
+                continue
+            axis = depth % self.dimensions
+            self.order[lo:hi] = sorted(
+                self.order[lo:hi], key=lambda index: self.points[index][axis]
+            )
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def nearest(
+        self,
+        point: tuple[float, ...],
+        k: int = 1,
+        predicate: Optional[Callable[[str], bool]] = None,
+    ) -> list[tuple[float, str]]:
+        """Return up to `k` (squared distance, name) pairs closest to `point`, closest first.
+
+        Only names for which `predicate` returns True are returned;
+        subtrees that cannot hold anything closer than the current k-th best are skipped.
+        """
+        # max-heap of the k best so far, as (-squared distance, index)
+        best: list[tuple[float, int]] = []
+        stack = [(0, len(self.order), 0, 0.0)]
+        while stack:
+            lo, hi, depth, bound = stack.pop()
+            if lo >= hi or (len(best) == k and bound >= -best[0][0]):
+                continue
+            mid = (lo + hi) // 2
+            index = self.order[mid]
+            candidate = self.points[index]
+            squared = sum((a - b) ** 2 for a, b in zip(candidate, point))
+            if (len(best) < k or squared < -best[0][0]) and (
+                predicate is None or predicate(self.names[index])
+            ):
+                if len(best) == k:
+                    heapq.heapreplace(best, (-squared, index))
+                else:
+                    heapq.heappush(best, (-squared, index))
+
+            axis = depth % self.dimensions
+            offset = point[axis] - candidate[axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if offset < 0 else ((mid + 1, hi), (lo, mid))
+            # the far side is pushed first so the near side is searched first
+            stack.append((*far, depth + 1, max(bound, offset * offset)))
+            stack.append((*near, depth + 1, bound))
+        return sorted((-negated, self.names[index]) for negated, index in best)
+
+
+class GeoDistanceTable(DistanceProvider):
+    """Distance table computed on demand from each location's coordinates.
+
+    Stores O(n) coordinates instead of O(n²) distances.
+    The KD-tree used by `nearest` and `closest` is built on first use.
+    """
+
+    def __init__(
+        self,
+        coordinates: dict[str, tuple[float, float]],
+        metric: DistanceMetric = DistanceMetric.HAVERSINE,
+        road_factor: float = DEFAULT_ROAD_FACTOR,
+    ) -> None:
+        self.metric = DistanceMetric(metric)
+        self.road_factor = road_factor
+        self.coordinates = dict(coordinates)
+        self._index: Optional[KDTree] = None
+        if self.metric == DistanceMetric.HAVERSINE:
+            # points on the unit sphere: the straight-line (chord) distance between them
+            # grows with the great-circle distance, so the KD-tree ranks them the same way
+            self._points = {
+                location: _unit_vector(latitude, longitude)
+                for location, (latitude, longitude) in self.coordinates.items()
+            }
+        else:
+            self._points = self.coordinates
+
+    def distance(self, from_location: str, to_location: str) -> float:
+        if from_location == to_location:
+            return 0.0
+        a = self._points[from_location]
+        b = self._points[to_location]
+        chord = math.dist(a, b)
+        if self.metric == DistanceMetric.HAVERSINE:
+            return 2 * math.asin(min(1.0, chord / 2)) * EARTH_RADIUS_MILES * self.road_factor
+        return chord * self.road_factor
+
+    def distances_from(self, origin: str, destinations: Iterable[str]) -> list[float]:
+        return [self.distance(origin, destination) for destination in destinations]
+
+    def __contains__(self, location) -> bool:
+        return location in self.coordinates
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.coordinates)
+
+    def __len__(self) -> int:
+        return len(self.coordinates)
+
+    @property
+    def index(self) -> KDTree:
+        if self._index is None:
+            self._index = KDTree(self._points)
+        return self._index
+
+    def nearest(
+        self,
+        location: str,
+        k: int = 1,
+        predicate: Optional[Callable[[str], bool]] = None,
+    ) -> list[tuple[float, str]]:
+        """Return up to `k` (distance, location) pairs closest to `location`, excluding itself.
+
+        Only locations for which `predicate` returns True are considered.
+        """
+        matches = self.index.nearest(
+            self._points[location],
+            k=k,
+            predicate=lambda other: other != location
+            and (predicate is None or predicate(other)),
+        )
+        return [(self.distance(location, other), other) for _, other in matches]
+
+    def closest(self, location: str, candidates: Iterable[str]) -> Optional[str]:
+        """Return the candidate closest to `location`, or None if there are none.
+
+        Small candidate sets are compared directly;
+        larger ones are searched through the KD-tree.
+        """
+        candidates = set(candidates)
+        if not candidates:
+            return None
+        if location in candidates:
+            return location
+        if len(candidates) <= LINEAR_SCAN_LIMIT:
+            return min(candidates, key=lambda other: (self.distance(location, other), other))
+        [(_, other)] = self.nearest(location, predicate=candidates.__contains__)
+        return other
+
+
+def _unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return (
+        math.cos(latitude) * math.cos(longitude),
+        math.cos(latitude) * math.sin(longitude),
+        math.sin(latitude),
+    )
+
+
+def csv_to_coordinates(
+    filepath: str,
+    metric: DistanceMetric = DistanceMetric.HAVERSINE,
+    road_factor: float = DEFAULT_ROAD_FACTOR,
+) -> GeoDistanceTable:
+    """Read a CSV of locations and their coordinates into a `GeoDistanceTable`.
+
+    The CSV has a header row and three columns: the location (named as in the package file's
+    address, e.g. `1060 Dalton Ave S (84104)`), then latitude and longitude
+    (or x and y in miles for the Euclidean metric).
+    """
+    coordinates: dict[str, tuple[float, float]] = {}
+    with open(filepath, newline="", encoding="utf-8-sig") as coordinate_file:
+        coordinate_reader = csv.reader(coordinate_file)
+        next(coordinate_reader)  # skip header
+        for row in coordinate_reader:
+            coordinates[row[0]] = (float(row[1]), float(row[2]))
+    return GeoDistanceTable(coordinates, metric=metric, road_factor=road_factor)
@@ -0,0 +1,399 @@
+"""Cheapest-insertion planning with delivery time windows.
+
+Every package has a hard time window: it cannot leave the hub before its `earliest_load_time`
+and must be delivered by its `delivery_deadline`.
+Packages (or co-delivery groups) are inserted one at a time, tightest deadline first,
+at the position that adds the fewest miles to any truck's routes, or on a new trip.
+
+Each route keeps two arrays alongside its stops:
+the planned arrival time at every stop, and the latest arrival time at every stop
+that still keeps every later stop on the same truck on time.
+Checking whether an insertion keeps all deadlines then takes O(1) per position,
+and each package is placed in a single pass over the routes, with no retries.
+
+Packages that cannot be delivered on time anywhere are still planned (on the cheapest trip
+that can carry them) and reported in `RoutePlan.late_package_ids`.
+"""
+
+import datetime
+import math
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from lib.delivery_algorithm import correct_package_address, corrected_address
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.distance_provider import distances_from, distances_to
+from lib.exact_route import DEFAULT_TIME_LIMIT, exact_package_order, minutes_after_midnight
+from lib.time_utils import minutes_to_time
+from lib.truck_loading import (
+    MAX_PACKAGES_PER_TRUCK,
+    START_OF_DAY,
+    LoadingUnit,
+    build_loading_units,
+)
+from models.package import Package
+from models.truck import DEFAULT_HUB, TRUCK_SPEED_MPH, Truck
+
+MINUTES_PER_MILE = 60 / TRUCK_SPEED_MPH
+
+
+@dataclass
+class Route:
+    """One trip from the hub and back, with its stops in delivery order.
+
+    Times are minutes after midnight.
+    `ready_time` is when the truck is back from its previous trip (or starts its day),
+    and the route departs once the truck is ready and every package on it has arrived.
+    `latest_arrivals[i]` is the latest the truck may reach stop `i`
+    without making that stop, or any later stop on the same truck, late;
+    `latest_return` is the same bound for getting back to the hub.
+    """
+
+    truck_id: int
+    ready_time: float
+    packages: list[Package] = field(default_factory=list)
+    release_time: float = 0.0
+    departure_time: float = 0.0
+    arrivals: list[float] = field(default_factory=list)
+    latest_arrivals: list[float] = field(default_factory=list)
+    return_time: float = 0.0
+    latest_return: float = math.inf
+    latest_departure: float = math.inf
+
+    def copy(self) -> "Route":
+        return Route(
+            truck_id=self.truck_id,
+            ready_time=self.ready_time,
+            packages=list(self.packages),
+            release_time=self.release_time,
+            departure_time=self.departure_time,
+            arrivals=list(self.arrivals),
+            latest_arrivals=list(self.latest_arrivals),
+            return_time=self.return_time,
+            latest_return=self.latest_return,
+            latest_departure=self.latest_departure,
+        )
+
+
+@dataclass
+class RoutePlan:
+    """Every truck's trips, in order, and the packages that cannot be delivered on time."""
+
+    routes: dict[int, list[Route]]
+    late_package_ids: list[int]
+    distance_table: dict[str, dict[str, float]]
+    hub: str = DEFAULT_HUB
+
+    def __iter__(self) -> Iterator[Route]:
+        for routes in self.routes.values():
+            yield from routes
+
+    @property
+    def total_mileage(self) -> float:
+        total = 0.0
+        for route in self:
+            location = self.hub
+            for package in route.packages:
+                address = corrected_address(package)
+                total += self.distance_table[location][address]
+                location = address
+            total += self.distance_table[location][self.hub]
+        return total
+
+
+class _InsertionPlanner:
+    def __init__(self, distance_table, hub: str, minutes_per_mile: float = MINUTES_PER_MILE):
+        self.distance_table = distance_table
+        self.hub = hub
+        self.minutes_per_mile = minutes_per_mile
+        # packages already known to be late are planned without their deadline,
+        # so they don't block insertions into the trips before them
+        self.relaxed_package_ids: set[int] = set()
+
+    def minutes(self, from_location: str, to_location: str) -> float:
+        return self.distance_table[from_location][to_location] * self.minutes_per_mile
+
+    def deadline(self, package: Package) -> float:
+        if package.package_id in self.relaxed_package_ids:
+            return math.inf
+        return minutes_after_midnight(package.delivery_deadline)
+
+    def update_times(self, route: Route):
+        """Recompute the route's departure, arrivals and return from its stops."""
+        route.departure_time = max(route.ready_time, route.release_time)
+        route.arrivals = []
+        location, clock = self.hub, route.departure_time
+        for package in route.packages:
+            address = corrected_address(package)
+            clock += self.minutes(location, address)
+            route.arrivals.append(clock)
+            location = address
+        route.return_time = clock + self.minutes(location, self.hub)
+
+    def update_latest(self, route: Route):
+        """Recompute the route's latest arrivals backwards from its latest return."""
+        latest = route.latest_return
+        location = self.hub
+        route.latest_arrivals = [0.0] * len(route.packages)
+        for i in range(len(route.packages) - 1, -1, -1):
+            package = route.packages[i]
+            address = corrected_address(package)
+            latest = min(self.deadline(package), latest - self.minutes(address, location))
+            route.latest_arrivals[i] = latest
+            location = address
+        route.latest_departure = latest - self.minutes(self.hub, location)
+
+    def update_truck(self, routes: list[Route], start_time: float):
+        """Propagate a change through all of a truck's trips."""
+        ready = start_time
+        for route in routes:
+            route.ready_time = ready
+            self.update_times(route)
+            ready = route.return_time
+        # a trip departs once the truck is back and its packages have arrived,
+        # so it can absorb delays to the trip before it until its latest departure
+        latest_return = math.inf
+        for route in reversed(routes):
+            route.latest_return = latest_return
+            self.update_latest(route)
+            latest_return = route.latest_departure
+
+    def best_position(
+        self, route: Route, package: Package, release_time: float
+    ) -> Optional[tuple[float, int]]:
+        """Return the (added miles, position) of the cheapest on-time insertion, if any.
+
+        Each position is checked in O(1) against the route's arrival and latest-arrival arrays.
+        """
+        departure = max(route.departure_time, release_time)
+        if route.packages and departure > route.latest_departure:
+            return None
+        shift = departure - route.departure_time
+        address = corrected_address(package)
+        deadline = self.deadline(package)
+        stops = [self.hub] + [corrected_address(stop) for stop in route.packages]
+        # distances from the hub and every stop to the package, and back, each fetched together
+        to_package = distances_to(self.distance_table, address, stops)
+        from_package = distances_from(self.distance_table, address, stops)
+
+        best: Optional[tuple[float, int]] = None
+        previous_arrival = departure
+        for i in range(len(route.packages) + 1):
+            # insert between stops[i] and the stop after it (or the hub, at the end)
+            if i < len(route.packages):
+                following, following_latest = i + 1, route.latest_arrivals[i]
+            else:
+                following, following_latest = 0, route.latest_return
+            arrival = previous_arrival + to_package[i] * self.minutes_per_mile
+            if (
+                arrival <= deadline
+                and arrival + from_package[following] * self.minutes_per_mile <= following_latest
+            ):
+                added_miles = (
+                    to_package[i]
+                    + from_package[following]
+                    - self.distance_table[stops[i]][stops[following]]
+                )
+                if best is None or added_miles < best[0]:
+                    best = (added_miles, i)
+            if i < len(route.packages):
+                previous_arrival = route.arrivals[i] + shift
+        return best
+
+    def try_insert_group(
+        self, route: Route, packages: list[Package], release_time: float
+    ) -> Optional[tuple[float, Route]]:
+        """Insert a co-delivery group into a copy of the route, one package at a time.
+
+        Returns the added miles and the updated copy, or None if any package would be late.
+        """
+        route = route.copy()
+        route.release_time = max(route.release_time, release_time)
+        total = 0.0
+        for package in packages:
+            best = self.best_position(route, package, release_time)
+            if best is None:
+                return None
+            added_miles, position = best
+            total += added_miles
+            route.packages.insert(position, package)
+            self.update_times(route)
+            self.update_latest(route)
+        return total, route
+
+    def insert_unit(
+        self,
+        routes: dict[int, list[Route]],
+        start_minutes: dict[int, float],
+        unit: LoadingUnit,
+        truck_ids: list[int],
+        max_packages: int,
+    ) -> list[int]:
+        """Insert a loading unit at its cheapest on-time place on one of `truck_ids`.
+
+        If no trip can deliver it on time, it is planned without its deadline;
+        returns the ids of its packages in that case, or an empty list.
+        """
+        release_time = minutes_after_midnight(max(unit.release_time, START_OF_DAY))
+        late_package_ids: list[int] = []
+
+        best: Optional[_Insertion] = None
+        for _ in range(2):
+            for truck_id in truck_ids:
+                truck_routes = routes[truck_id]
+                new_route = Route(
+                    truck_id=truck_id,
+                    ready_time=(
+                        truck_routes[-1].return_time
+                        if truck_routes
+                        else start_minutes[truck_id]
+                    ),
+                )
+                self.update_times(new_route)
+                # the truck's existing trips, then a new trip at the end of its day
+                for index, route in enumerate(truck_routes + [new_route]):
+                    if len(route.packages) + len(unit.packages) > max_packages:
+                        continue
+                    if len(unit.packages) == 1:
+                        found = self.best_position(route, unit.packages[0], release_time)
+                    else:
+                        found = self.try_insert_group(route, unit.packages, release_time)
+                    if found is None or (best is not None and found[0] >= best.added_miles):
+                        continue
+                    added_miles, position_or_route = found
+                    if isinstance(position_or_route, Route):
+                        best = _Insertion(added_miles, truck_id, index, route=position_or_route)
+                    else:
+                        best = _Insertion(added_miles, truck_id, index, position=position_or_route)
+            if best is not None:
+                break
+            # no trip can deliver the unit on time: plan it without its deadline and report it
+            late_package_ids = [package.package_id for package in unit.packages]
+            self.relaxed_package_ids.update(late_package_ids)
+
+        truck_routes = routes[best.truck_id]
+        if best.route_index == len(truck_routes):
+            truck_routes.append(Route(truck_id=best.truck_id, ready_time=0.0))
+        if best.route is not None:
+            truck_routes[best.route_index] = best.route
+        else:
+            route = truck_routes[best.route_index]
+            route.packages.insert(best.position, unit.packages[0])
+            route.release_time = max(route.release_time, release_time)
+        self.update_truck(truck_routes, start_minutes[best.truck_id])
+        return late_package_ids
+
+    def reorder_exactly(self, route: Route, time_limit: Optional[float]):
+        """Replace the route's insertion order with the exact shortest on-time order, if found.
+
+        The shortest order never returns later than the current one,
+        so the truck's later trips stay on time.
+        """
+        order = exact_package_order(
+            route.packages,
+            self.distance_table,
+            self.hub,
+            departure_time=route.departure_time,
+            deadline=self.deadline,
+            latest_return=route.latest_return,
+            time_limit=time_limit,
+            minutes_per_mile=self.minutes_per_mile,
+        )
+        if order is not None:
+            route.packages = order
+
+
+@dataclass
+class _Insertion:
+    added_miles: float
+    truck_id: int
+    route_index: int
+    # where a single package goes, or the updated copy of the route for a co-delivery group
+    position: int = 0
+    route: Optional[Route] = None
+
+
+def _unit_order(unit, distance_table, hub):
+    # tightest deadline first; among equal deadlines, farthest from the hub first,
+    # since far-out stops shape the routes and nearby ones are cheap to fit in later
+    return (unit.deadline, -distance_table[hub][unit.anchor])
+
+
+def plan_routes(
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    truck_start_times: dict[int, datetime.time],
+    max_packages: int = MAX_PACKAGES_PER_TRUCK,
+    hub: str = DEFAULT_HUB,
+    exact_time_limit: Optional[float] = DEFAULT_TIME_LIMIT,
+    speed_mph: float = TRUCK_SPEED_MPH,
+) -> RoutePlan:
+    """Plan every truck's trips by cheapest insertion under delivery time windows.
+
+    `truck_start_times` maps each available truck to the time its driver starts.
+    Co-delivery groups are kept on the same trip and required trucks are respected.
+    Once every package is placed, each trip with few enough distinct stops is reordered
+    into its exact shortest on-time order (see `lib.exact_route`),
+    spending at most `exact_time_limit` seconds per trip; pass 0 to keep the insertion order.
+    Travel times assume every truck drives at `speed_mph`.
+    Raises ValueError if a package requires a truck that is not available
+    or a co-delivery group does not fit on one truck.
+    """
+    planner = _InsertionPlanner(distance_table, hub, minutes_per_mile=60 / speed_mph)
+    start_minutes = {
+        truck_id: minutes_after_midnight(start) for truck_id, start in truck_start_times.items()
+    }
+    routes: dict[int, list[Route]] = {truck_id: [] for truck_id in truck_start_times}
+    late_package_ids: list[int] = []
+
+    units = build_loading_units(packages)
+    units.sort(key=lambda unit: _unit_order(unit, distance_table, hub))
+
+    for unit in units:
+        if len(unit.packages) > max_packages:
+            raise ValueError(
+                f"Packages {[p.package_id for p in unit.packages]} do not fit on one truck"
+            )
+        if unit.required_truck_id is not None:
+            if unit.required_truck_id not in routes:
+                raise ValueError(
+                    f"Packages {[p.package_id for p in unit.packages]} "
+                    f"require truck {unit.required_truck_id}, which is not available"
+                )
+            truck_ids = [unit.required_truck_id]
+        else:
+            truck_ids = list(routes)
+        late_package_ids.extend(
+            planner.insert_unit(routes, start_minutes, unit, truck_ids, max_packages)
+        )
+
+    if exact_time_limit != 0:
+        for truck_id, truck_routes in routes.items():
+            for route in truck_routes:
+                planner.reorder_exactly(route, exact_time_limit)
+            planner.update_truck(truck_routes, start_minutes[truck_id])
+
+    return RoutePlan(
+        routes=routes,
+        late_package_ids=sorted(late_package_ids),
+        distance_table=distance_table,
+        hub=hub,
+    )
+
+
+def deliver_routes(plan: RoutePlan, trucks: list[Truck]) -> float:
+    """Drive every planned trip, in order, with the matching truck.
+
+    Packages are delivered in their planned order rather than nearest-first.
+    Returns the total mileage of all trucks.
+    """
+    for truck in trucks:
+        for route in plan.routes.get(truck.truck_id, []):
+            truck.current_time = max(truck.current_time, minutes_to_time(route.departure_time))
+            for package in route.packages:
+                package = correct_package_address(
+                    package, journal=truck.journal, package_table=truck.package_table
+                )
+                truck.load_package(package)
+            truck.deliver_packages_in_load_order()
+    return sum(truck.current_mileage for truck in trucks)
@@ -0,0 +1,316 @@
+"""An append-only journal of package state changes, with checkpoints, for crash recovery.
+
+Loading a package onto a truck, delivering it and correcting its address all change
+the package in place, so a crashed process would otherwise lose the day so far.
+`DeliveryJournal` appends each change to a binary journal file, and from time to time
+writes a checkpoint of the whole package table (a snapshot, see `lib.snapshot`).
+`recover` rebuilds the table from the latest checkpoint plus the journal written after it.
+
+Changes are buffered and written in batches (group commit), one write per batch,
+so journaling costs the delivery loop little more than packing a record.
+Only committed batches survive a crash; `commit` forces out the current batch.
+
+Layout of the journal file (all little-endian):
+    header      magic, format version
+    frames      kind, payload length, CRC-32 of the payload, then the payload:
+                    loads and deliveries: fixed-size records of
+                        record type, package id, time (microseconds since midnight), truck id
+                    address correction: package id, then the address, city, state
+                        and zip code, each as a length and UTF-8 bytes
+
+A frame cut short or damaged by a crash fails its length or checksum test,
+and it and anything after it are ignored (and cut off when the journal is reopened).
+Checkpoints are named after the journal offset they cover up to, so replay starts there.
+"""
+
+import datetime
+import os
+import struct
+import zlib
+from typing import Optional
+
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.gc_utils import collection_paused
+from lib.snapshot import load_state, save_state
+from lib.time_utils import micros_to_time, time_to_micros
+from models.package import DeliveryStatus, Package
+
+JOURNAL_MAGIC = b"WGUPSJNL"
+JOURNAL_VERSION = 1
+JOURNAL_FILENAME = "journal.wal"
+
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_CHECKPOINT_INTERVAL = 1_000_000
+
+_CHECKPOINT_PREFIX = "checkpoint-"
+_CHECKPOINT_SUFFIX = ".snap"
+
+# magic, format version
+_HEADER = struct.Struct("<8sH")
+# frame kind, payload length, CRC-32 of the payload
+_FRAME = struct.Struct("<BII")
+# record type, package id, time (microseconds), truck id
+_RECORD = struct.Struct("<Bqqh")
+_ADDRESS_PACKAGE_ID = struct.Struct("<q")
+_STRING_LENGTH = struct.Struct("<H")
+
+_RECORDS_FRAME = 1
+_ADDRESS_FRAME = 2
+
+_LOADED = 1
+_DELIVERED = 2
+
+_NO_TRUCK = -1
+
+
+def _checkpoint_path(directory: str, offset: int) -> str:
+    return os.path.join(directory, f"{_CHECKPOINT_PREFIX}{offset:020d}{_CHECKPOINT_SUFFIX}")
+
+
+def _checkpoints(directory: str) -> list[tuple[int, str]]:
+    """Return the (journal offset, path) of every checkpoint, oldest first."""
+    checkpoints = []
+    for name in os.listdir(directory):
+        if name.startswith(_CHECKPOINT_PREFIX) and name.endswith(_CHECKPOINT_SUFFIX):
+            offset = name[len(_CHECKPOINT_PREFIX) : -len(_CHECKPOINT_SUFFIX)]
+            if offset.isdigit():
+                checkpoints.append((int(offset), os.path.join(directory, name)))
+    return sorted(checkpoints)
+
+
+def _frames(buffer, offset: int):
+    """Yield (kind, payload, end offset) for every intact frame from `offset` on."""
+    while offset + _FRAME.size <= len(buffer):
+        kind, length, checksum = _FRAME.unpack_from(buffer, offset)
+        start = offset + _FRAME.size
+        payload = buffer[start : start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            # a batch the crash interrupted
+            return
+        offset = start + length
+        yield kind, payload, offset
+
+
+def _read_journal(journal_path: str) -> bytes:
+    with open(journal_path, "rb") as journal_file:
+        buffer = journal_file.read()
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Not a journal file.")
+    magic, version = _HEADER.unpack_from(buffer)
+    if magic != JOURNAL_MAGIC:
+        raise ValueError("Not a journal file.")
+    if version != JOURNAL_VERSION:
+        raise ValueError(f"Unsupported journal version: {version}")
+    return buffer
+
+
+def _encode_address(package: Package) -> bytes:
+    payload = bytearray(_ADDRESS_PACKAGE_ID.pack(package.package_id))
+    for value in (
+        package.delivery_address,
+        package.delivery_city,
+        package.delivery_state,
+        package.delivery_zip_code,
+    ):
+        encoded = value.encode("utf-8")
+        payload += _STRING_LENGTH.pack(len(encoded)) + encoded
+    return bytes(payload)
+
+
+def _decode_address(payload) -> tuple[int, list[str]]:
+    (package_id,) = _ADDRESS_PACKAGE_ID.unpack_from(payload)
+    offset = _ADDRESS_PACKAGE_ID.size
+    values = []
+    for _ in range(4):
+        (length,) = _STRING_LENGTH.unpack_from(payload, offset)
+        offset += _STRING_LENGTH.size
+        values.append(bytes(payload[offset : offset + length]).decode("utf-8"))
+        offset += length
+    return package_id, values
+
+
+def replay(packages: DeliveryHashTable, journal_path: str, offset: int = _HEADER.size) -> int:
+    """Apply the journal's changes from `offset` on to `packages`.
+
+    Returns the offset just past the last intact frame, where new batches should go.
+    """
+    buffer = memoryview(_read_journal(journal_path))
+    offset = max(offset, _HEADER.size)
+    # each trip loads its packages at the same time, so most times repeat
+    times: dict[int, datetime.time] = {}
+    lookup = packages.lookup
+    for kind, payload, offset in _frames(buffer, offset):
+        if kind == _ADDRESS_FRAME:
+            package_id, (address, city, state, zip_code) = _decode_address(payload)
+            package = lookup(package_id)
+            if package is not None:
+                package.delivery_address = address
+                package.delivery_city = city
+                package.delivery_state = state
+                package.delivery_zip_code = zip_code
+            continue
+        for record_type, package_id, micros, truck_id in _RECORD.iter_unpack(payload):
+            package = lookup(package_id)
+            if package is None:
+                continue
+            time = times.get(micros)
+            if time is None:
+                time = times[micros] = micros_to_time(micros)
+            if record_type == _LOADED:
+                package.time_loaded_onto_truck = time
+                package.truck_id = truck_id if truck_id != _NO_TRUCK else None
+                package.delivery_status = DeliveryStatus.EN_ROUTE
+            elif record_type == _DELIVERED:
+                package.time_delivered = time
+                package.delivery_status = DeliveryStatus.DELIVERED
+    return offset
+
+
+def recover(directory: str) -> tuple[DeliveryHashTable, int]:
+    """Rebuild the package table from the latest checkpoint and the journal after it.
+
+    Returns the packages and the journal offset they are current up to.
+    Raises FileNotFoundError if the directory has no checkpoint.
+    """
+    checkpoints = _checkpoints(directory)
+    if not checkpoints:
+        raise FileNotFoundError(f"No checkpoint found in {directory}")
+    offset, checkpoint_path = checkpoints[-1]
+    journal_path = os.path.join(directory, JOURNAL_FILENAME)
+    # like a bulk load, rebuilding the table creates many objects but no cycles
+    with collection_paused():
+        packages, _ = load_state(checkpoint_path)
+        if os.path.exists(journal_path):
+            offset = replay(packages, journal_path, offset)
+    return packages, offset
+
+
+class DeliveryJournal:
+    """Journal the state changes of `packages` to files in `directory`.
+
+    Give the journal to trucks (`Truck.journal`) and to `correct_package_address`,
+    or pass it to `deliver_packages`, and every change they make is recorded.
+    A new directory starts with a checkpoint of `packages` as they are.
+    To continue after a crash, open the journal on the table returned by `recover`:
+    the unfinished batch the crash left behind is cut off, and new batches follow it.
+
+    Records are written in batches of `batch_size`; with `sync`, each batch is also
+    flushed to disk (fsync) before the journal moves on. After `checkpoint_interval`
+    records, a new checkpoint is taken at the next batch, and older checkpoints are removed.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        packages: DeliveryHashTable,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        checkpoint_interval: Optional[int] = DEFAULT_CHECKPOINT_INTERVAL,
+        sync: bool = False,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer.")
+        self.directory = directory
+        self.packages = packages
+        self.batch_size = batch_size
+        self.checkpoint_interval = checkpoint_interval
+        self.sync = sync
+        self.records_since_checkpoint = 0
+        self._batch = bytearray()
+        self._batch_records = 0
+
+        os.makedirs(directory, exist_ok=True)
+        journal_path = os.path.join(directory, JOURNAL_FILENAME)
+        resuming = os.path.exists(journal_path)
+        if resuming:
+            buffer = _read_journal(journal_path)
+            checkpoints = _checkpoints(directory)
+            offset = checkpoints[-1][0] if checkpoints else _HEADER.size
+            for _, _, offset in _frames(buffer, offset):
+                pass
+            self._file = open(journal_path, "r+b", buffering=0)
+            self._file.truncate(offset)
+            self._file.seek(offset)
+        else:
+            self._file = open(journal_path, "wb", buffering=0)
+            self._file.write(_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION))
+        self.offset = self._file.tell()
+        # checkpoints left without their journal would point into the wrong file
+        if not resuming or not _checkpoints(directory):
+            self.checkpoint()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.commit()
+            self._file.close()
+
+    def __enter__(self) -> "DeliveryJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write_frame(self, kind: int, payload: bytes) -> None:
+        self._file.write(_FRAME.pack(kind, len(payload), zlib.crc32(payload)) + payload)
+        self.offset += _FRAME.size + len(payload)
+
+    def _append(self, record: bytes) -> None:
+        self._batch += record
+        self._batch_records += 1
+        if self._batch_records >= self.batch_size:
+            self.commit()
+
+    def record_load(self, package: Package, truck_id: int, time: datetime.time) -> None:
+        self._append(_RECORD.pack(_LOADED, package.package_id, time_to_micros(time), truck_id))
+
+    def record_delivery(self, package: Package, time: datetime.time) -> None:
+        self._append(
+            _RECORD.pack(_DELIVERED, package.package_id, time_to_micros(time), _NO_TRUCK)
+        )
+
+    def record_address(self, package: Package) -> None:
+        # address changes are rare, so each is written, after the batch before it, right away
+        self._write_batch()
+        self._write_frame(_ADDRESS_FRAME, _encode_address(package))
+        self.records_since_checkpoint += 1
+        self._flush()
+
+    def _flush(self) -> None:
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def _write_batch(self) -> None:
+        if self._batch_records:
+            self._write_frame(_RECORDS_FRAME, bytes(self._batch))
+            self.records_since_checkpoint += self._batch_records
+            self._batch.clear()
+            self._batch_records = 0
+            self._flush()
+
+    def commit(self) -> None:
+        """Write out the current batch of records, then checkpoint if one is due."""
+        self._write_batch()
+        if (
+            self.checkpoint_interval is not None
+            and self.records_since_checkpoint >= self.checkpoint_interval
+        ):
+            self.checkpoint()
+
+    def checkpoint(self) -> str:
+        """Save the package table as of the journal's current offset, and return its path.
+
+        The checkpoint is written under a temporary name and renamed into place,
+        so a crash while writing it leaves the previous checkpoint in use.
+        """
+        self._write_batch()
+        path = _checkpoint_path(self.directory, self.offset)
+        temporary_path = path + ".tmp"
+        save_state(temporary_path, self.packages, [])
+        if self.sync:
+            with open(temporary_path, "rb") as checkpoint_file:
+                os.fsync(checkpoint_file.fileno())
+        os.replace(temporary_path, path)
+        for _, old_path in _checkpoints(self.directory):
+            if old_path != path:
+                os.remove(old_path)
+        self.records_since_checkpoint = 0
+        return path
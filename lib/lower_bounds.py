@@ -0,0 +1,111 @@
+"""Lower bounds on the total mileage needed to deliver a manifest.
+
+No plan can drive fewer miles than these bounds, so the gap between a plan's mileage
+and the bound limits how much any further search could still save.
+Deadlines, load times and required trucks are ignored (they only make plans longer),
+so the bounds hold for every plan, however it was found.
+
+Every plan is a set of trips from the hub and back, which together visit every stop:
+    spanning tree   the trips, taken together, connect the hub and every stop,
+                    so they are at least as long as a minimum spanning tree over them.
+    trip tree       with the hub removed, `k` trips fall apart into at most `k` paths
+                    spanning the stops, at least as long as the minimum spanning tree
+                    over the stops without its `k - 1` longest edges,
+                    and each trip leaves and reaches the hub from some stop, adding at least
+                    twice the shortest distance from the hub. This generalizes the 1-tree
+                    bound for a single tour to the fewest trips the trucks' capacity allows.
+
+Both take O(n^2) time for n distinct stops.
+"""
+
+import math
+from typing import Iterable
+
+from lib.delivery_algorithm import corrected_address
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.distance_provider import distances_from
+from lib.truck_loading import MAX_PACKAGES_PER_TRUCK
+from models.truck import DEFAULT_HUB
+
+
+def spanning_tree_edges(
+    locations: list[str], distance_table: dict[str, dict[str, float]]
+) -> list[float]:
+    """Return the lengths of a minimum spanning tree's edges over `locations` (Prim's)."""
+    if not locations:
+        return []
+    # distance from each location not yet in the tree to the closest one in it
+    closest = distances_from(distance_table, locations[0], locations)
+    in_tree = [False] * len(locations)
+    in_tree[0] = True
+    edges = []
+    for _ in range(len(locations) - 1):
+        nearest = min(
+            (i for i in range(len(locations)) if not in_tree[i]), key=closest.__getitem__
+        )
+        in_tree[nearest] = True
+        edges.append(closest[nearest])
+        for i, distance in enumerate(
+            distances_from(distance_table, locations[nearest], locations)
+        ):
+            if not in_tree[i] and distance < closest[i]:
+                closest[i] = distance
+    return edges
+
+
+def _stops(packages: Iterable) -> list[str]:
+    return list(dict.fromkeys(corrected_address(package) for package in packages))
+
+
+def spanning_tree_bound(
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    hub: str = DEFAULT_HUB,
+) -> float:
+    """The length of a minimum spanning tree over the hub and every stop."""
+    stops = [stop for stop in _stops(packages) if stop != hub]
+    return sum(spanning_tree_edges([hub] + stops, distance_table))
+
+
+def trip_tree_bound(
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    hub: str = DEFAULT_HUB,
+    max_packages: int = MAX_PACKAGES_PER_TRUCK,
+) -> float:
+    """The 1-tree bound, generalized to a plan of at least `len(packages) / max_packages` trips."""
+    stops = [stop for stop in _stops(packages) if stop != hub]
+    if not stops:
+        return 0.0
+    edges = sorted(spanning_tree_edges(stops, distance_table), reverse=True)
+    shortest_from_hub = min(distances_from(distance_table, hub, stops))
+    fewest_trips = max(1, math.ceil(len(packages) / max_packages))
+
+    # each extra trip may drop the longest remaining tree edge, at the cost of two hub legs;
+    # the plan's number of trips is unknown, so take the smallest bound over every count
+    bound = sum(edges[fewest_trips - 1 :]) + 2 * fewest_trips * shortest_from_hub
+    best = bound
+    for dropped_edge in edges[fewest_trips - 1 :]:
+        bound += 2 * shortest_from_hub - dropped_edge
+        best = min(best, bound)
+    return best
+
+
+def mileage_lower_bound(
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    hub: str = DEFAULT_HUB,
+    max_packages: int = MAX_PACKAGES_PER_TRUCK,
+) -> float:
+    """The tighter of the spanning tree and trip tree bounds."""
+    return max(
+        spanning_tree_bound(packages, distance_table, hub),
+        trip_tree_bound(packages, distance_table, hub, max_packages),
+    )
+
+
+def optimality_gap(mileage: float, lower_bound: float) -> float:
+    """How much of `mileage` at most could still be saved, as a fraction (0 is optimal)."""
+    if mileage <= 0:
+        return 0.0
+    return max(0.0, (mileage - lower_bound) / mileage)
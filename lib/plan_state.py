@@ -0,0 +1,200 @@
+"""Plan against a shared, read-only manifest, keeping each plan's state in compact arrays.
+
+`deliver_packages` records each package's status, truck and times on the `Package` objects
+in the `DeliveryHashTable`, so planning the same day twice needs a second copy of every package.
+Here the package data a plan only reads (addresses, deadlines, weights, notes) lives in a
+`Manifest`, built once and never changed, and everything a plan changes lives in a `PlanState`:
+one array per attribute, indexed by the package's row in the manifest.
+Any number of plans can then share one manifest, and a plan's state costs a few bytes per package.
+
+A `Truck` given a `plan_state` records loads and deliveries there
+instead of on the packages, so the planners and trucks work unchanged;
+`deliver_packages` hands a `Manifest` to `plan_manifest`, so it is never changed either.
+`PlanState.packages` turns a plan back into ordinary packages for the reports,
+snapshots and status lookups that expect them.
+"""
+
+import datetime
+import math
+import warnings
+from array import array
+from dataclasses import FrozenInstanceError, fields
+from typing import Iterable, Iterator, Optional
+
+from lib.delivery_algorithm import correct_package_address, default_trucks
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.exact_route import minutes_after_midnight
+from lib.insertion_planner import deliver_routes, plan_routes
+from lib.time_utils import minutes_to_time
+from models.package import DeliveryStatus, Package
+from models.truck import DEFAULT_HUB, Truck
+
+# the package fields that come from the package file, and so belong in the manifest
+MANIFEST_FIELDS = (
+    "package_id",
+    "delivery_address",
+    "delivery_city",
+    "delivery_state",
+    "delivery_zip_code",
+    "package_weight",
+    "delivery_deadline",
+    "special_notes",
+)
+
+_STATUSES = tuple(DeliveryStatus)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+_NO_TRUCK = 0
+
+
+class ManifestPackage(Package):
+    """A package as listed in a `Manifest`, which cannot be changed.
+
+    It has the listed package's file data and a package's initial state;
+    setting any field raises `FrozenInstanceError`, so a plan can never write into the manifest.
+    """
+
+    def __init__(self, package: Package) -> None:
+        for field in fields(Package):
+            value = getattr(package, field.name) if field.name in MANIFEST_FIELDS else field.default
+            object.__setattr__(self, field.name, value)
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"Manifest packages are read-only: cannot set {name!r}")
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"Manifest packages are read-only: cannot delete {name!r}")
+
+
+class Manifest:
+    """The day's packages, as read-only data shared by every plan.
+
+    The manifest keeps its own read-only copies of the packages (`ManifestPackage`),
+    in package id order, with their known address corrections applied,
+    so planning never needs to change them.
+    Like a `DeliveryHashTable`, it can be iterated and packages looked up by id,
+    so it can be passed to the planners in place of one.
+    """
+
+    def __init__(self, packages: Iterable[Package]) -> None:
+        copies = []
+        for package in sorted(packages, key=lambda package: package.package_id):
+            copy = Package(**{name: getattr(package, name) for name in MANIFEST_FIELDS})
+            correct_package_address(copy)
+            copies.append(ManifestPackage(copy))
+        self._packages: tuple[ManifestPackage, ...] = tuple(copies)
+        self.package_ids: tuple[int, ...] = tuple(package.package_id for package in copies)
+        self._rows: dict[int, int] = {
+            package_id: row for row, package_id in enumerate(self.package_ids)
+        }
+        if len(self._rows) != len(self.package_ids):
+            raise ValueError("Package ids must be unique.")
+
+    def __len__(self) -> int:
+        return len(self._packages)
+
+    def __iter__(self) -> Iterator[ManifestPackage]:
+        return iter(self._packages)
+
+    def __contains__(self, package_id) -> bool:
+        return package_id in self._rows
+
+    def row(self, package_id: int) -> int:
+        """Return the package's index into a `PlanState`'s arrays."""
+        return self._rows[package_id]
+
+    def lookup(self, package_id: int) -> Optional[ManifestPackage]:
+        row = self._rows.get(package_id)
+        return self._packages[row] if row is not None else None
+
+
+class PlanState:
+    """One plan's package state, in arrays indexed by manifest row.
+
+    Times are minutes after midnight, with `math.inf` for "not yet",
+    and truck id 0 means the package is not on a truck.
+    """
+
+    def __init__(self, manifest: Manifest) -> None:
+        size = len(manifest)
+        self.manifest = manifest
+        self.statuses = array("B", bytes(size))
+        self.truck_ids = array("q", [_NO_TRUCK]) * size
+        self.load_times = array("d", [math.inf]) * size
+        self.delivery_times = array("d", [math.inf]) * size
+
+    def copy(self) -> "PlanState":
+        """Return an independent copy of this plan's state, sharing the manifest."""
+        state = PlanState.__new__(PlanState)
+        state.manifest = self.manifest
+        state.statuses = array("B", self.statuses)
+        state.truck_ids = array("q", self.truck_ids)
+        state.load_times = array("d", self.load_times)
+        state.delivery_times = array("d", self.delivery_times)
+        return state
+
+    def load(self, package: Package, truck_id: int, current_time: datetime.time):
+        row = self.manifest.row(package.package_id)
+        self.statuses[row] = _STATUS_CODES[DeliveryStatus.EN_ROUTE]
+        self.truck_ids[row] = truck_id
+        self.load_times[row] = minutes_after_midnight(current_time)
+
+    def deliver(self, package: Package, current_time: datetime.time):
+        row = self.manifest.row(package.package_id)
+        self.statuses[row] = _STATUS_CODES[DeliveryStatus.DELIVERED]
+        self.delivery_times[row] = minutes_after_midnight(current_time)
+
+    def delivery_status(self, package_id: int) -> DeliveryStatus:
+        return _STATUSES[self.statuses[self.manifest.row(package_id)]]
+
+    def package(self, package_id: int) -> Package:
+        """Return a new package combining the manifest's data with this plan's state."""
+        row = self.manifest.row(package_id)
+        data = self.manifest.lookup(package_id)
+        return Package(
+            **{name: getattr(data, name) for name in MANIFEST_FIELDS},
+            delivery_status=_STATUSES[self.statuses[row]],
+            time_loaded_onto_truck=minutes_to_time(self.load_times[row]),
+            time_delivered=minutes_to_time(self.delivery_times[row]),
+            truck_id=self.truck_ids[row] or None,
+        )
+
+    def packages(self) -> DeliveryHashTable:
+        """Return every package as planned, for reports, snapshots and status lookups."""
+        packages = DeliveryHashTable(max(len(self.manifest), 1))
+        for package_id in self.manifest.package_ids:
+            packages.insert(package_id=package_id, package=self.package(package_id))
+        return packages
+
+
+def plan_manifest(
+    manifest: Manifest,
+    distance_table: dict[str, dict[str, float]],
+    trucks: Optional[list[Truck]] = None,
+    hub: str = DEFAULT_HUB,
+    **plan_options,
+) -> tuple[PlanState, float]:
+    """Plan and drive a day like `deliver_packages`, leaving the manifest untouched.
+
+    Returns the plan's state and the total mileage. The trucks record into the new state;
+    by default the trucks from `default_trucks` are used.
+    Further keyword arguments (such as `max_packages`) are passed to `plan_routes`.
+    """
+    if trucks is None:
+        trucks = default_trucks(distance_table, hub=hub)
+    state = PlanState(manifest)
+    for truck in trucks:
+        truck.plan_state = state
+
+    plan_options.setdefault("speed_mph", min(truck.speed_mph for truck in trucks))
+    plan = plan_routes(
+        manifest,
+        distance_table,
+        truck_start_times={truck.truck_id: truck.current_time for truck in trucks},
+        hub=hub,
+        **plan_options,
+    )
+    if plan.late_package_ids:
+        warnings.warn(
+            f"Packages {plan.late_package_ids} cannot be delivered by their deadlines"
+        )
+    return state, deliver_routes(plan, trucks)
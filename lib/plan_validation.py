@@ -0,0 +1,342 @@
+"""Check that a finished delivery plan follows every scenario rule.
+
+A plan is flattened into columns (one array per package attribute, one row per package,
+plus one row per truck trip), and each rule is checked over whole columns at once
+with `map` over the `operator` functions and `itertools.compress`,
+so the per-package loops run in C rather than Python bytecode.
+Only the rows that break a rule (or the few rows a sparse rule applies to)
+are looked at individually.
+
+Search-based planners can build `PlanColumns` directly and validate every candidate plan;
+`validate_plan` builds the columns from packages and trucks for finished plans.
+"""
+
+import datetime
+import math
+import operator
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import StrEnum
+from itertools import compress, repeat
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from lib.exact_route import minutes_after_midnight
+from models.package import DeliveryStatus, Package
+from models.truck import Truck
+
+if TYPE_CHECKING:
+    from lib.plan_state import PlanState
+
+START_OF_DAY = datetime.time(8, 0)
+
+
+class Rule(StrEnum):
+    UNDELIVERED = "undelivered"
+    LATE = "late"
+    LOADED_EARLY = "loaded_early"
+    WRONG_TRUCK = "wrong_truck"
+    CO_DELIVERY = "co_delivery"
+    OVER_CAPACITY = "over_capacity"
+    DRIVER_LIMIT = "driver_limit"
+    MILEAGE = "mileage"
+
+
+@dataclass
+class PlanRules:
+    """The scenario's limits. A limit of None is not checked."""
+
+    max_packages_per_trip: Optional[int] = 16
+    drivers: Optional[int] = 2
+    max_total_mileage: Optional[float] = 140.0
+    # drivers leave the hub no earlier than this
+    start_of_day: datetime.time = START_OF_DAY
+
+
+@dataclass
+class Violation:
+    rule: Rule
+    message: str
+    package_id: Optional[int] = None
+    truck_id: Optional[int] = None
+
+
+@dataclass
+class ValidationReport:
+    violations: list[Violation] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.violations
+
+    def counts(self) -> dict[Rule, int]:
+        """Return the number of violations of each rule that was broken."""
+        return dict(Counter(violation.rule for violation in self.violations))
+
+    def package_ids(self, rule: Rule) -> list[int]:
+        return [
+            violation.package_id
+            for violation in self.violations
+            if violation.rule == rule and violation.package_id is not None
+        ]
+
+
+@dataclass
+class PlanColumns:
+    """A plan in columnar form. Times are minutes after midnight.
+
+    Package rows use `math.inf` for "never" (not loaded, not delivered, no deadline)
+    and truck id 0 for "none". A package's trip is identified by its truck and load time.
+    `co_delivery_groups` lists the rows of each group of packages that must travel together.
+    Trip rows hold each truck trip's start and end time; `total_mileage` is the whole fleet's.
+    """
+
+    package_ids: array = field(default_factory=lambda: array("q"))
+    truck_ids: array = field(default_factory=lambda: array("q"))
+    required_truck_ids: array = field(default_factory=lambda: array("q"))
+    earliest_load_times: array = field(default_factory=lambda: array("d"))
+    load_times: array = field(default_factory=lambda: array("d"))
+    delivery_times: array = field(default_factory=lambda: array("d"))
+    deadlines: array = field(default_factory=lambda: array("d"))
+    co_delivery_groups: list[tuple[int, ...]] = field(default_factory=list)
+    trip_truck_ids: array = field(default_factory=lambda: array("q"))
+    trip_starts: array = field(default_factory=lambda: array("d"))
+    trip_ends: array = field(default_factory=lambda: array("d"))
+    total_mileage: float = 0.0
+
+    @classmethod
+    def from_plan(cls, packages: Iterable[Package], trucks: Iterable[Truck]) -> "PlanColumns":
+        """Flatten delivered packages and the trucks' leg logs into columns."""
+        columns = cls()
+        row_of: dict[int, int] = {}
+        groups: list[tuple[int, ...]] = []
+        for row, package in enumerate(packages):
+            row_of[package.package_id] = row
+            columns.package_ids.append(package.package_id)
+            columns.truck_ids.append(package.truck_id or 0)
+            columns.required_truck_ids.append(package.required_truck_id or 0)
+            earliest = package.earliest_load_time
+            columns.earliest_load_times.append(
+                minutes_after_midnight(earliest) if earliest is not None else 0.0
+            )
+            columns.load_times.append(
+                minutes_after_midnight(package.time_loaded_onto_truck)
+                if package.time_loaded_onto_truck is not None
+                else math.inf
+            )
+            columns.delivery_times.append(
+                minutes_after_midnight(package.time_delivered)
+                if package.delivery_status == DeliveryStatus.DELIVERED
+                and package.time_delivered is not None
+                else math.inf
+            )
+            columns.deadlines.append(minutes_after_midnight(package.delivery_deadline))
+            if package.co_delivery_package_ids:
+                groups.append((package.package_id, *package.co_delivery_package_ids))
+        columns.co_delivery_groups = [
+            tuple(row_of[package_id] for package_id in group if package_id in row_of)
+            for group in groups
+        ]
+        columns.add_trips(trucks)
+        return columns
+
+    @classmethod
+    def from_plan_state(cls, state: "PlanState", trucks: Iterable[Truck]) -> "PlanColumns":
+        """Build the columns for a plan made against a `Manifest`.
+
+        The plan's state is already columnar, so its arrays are copied as they are.
+        """
+        manifest = state.manifest
+        columns = cls(
+            package_ids=array("q", manifest.package_ids),
+            truck_ids=array("q", state.truck_ids),
+            load_times=array("d", state.load_times),
+            delivery_times=array("d", state.delivery_times),
+        )
+        for package in manifest:
+            columns.required_truck_ids.append(package.required_truck_id or 0)
+            earliest = package.earliest_load_time
+            columns.earliest_load_times.append(
+                minutes_after_midnight(earliest) if earliest is not None else 0.0
+            )
+            columns.deadlines.append(minutes_after_midnight(package.delivery_deadline))
+            if package.co_delivery_package_ids:
+                columns.co_delivery_groups.append(
+                    tuple(
+                        manifest.row(package_id)
+                        for package_id in (package.package_id, *package.co_delivery_package_ids)
+                        if package_id in manifest
+                    )
+                )
+        columns.add_trips(trucks)
+        return columns
+
+    def add_trips(self, trucks: Iterable[Truck]):
+        """Add a trip row for every trip in the trucks' leg logs, and their mileage."""
+        for truck in trucks:
+            start: Optional[float] = None
+            for leg in truck.legs:
+                if start is None:
+                    start = minutes_after_midnight(leg.departure_time)
+                if leg.to_location == truck.hub:
+                    self.trip_truck_ids.append(truck.truck_id)
+                    self.trip_starts.append(start)
+                    self.trip_ends.append(minutes_after_midnight(leg.arrival_time))
+                    start = None
+            self.total_mileage += truck.current_mileage
+
+
+def _format_minutes(minutes: float) -> str:
+    hours, minutes = divmod(round(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def validate_columns(
+    columns: PlanColumns, rules: Optional[PlanRules] = None
+) -> ValidationReport:
+    """Check every rule over the plan's columns and report each violation.
+
+    By default the WGUPS scenario's `PlanRules` are used.
+    """
+    rules = rules or PlanRules()
+    report = ValidationReport()
+    violations = report.violations
+    ids = columns.package_ids
+
+    rows = range(len(ids))
+    truck_ids = columns.truck_ids
+    load_times = columns.load_times
+    delivery_times = columns.delivery_times
+    deadlines = columns.deadlines
+
+    # one pass flags both late and undelivered packages (delivered at "infinity")
+    for row in compress(rows, map(operator.lt, deadlines, delivery_times)):
+        if delivery_times[row] == math.inf:
+            violations.append(
+                Violation(
+                    Rule.UNDELIVERED, f"Package {ids[row]} was never delivered", ids[row]
+                )
+            )
+        else:
+            violations.append(
+                Violation(
+                    Rule.LATE,
+                    f"Package {ids[row]} was delivered at {_format_minutes(delivery_times[row])}, "
+                    f"after its {_format_minutes(deadlines[row])} deadline",
+                    ids[row],
+                    truck_ids[row],
+                )
+            )
+
+    # only a few packages have an earliest load time or a required truck,
+    # so those rows are picked out first (nonzero entries) and checked one by one
+    start_of_day = minutes_after_midnight(rules.start_of_day)
+    early_rows = set(compress(rows, map(operator.lt, load_times, repeat(start_of_day))))
+    early_rows.update(
+        row
+        for row in compress(rows, columns.earliest_load_times)
+        if load_times[row] < columns.earliest_load_times[row]
+    )
+    violations.extend(
+        Violation(
+            Rule.LOADED_EARLY,
+            f"Package {ids[row]} was loaded at {_format_minutes(load_times[row])}, "
+            "before it was available",
+            ids[row],
+            truck_ids[row],
+        )
+        for row in sorted(early_rows)
+    )
+
+    required_truck_ids = columns.required_truck_ids
+    violations.extend(
+        Violation(
+            Rule.WRONG_TRUCK,
+            f"Package {ids[row]} must be on truck {required_truck_ids[row]}, "
+            f"but was on truck {truck_ids[row] or 'none'}",
+            ids[row],
+            truck_ids[row],
+        )
+        for row in compress(rows, required_truck_ids)
+        if truck_ids[row] != required_truck_ids[row]
+    )
+
+    for group in columns.co_delivery_groups:
+        trips = {(columns.truck_ids[row], columns.load_times[row]) for row in group}
+        if len(trips) > 1:
+            violations.append(
+                Violation(
+                    Rule.CO_DELIVERY,
+                    f"Packages {[ids[row] for row in group]} must be delivered together, "
+                    f"but were split across {len(trips)} trips",
+                    ids[group[0]],
+                )
+            )
+
+    if rules.max_packages_per_trip is not None:
+        # a trip is identified by its truck and the time its packages were loaded
+        trip_sizes = Counter(zip(columns.truck_ids, columns.load_times))
+        violations.extend(
+            Violation(
+                Rule.OVER_CAPACITY,
+                f"Truck {truck_id} left at {_format_minutes(loaded)} with {size} packages, "
+                f"more than {rules.max_packages_per_trip}",
+                truck_id=truck_id,
+            )
+            for (truck_id, loaded), size in trip_sizes.items()
+            if truck_id and size > rules.max_packages_per_trip
+        )
+
+    if rules.drivers is not None:
+        violations.extend(_check_driver_limit(columns, rules.drivers))
+
+    if rules.max_total_mileage is not None and columns.total_mileage > rules.max_total_mileage:
+        violations.append(
+            Violation(
+                Rule.MILEAGE,
+                f"Trucks drove {columns.total_mileage:.1f} miles, "
+                f"more than {rules.max_total_mileage:.1f}",
+            )
+        )
+    return report
+
+
+def _check_driver_limit(columns: PlanColumns, drivers: int) -> list[Violation]:
+    """Report each time more trucks are out on trips than there are drivers."""
+    # sweep over trip starts and ends; at equal times, ends come first,
+    # since a driver back at the hub can leave again immediately
+    events = sorted(
+        [(end, -1, truck_id) for end, truck_id in zip(columns.trip_ends, columns.trip_truck_ids)]
+        + [
+            (start, 1, truck_id)
+            for start, truck_id in zip(columns.trip_starts, columns.trip_truck_ids)
+        ]
+    )
+    violations = []
+    on_the_road = 0
+    for moment, change, truck_id in events:
+        on_the_road += change
+        if change > 0 and on_the_road > drivers:
+            violations.append(
+                Violation(
+                    Rule.DRIVER_LIMIT,
+                    f"Truck {truck_id} left at {_format_minutes(moment)} "
+                    f"with {on_the_road} trucks on the road and only {drivers} drivers",
+                    truck_id=truck_id,
+                )
+            )
+    return violations
+
+
+def validate_plan(
+    packages: Iterable[Package], trucks: Iterable[Truck], rules: Optional[PlanRules] = None
+) -> ValidationReport:
+    """Check a finished plan, such as the packages and trucks from `deliver_packages`."""
+    return validate_columns(PlanColumns.from_plan(packages, trucks), rules)
+
+
+def validate_plan_state(
+    state: "PlanState", trucks: Iterable[Truck], rules: Optional[PlanRules] = None
+) -> ValidationReport:
+    """Check a plan made against a `Manifest`, such as the state from `plan_manifest`."""
+    return validate_columns(PlanColumns.from_plan_state(state, trucks), rules)
@@ -0,0 +1,231 @@
+"""Streaming status reports for many packages at once.
+
+`package_status_at_provided_time` builds a sentence per package, which is fine for the console
+but slow and hard to parse for large depots. The writer here renders the status of every package
+at a given time as CSV, JSON Lines or an aligned text table, formatting rows in chunks
+and writing each chunk through the output stream in a single call,
+so memory use stays flat no matter how many packages are reported.
+"""
+
+import csv
+import datetime
+import io
+import json
+from enum import StrEnum
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, TextIO
+
+from lib.delivery_algorithm import delivery_status_at_time
+from models.package import DeliveryStatus, Package
+
+
+DEFAULT_CHUNK_SIZE = 4096
+OUTPUT_BUFFER_BYTES = 1024 * 1024
+
+REPORT_COLUMNS = (
+    "package_id",
+    "status",
+    "truck_id",
+    "address",
+    "delivery_deadline",
+    "time_delivered",
+    "late",
+)
+
+# column widths of the aligned table; longer values overflow their column
+_TABLE_WIDTHS = (10, 9, 8, 44, 17, 14, 4)
+_TABLE_ROW = " ".join(
+    f"{{:<{width}}}" if i == 3 else f"{{:>{width}}}"
+    for i, width in enumerate(_TABLE_WIDTHS)
+)
+
+
+class ReportFormat(StrEnum):
+    CSV = "csv"
+    JSONL = "jsonl"
+    TABLE = "table"
+
+
+@lru_cache(maxsize=65536)
+def _format_time(value: Optional[datetime.time]) -> str:
+    # delivery times repeat across packages delivered at the same stop,
+    # and deadlines take only a handful of values, so formatting is cached
+    return value.strftime("%H:%M:%S") if value is not None else ""
+
+
+def iter_status_rows(
+    packages: Iterable[Package],
+    current_time: datetime.time,
+    truck_id: Optional[int] = None,
+    status: Optional[DeliveryStatus] = None,
+    late_only: bool = False,
+) -> Iterator[tuple]:
+    """Yield one row of `REPORT_COLUMNS` per package matching the filters.
+
+    The status is the simulated status at `current_time`.
+    A package counts as late if, by `current_time`, it was delivered after its deadline
+    or is still undelivered with its deadline passed.
+    Only delivered packages report a delivery time.
+    """
+    for package in packages:
+        if truck_id is not None and package.truck_id != truck_id:
+            continue
+        package_status = delivery_status_at_time(package, current_time)
+        if status is not None and package_status != status:
+            continue
+        delivered = package_status == DeliveryStatus.DELIVERED
+        deadline = package.delivery_deadline
+        late = (
+            package.time_delivered > deadline
+            if delivered
+            else current_time > deadline
+        )
+        if late_only and not late:
+            continue
+        yield (
+            package.package_id,
+            package_status.value,
+            package.truck_id,
+            package.address,
+            deadline,
+            package.time_delivered if delivered else None,
+            late,
+        )
+
+
+def _chunks(rows: Iterator[tuple], chunk_size: int) -> Iterator[list[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_csv(stream: TextIO, chunks: Iterator[list[tuple]]) -> int:
+    # rows are rendered into an in-memory buffer so each chunk is a single write
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(REPORT_COLUMNS)
+    written = 0
+    for chunk in chunks:
+        writer.writerows(
+            (
+                package_id,
+                status,
+                "" if truck_id is None else truck_id,
+                address,
+                _format_time(deadline),
+                _format_time(delivered),
+                "yes" if late else "no",
+            )
+            for package_id, status, truck_id, address, deadline, delivered, late in chunk
+        )
+        stream.write(buffer.getvalue())
+        buffer.seek(0)
+        buffer.truncate()
+        written += len(chunk)
+    stream.write(buffer.getvalue())
+    return written
+
+
+def _write_jsonl(stream: TextIO, chunks: Iterator[list[tuple]]) -> int:
+    encode = json.JSONEncoder().encode
+    written = 0
+    for chunk in chunks:
+        stream.write(
+            "".join(
+                encode(
+                    {
+                        "package_id": package_id,
+                        "status": status,
+                        "truck_id": truck_id,
+                        "address": address,
+                        "delivery_deadline": _format_time(deadline),
+                        "time_delivered": _format_time(delivered) or None,
+                        "late": late,
+                    }
+                )
+                + "\n"
+                for package_id, status, truck_id, address, deadline, delivered, late in chunk
+            )
+        )
+        written += len(chunk)
+    return written
+
+
+def _write_table(stream: TextIO, chunks: Iterator[list[tuple]]) -> int:
+    format_row = _TABLE_ROW.format
+    stream.write(format_row(*REPORT_COLUMNS).rstrip() + "\n")
+    stream.write(" ".join("-" * width for width in _TABLE_WIDTHS) + "\n")
+    written = 0
+    for chunk in chunks:
+        stream.write(
+            "".join(
+                format_row(
+                    package_id,
+                    status,
+                    "" if truck_id is None else truck_id,
+                    address,
+                    _format_time(deadline),
+                    _format_time(delivered),
+                    "LATE" if late else "",
+                ).rstrip()
+                + "\n"
+                for package_id, status, truck_id, address, deadline, delivered, late in chunk
+            )
+        )
+        written += len(chunk)
+    return written
+
+
+_WRITERS = {
+    ReportFormat.CSV: _write_csv,
+    ReportFormat.JSONL: _write_jsonl,
+    ReportFormat.TABLE: _write_table,
+}
+
+
+def write_status_report(
+    packages: Iterable[Package],
+    current_time: datetime.time,
+    stream: TextIO,
+    report_format: ReportFormat = ReportFormat.TABLE,
+    truck_id: Optional[int] = None,
+    status: Optional[DeliveryStatus] = None,
+    late_only: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Write the status of every matching package at `current_time` to `stream`.
+
+    `packages` may be any iterable, such as a `DeliveryHashTable` or a generator,
+    and is consumed lazily. Returns the number of packages written.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+    try:
+        writer = _WRITERS[ReportFormat(report_format)]
+    except ValueError as e:
+        raise ValueError(f"Unknown report format: {report_format}") from e
+    rows = iter_status_rows(
+        packages, current_time, truck_id=truck_id, status=status, late_only=late_only
+    )
+    return writer(stream, _chunks(rows, chunk_size))
+
+
+def write_status_report_file(
+    filepath: str,
+    packages: Iterable[Package],
+    current_time: datetime.time,
+    report_format: ReportFormat = ReportFormat.CSV,
+    **filters,
+) -> int:
+    """Write a status report to a file through a large output buffer."""
+    with open(
+        filepath, "w", newline="", encoding="utf-8", buffering=OUTPUT_BUFFER_BYTES
+    ) as report_file:
+        return write_status_report(
+            packages, current_time, report_file, report_format=report_format, **filters
+        )
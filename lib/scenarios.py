@@ -0,0 +1,263 @@
+"""What-if scenarios: replan the day with different start times, capacities, speeds and fleets.
+
+A `Scenario` overrides the parameters `deliver_packages` otherwise fixes
+(when each driver starts, how many packages fit on a truck, how fast the trucks drive,
+and how many trucks there are). `scenario_grid` builds every combination of a set of overrides,
+and `run_scenarios` plans them all against the same manifest and distance table:
+
+    scenarios = scenario_grid(
+        truck_start_times=[(time(8, 0), time(9, 5)), (time(8, 0), time(8, 45))],
+        fleet_size=[2, 3],
+    )
+    print(format_comparison(run_scenarios(scenarios, packages, distance_table)))
+
+Scenarios are planned in parallel worker processes. The read-only inputs are shared with
+the workers copy-on-write by forking (where the platform supports it),
+rather than pickled to every task or deep-copied for every scenario;
+every scenario plans against the same read-only `Manifest`,
+recording its loads and deliveries in its own `PlanState`.
+Planning is deterministic (the exact trip reordering runs without a time limit here),
+and results are returned in scenario order, so the same grid always gives the same table.
+"""
+
+import datetime
+import itertools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+from typing import Iterable, Optional
+
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.insertion_planner import deliver_routes, plan_routes
+from lib.plan_state import Manifest, PlanState
+from lib.plan_validation import PlanColumns, PlanRules, Rule, validate_columns
+from lib.truck_loading import MAX_PACKAGES_PER_TRUCK, START_OF_DAY
+from models.truck import DEFAULT_HUB, TRUCK_SPEED_MPH, Truck
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """One set of overrides to the base plan, which matches `default_trucks`.
+
+    `truck_start_times[i]` is when the driver of truck `i + 1` starts,
+    so there are as many trucks (each with its own driver) as start times.
+    """
+
+    name: str = "base"
+    truck_start_times: tuple[datetime.time, ...] = (datetime.time(8, 0), datetime.time(9, 5))
+    max_packages: int = MAX_PACKAGES_PER_TRUCK
+    speed_mph: float = TRUCK_SPEED_MPH
+
+    @property
+    def fleet_size(self) -> int:
+        return len(self.truck_start_times)
+
+    def with_fleet_size(self, fleet_size: int) -> "Scenario":
+        """Return the scenario with trucks removed from the end, or added starting at 8:00am."""
+        start_times = self.truck_start_times[:fleet_size]
+        start_times += (START_OF_DAY,) * (fleet_size - len(start_times))
+        return replace(self, truck_start_times=start_times)
+
+
+def scenario_grid(base: Optional[Scenario] = None, **overrides: Iterable) -> list[Scenario]:
+    """Return a scenario for every combination of the override values, applied to `base`.
+
+    Each keyword is a `Scenario` field or `fleet_size`, with the values to try;
+    `fleet_size` is applied after `truck_start_times`.
+    Scenarios are named after their overrides, e.g. `fleet_size=3, speed_mph=20`.
+    """
+    base = base or Scenario()
+    scenario_fields = {scenario_field.name for scenario_field in fields(Scenario)} - {"name"}
+    unknown = set(overrides) - scenario_fields - {"fleet_size"}
+    if unknown:
+        raise ValueError(f"Unknown scenario overrides: {sorted(unknown)}")
+
+    names = list(overrides)
+    scenarios = []
+    for values in itertools.product(*(list(overrides[name]) for name in names)):
+        chosen = dict(zip(names, values))
+        fleet_size = chosen.pop("fleet_size", None)
+        scenario = replace(base, **chosen)
+        if fleet_size is not None:
+            scenario = scenario.with_fleet_size(fleet_size)
+        label = ", ".join(
+            f"{name}={_format_override(value)}" for name, value in zip(names, values)
+        )
+        scenarios.append(replace(scenario, name=label or base.name))
+    return scenarios
+
+
+def _format_override(value) -> str:
+    if isinstance(value, datetime.time):
+        return value.strftime("%H:%M")
+    if isinstance(value, tuple):
+        return "/".join(map(_format_override, value))
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+@dataclass
+class ScenarioResult:
+    scenario: Scenario
+    total_mileage: float = 0.0
+    # packages delivered after their deadline
+    late_package_ids: list[int] = field(default_factory=list)
+    # total minutes by which those packages were late
+    minutes_late: float = 0.0
+    # when the last truck is back at the hub
+    finish_time: Optional[datetime.time] = None
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class _SharedInputs:
+    """The read-only inputs every scenario plans against."""
+
+    manifest: Manifest
+    distance_table: dict[str, dict[str, float]]
+    hub: str
+
+
+# set in each worker process (inherited when forked) before it plans any scenario
+_inputs: Optional[_SharedInputs] = None
+
+
+def _share_inputs(inputs: _SharedInputs):
+    global _inputs
+    _inputs = inputs
+
+
+def _run_in_worker(scenario: Scenario) -> ScenarioResult:
+    return plan_scenario(scenario, _inputs)
+
+
+def plan_scenario(scenario: Scenario, inputs: _SharedInputs) -> ScenarioResult:
+    """Plan and drive one scenario, measuring its mileage, lateness and finish time.
+
+    Errors (such as a package requiring a truck the scenario does not have)
+    are reported on the result instead of raised, so one scenario does not stop the rest.
+    """
+    start = time.perf_counter()
+    result = ScenarioResult(scenario=scenario)
+    try:
+        state = PlanState(inputs.manifest)
+        trucks = [
+            Truck(
+                truck_id=truck_id,
+                distance_table=inputs.distance_table,
+                current_time=start_time,
+                hub=inputs.hub,
+                speed_mph=scenario.speed_mph,
+                plan_state=state,
+            )
+            for truck_id, start_time in enumerate(scenario.truck_start_times, start=1)
+        ]
+        plan = plan_routes(
+            inputs.manifest,
+            inputs.distance_table,
+            truck_start_times={truck.truck_id: truck.current_time for truck in trucks},
+            max_packages=scenario.max_packages,
+            hub=inputs.hub,
+            # a time limit would make the result depend on how busy the machine is
+            exact_time_limit=None,
+            speed_mph=scenario.speed_mph,
+        )
+        result.total_mileage = deliver_routes(plan, trucks)
+
+        columns = PlanColumns.from_plan_state(state, trucks)
+        report = validate_columns(
+            columns,
+            PlanRules(
+                max_packages_per_trip=scenario.max_packages,
+                drivers=scenario.fleet_size,
+                max_total_mileage=None,
+            ),
+        )
+        result.late_package_ids = sorted(
+            report.package_ids(Rule.LATE) + report.package_ids(Rule.UNDELIVERED)
+        )
+        for package_id in result.late_package_ids:
+            row = inputs.manifest.row(package_id)
+            result.minutes_late += columns.delivery_times[row] - columns.deadlines[row]
+        result.finish_time = max(
+            (truck.current_time for truck in trucks if truck.legs), default=None
+        )
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed_seconds = time.perf_counter() - start
+    return result
+
+
+def run_scenarios(
+    scenarios: Iterable[Scenario],
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    hub: str = DEFAULT_HUB,
+    max_workers: Optional[int] = None,
+) -> list[ScenarioResult]:
+    """Plan every scenario against the same packages and distance table, in parallel.
+
+    `packages` is the day's packages (or a `Manifest` of them); they are only read.
+    Scenarios run across `max_workers` processes (default: one per CPU),
+    or in this process when `max_workers` is 1. Results are in the order of `scenarios`.
+    """
+    scenarios = list(scenarios)
+    inputs = _SharedInputs(
+        manifest=packages if isinstance(packages, Manifest) else Manifest(packages),
+        distance_table=distance_table,
+        hub=hub,
+    )
+    if max_workers == 1 or len(scenarios) <= 1:
+        return [plan_scenario(scenario, inputs) for scenario in scenarios]
+
+    # forked workers inherit the inputs copy-on-write; elsewhere they are pickled once per worker
+    context = multiprocessing.get_context(
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    )
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=context,
+        initializer=_share_inputs,
+        initargs=(inputs,),
+    ) as executor:
+        return list(executor.map(_run_in_worker, scenarios))
+
+
+def format_comparison(results: Iterable[ScenarioResult]) -> str:
+    """Format the results as a table comparing mileage, lateness and finish time.
+
+    Scenarios that could not be planned are listed with their errors below the table.
+    """
+    header = ("Scenario", "Trucks", "Capacity", "MPH", "Miles", "Late", "Min late", "Finish")
+    rows = []
+    errors = []
+    for result in results:
+        scenario = result.scenario
+        if result.error is not None:
+            outcome = ("failed", "-", "-", "-")
+            errors.append(f"{scenario.name}: {result.error}")
+        else:
+            outcome = (
+                f"{result.total_mileage:.1f}",
+                str(len(result.late_package_ids)),
+                f"{result.minutes_late:.0f}",
+                result.finish_time.strftime("%H:%M") if result.finish_time else "-",
+            )
+        rows.append(
+            (
+                scenario.name,
+                str(scenario.fleet_size),
+                str(scenario.max_packages),
+                f"{scenario.speed_mph:g}",
+                *outcome,
+            )
+        )
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    lines = [
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in [header, *rows]
+    ]
+    if errors:
+        lines += ["", *errors]
+    return "\n".join(lines)
@@ -0,0 +1,499 @@
+"""Save and reopen the full delivery state in a compact binary format.
+
+A snapshot holds the packages after they have been run through the delivery algorithm
+(addresses, deadlines, statuses, load and delivery times, truck assignments)
+and the state of every truck (position, clock, mileage, trips and cargo),
+so a crashed process can recover, or several worker processes can share a plan,
+without re-planning.
+
+Layout (all little-endian):
+    header          magic, format version, section count, package count, total mileage
+    directory       one (tag, offset, length) entry per section
+    sections        "STRS" string table: count, end offsets, then the UTF-8 bytes
+                    "PKGS" hash table length, then one fixed-size record per package,
+                           in `package_ids` order
+                    "PIDX" package ids sorted ascending, with their record numbers,
+                           for binary search
+                    "TRKS" one fixed-size record per truck
+                    "TPKG" the ids of each truck's undelivered and delivered packages
+                    "LEGS" the number of legs in each truck's leg log, then one record per leg
+                    "THUB" the hub (string index) of each truck
+
+Every string (addresses, cities, notes, truck locations) is stored once in the string table
+and referenced by index. Times are stored as microseconds since midnight, with -1 for none.
+Readers skip sections they do not know, so sections can be added without breaking old files.
+
+`load_state` rebuilds everything in bulk, while `SnapshotReader` memory-maps the file
+to read a single package's record by id without loading the rest.
+"""
+
+import mmap
+import struct
+from array import array
+from typing import Optional
+
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.time_utils import micros_to_time, time_to_micros
+from models.package import DeliveryStatus, Package
+from models.truck import DEFAULT_HUB, Leg, Truck
+
+SNAPSHOT_MAGIC = b"WGUPSNAP"
+SNAPSHOT_VERSION = 2
+
+# magic, version, section count, package count, total mileage
+_HEADER = struct.Struct("<8sHHId")
+# section tag, offset from the start of the file, length in bytes
+_SECTION = struct.Struct("<4sQQ")
+# package id, address, city, state, zip code, special notes (string indexes),
+# weight, deadline, time loaded, time delivered (microseconds), status, truck id
+_PACKAGE = struct.Struct("<q5Idqqqbh")
+# truck id, current location (string index), current time (microseconds),
+# mileage, total trips, active, undelivered package count, delivered package count
+_TRUCK = struct.Struct("<iIqdIBII")
+# departure and arrival time (microseconds), from and to location (string indexes),
+# start and end mileage, load while driving, load on arrival
+_LEG = struct.Struct("<qqIIddII")
+_HASH_TABLE_LENGTH = struct.Struct("<I")
+_STRING_COUNT = struct.Struct("<I")
+
+_NO_STRING = 0xFFFFFFFF
+_NO_TRUCK = -1
+
+# sections every snapshot writer has produced; leg logs and hubs are optional
+_REQUIRED_SECTIONS = (b"STRS", b"PKGS", b"TRKS", b"TPKG")
+
+# statuses are stored by their position in this tuple
+_STATUSES = ("AT_HUB", "EN_ROUTE", "DELIVERED")
+
+
+class _StringTable:
+    """Interns strings while writing, assigning each distinct string an index."""
+
+    def __init__(self) -> None:
+        self.indexes: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def index(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NO_STRING
+        index = self.indexes.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.indexes[value] = index
+            self.strings.append(value)
+        return index
+
+    def to_bytes(self) -> bytes:
+        encoded = [string.encode("utf-8") for string in self.strings]
+        ends = array("I")
+        end = 0
+        for string in encoded:
+            end += len(string)
+            ends.append(end)
+        return (
+            _STRING_COUNT.pack(len(encoded))
+            + _little_endian(ends).tobytes()
+            + b"".join(encoded)
+        )
+
+
+def _little_endian(values: array) -> array:
+    if struct.pack("=H", 1) != struct.pack("<H", 1):
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _read_array(typecode: str, buffer, offset: int, count: int) -> array:
+    values = array(typecode)
+    values.frombytes(buffer[offset : offset + count * values.itemsize])
+    return _little_endian(values)
+
+
+def save_state(
+    filepath: str,
+    packages: DeliveryHashTable,
+    trucks: list[Truck],
+) -> None:
+    """Write planned packages and truck states to a snapshot file."""
+    strings = _StringTable()
+    status_codes = {status: code for code, status in enumerate(_STATUSES)}
+
+    package_records = bytearray(_HASH_TABLE_LENGTH.pack(len(packages.table)))
+    for package_id in packages.package_ids:
+        package = packages.lookup(package_id)
+        package_records += _PACKAGE.pack(
+            package.package_id,
+            strings.index(package.delivery_address),
+            strings.index(package.delivery_city),
+            strings.index(package.delivery_state),
+            strings.index(package.delivery_zip_code),
+            strings.index(package.special_notes),
+            package.package_weight,
+            time_to_micros(package.delivery_deadline),
+            time_to_micros(package.time_loaded_onto_truck),
+            time_to_micros(package.time_delivered),
+            status_codes[package.delivery_status],
+            package.truck_id if package.truck_id is not None else _NO_TRUCK,
+        )
+
+    index_order = sorted(
+        range(len(packages.package_ids)), key=packages.package_ids.__getitem__
+    )
+    sorted_ids = array("q", (packages.package_ids[i] for i in index_order))
+    record_numbers = array("I", index_order)
+    package_index = (
+        _little_endian(sorted_ids).tobytes() + _little_endian(record_numbers).tobytes()
+    )
+
+    truck_records = bytearray()
+    truck_package_ids = array("q")
+    leg_counts = array("I")
+    leg_records = bytearray()
+    truck_hubs = array("I")
+    for truck in trucks:
+        truck_records += _TRUCK.pack(
+            truck.truck_id,
+            strings.index(truck.current_location),
+            time_to_micros(truck.current_time),
+            truck.current_mileage,
+            truck.total_trips,
+            truck.active,
+            len(truck.packages_to_deliver),
+            len(truck.delivered_packages),
+        )
+        truck_package_ids.extend(p.package_id for p in truck.packages_to_deliver)
+        truck_package_ids.extend(p.package_id for p in truck.delivered_packages)
+        truck_hubs.append(strings.index(truck.hub))
+        leg_counts.append(len(truck.legs))
+        for leg in truck.legs:
+            leg_records += _LEG.pack(
+                time_to_micros(leg.departure_time),
+                time_to_micros(leg.arrival_time),
+                strings.index(leg.from_location),
+                strings.index(leg.to_location),
+                leg.start_mileage,
+                leg.end_mileage,
+                leg.load,
+                leg.load_on_arrival,
+            )
+
+    sections = [
+        (b"STRS", strings.to_bytes()),
+        (b"PKGS", bytes(package_records)),
+        (b"PIDX", package_index),
+        (b"TRKS", bytes(truck_records)),
+        (b"TPKG", _little_endian(truck_package_ids).tobytes()),
+        (b"LEGS", _little_endian(leg_counts).tobytes() + bytes(leg_records)),
+        (b"THUB", _little_endian(truck_hubs).tobytes()),
+    ]
+
+    total_mileage = sum(truck.current_mileage for truck in trucks)
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    with open(filepath, "wb") as snapshot_file:
+        snapshot_file.write(
+            _HEADER.pack(
+                SNAPSHOT_MAGIC,
+                SNAPSHOT_VERSION,
+                len(sections),
+                len(packages),
+                total_mileage,
+            )
+        )
+        for tag, data in sections:
+            snapshot_file.write(_SECTION.pack(tag, offset, len(data)))
+            offset += len(data)
+        for _, data in sections:
+            snapshot_file.write(data)
+
+
+def _read_header(buffer) -> tuple[int, int, float]:
+    """Validate the header and return the section count, package count and total mileage."""
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Not a snapshot file.")
+    magic, version, section_count, package_count, total_mileage = _HEADER.unpack_from(
+        buffer
+    )
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a snapshot file.")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+    return section_count, package_count, total_mileage
+
+
+def _read_sections(buffer) -> dict[bytes, tuple[int, int]]:
+    """Return the (offset, length) of every section, keyed by tag."""
+    section_count, _, _ = _read_header(buffer)
+    sections = {}
+    for i in range(section_count):
+        tag, offset, length = _SECTION.unpack_from(
+            buffer, _HEADER.size + i * _SECTION.size
+        )
+        sections[tag] = (offset, length)
+    return sections
+
+
+def read_state_header(filepath: str) -> tuple[int, float]:
+    """Return the package count and total mileage without loading the packages."""
+    with open(filepath, "rb") as snapshot_file:
+        _, package_count, total_mileage = _read_header(
+            snapshot_file.read(_HEADER.size)
+        )
+    return package_count, total_mileage
+
+
+def _read_strings(buffer, offset: int) -> tuple[array, int]:
+    """Return the end offsets of each string and the offset of the string data."""
+    (count,) = _STRING_COUNT.unpack_from(buffer, offset)
+    ends = _read_array("I", buffer, offset + _STRING_COUNT.size, count)
+    return ends, offset + _STRING_COUNT.size + count * ends.itemsize
+
+
+def _package_from_record(record: tuple, string_at) -> Package:
+    (
+        package_id,
+        address,
+        city,
+        state,
+        zip_code,
+        special_notes,
+        weight,
+        deadline,
+        time_loaded,
+        time_delivered,
+        status,
+        truck_id,
+    ) = record
+    return Package(
+        package_id=package_id,
+        delivery_address=string_at(address),
+        delivery_city=string_at(city),
+        delivery_state=string_at(state),
+        delivery_zip_code=string_at(zip_code),
+        package_weight=weight,
+        delivery_deadline=micros_to_time(deadline),
+        special_notes=string_at(special_notes),
+        delivery_status=DeliveryStatus(_STATUSES[status]),
+        time_loaded_onto_truck=micros_to_time(time_loaded),
+        time_delivered=micros_to_time(time_delivered),
+        truck_id=truck_id if truck_id != _NO_TRUCK else None,
+    )
+
+
+def _read_legs(buffer, sections, truck_count: int, string_at) -> list[list[Leg]]:
+    """Read each truck's leg log. Snapshots written without leg logs give empty logs."""
+    if b"LEGS" not in sections:
+        return [[] for _ in range(truck_count)]
+    legs_offset, _ = sections[b"LEGS"]
+    leg_counts = _read_array("I", buffer, legs_offset, truck_count)
+    offset = legs_offset + truck_count * leg_counts.itemsize
+    legs = []
+    for leg_count in leg_counts:
+        truck_legs = []
+        for (
+            departure_time,
+            arrival_time,
+            from_location,
+            to_location,
+            start_mileage,
+            end_mileage,
+            load,
+            load_on_arrival,
+        ) in _LEG.iter_unpack(buffer[offset : offset + leg_count * _LEG.size]):
+            truck_legs.append(
+                Leg(
+                    departure_time=micros_to_time(departure_time),
+                    arrival_time=micros_to_time(arrival_time),
+                    from_location=string_at(from_location),
+                    to_location=string_at(to_location),
+                    start_mileage=start_mileage,
+                    end_mileage=end_mileage,
+                    load=load,
+                    load_on_arrival=load_on_arrival,
+                )
+            )
+        offset += leg_count * _LEG.size
+        legs.append(truck_legs)
+    return legs
+
+
+def load_state(
+    filepath: str, distance_table: Optional[dict[str, dict[str, float]]] = None
+) -> tuple[DeliveryHashTable, list[Truck]]:
+    """Read planned packages and truck states from a snapshot file.
+
+    The trucks are given `distance_table`, if provided, so they can keep delivering.
+    """
+    with open(filepath, "rb") as snapshot_file:
+        buffer = snapshot_file.read()
+    sections = _read_sections(buffer)
+    if not all(tag in sections for tag in _REQUIRED_SECTIONS):
+        raise ValueError("Not a snapshot file.")
+
+    strings_offset, _ = sections[b"STRS"]
+    ends, data_offset = _read_strings(buffer, strings_offset)
+    string_data = buffer[data_offset : data_offset + (ends[-1] if ends else 0)]
+    strings: list[Optional[str]] = []
+    start = 0
+    for end in ends:
+        strings.append(string_data[start:end].decode("utf-8"))
+        start = end
+
+    def string_at(index: int) -> Optional[str]:
+        return strings[index] if index != _NO_STRING else None
+
+    packages_offset, packages_length = sections[b"PKGS"]
+    (table_length,) = _HASH_TABLE_LENGTH.unpack_from(buffer, packages_offset)
+    packages = DeliveryHashTable(table_length)
+    records_offset = packages_offset + _HASH_TABLE_LENGTH.size
+    records = memoryview(buffer)[records_offset : packages_offset + packages_length]
+    packages_by_id: dict[int, Package] = {}
+    for record in _PACKAGE.iter_unpack(records):
+        package = _package_from_record(record, string_at)
+        packages.insert(package_id=package.package_id, package=package)
+        packages_by_id[package.package_id] = package
+
+    trucks_offset, trucks_length = sections[b"TRKS"]
+    truck_packages_offset, truck_packages_length = sections[b"TPKG"]
+    truck_package_ids = _read_array(
+        "q", buffer, truck_packages_offset, truck_packages_length // 8
+    )
+    truck_count = trucks_length // _TRUCK.size
+    legs = _read_legs(buffer, sections, truck_count, string_at)
+    if b"THUB" in sections:
+        hubs_offset, _ = sections[b"THUB"]
+        hubs = [string_at(i) for i in _read_array("I", buffer, hubs_offset, truck_count)]
+    else:
+        hubs = [DEFAULT_HUB] * truck_count
+
+    trucks = []
+    position = 0
+    for (
+        truck_id,
+        location,
+        current_time,
+        mileage,
+        total_trips,
+        active,
+        undelivered_count,
+        delivered_count,
+    ), truck_legs, hub in zip(
+        _TRUCK.iter_unpack(
+            buffer[trucks_offset : trucks_offset + trucks_length]
+        ),
+        legs,
+        hubs,
+    ):
+        to_deliver = truck_package_ids[position : position + undelivered_count]
+        position += undelivered_count
+        delivered = truck_package_ids[position : position + delivered_count]
+        position += delivered_count
+        trucks.append(
+            Truck(
+                truck_id=truck_id,
+                distance_table=distance_table if distance_table is not None else {},
+                packages_to_deliver=[packages_by_id[i] for i in to_deliver],
+                delivered_packages=[packages_by_id[i] for i in delivered],
+                current_location=string_at(location),
+                current_time=micros_to_time(current_time),
+                active=bool(active),
+                current_mileage=mileage,
+                total_trips=total_trips,
+                legs=truck_legs,
+                hub=hub,
+            )
+        )
+
+    return packages, trucks
+
+
+class SnapshotReader:
+    """Memory-mapped, read-only access to single packages in a snapshot file.
+
+    Only the header, the sorted id index and the requested records are touched,
+    so looking up one package does not load the whole plan.
+    Several processes can map the same file and share its pages.
+    """
+
+    def __init__(self, filepath: str) -> None:
+        self._file = open(filepath, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Not a snapshot file.")
+        try:
+            _, self.package_count, self.total_mileage = _read_header(self._map)
+            sections = _read_sections(self._map)
+            strings_offset, _ = sections[b"STRS"]
+            self._string_ends_offset = strings_offset + _STRING_COUNT.size
+            (string_count,) = _STRING_COUNT.unpack_from(self._map, strings_offset)
+            self._string_data_offset = self._string_ends_offset + string_count * 4
+            packages_offset, _ = sections[b"PKGS"]
+            self._records_offset = packages_offset + _HASH_TABLE_LENGTH.size
+            self._index_offset, _ = sections[b"PIDX"]
+            self._record_numbers_offset = self._index_offset + self.package_count * 8
+        except (KeyError, struct.error):
+            # a valid header, but a section is missing or points past the end of the file
+            self.close()
+            raise ValueError("Not a snapshot file.")
+        except ValueError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "SnapshotReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _string_at(self, index: int) -> Optional[str]:
+        if index == _NO_STRING:
+            return None
+        end = struct.unpack_from("<I", self._map, self._string_ends_offset + index * 4)[0]
+        start = (
+            struct.unpack_from("<I", self._map, self._string_ends_offset + (index - 1) * 4)[0]
+            if index > 0
+            else 0
+        )
+        offset = self._string_data_offset
+        return self._map[offset + start : offset + end].decode("utf-8")
+
+    def _record_number(self, package_id: int) -> Optional[int]:
+        """Binary search the sorted id index for a package id."""
+        low, high = 0, self.package_count
+        while low < high:
+            middle = (low + high) // 2
+            (middle_id,) = struct.unpack_from(
+                "<q", self._map, self._index_offset + middle * 8
+            )
+            if middle_id < package_id:
+                low = middle + 1
+            elif middle_id > package_id:
+                high = middle
+            else:
+                return struct.unpack_from(
+                    "<I", self._map, self._record_numbers_offset + middle * 4
+                )[0]
+        return None
+
+    def lookup(self, package_id: int) -> Optional[Package]:
+        """Read a single package by id, or return None if it is not in the snapshot."""
+        record_number = self._record_number(package_id)
+        if record_number is None:
+            return None
+        record = _PACKAGE.unpack_from(
+            self._map, self._records_offset + record_number * _PACKAGE.size
+        )
+        return _package_from_record(record, self._string_at)
+
+
+def read_package(filepath: str, package_id: int) -> Optional[Package]:
+    """Read a single package from a snapshot file without loading the others."""
+    with SnapshotReader(filepath) as reader:
+        return reader.lookup(package_id)
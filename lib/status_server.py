@@ -0,0 +1,332 @@
+"""Asynchronous HTTP/JSON server for package status queries.
+
+Holds a planned `DeliveryHashTable` in memory and answers status queries
+for dispatchers and the tracking page, without the one-user-at-a-time
+`input()` loop in `main.py`. Only the standard library is used.
+
+Routes (all times are `HH:MM`, defaulting to end of day):
+    GET  /packages/<id>?time=HH:MM          single package status
+    GET  /packages?ids=1,2,3&time=HH:MM     batched lookup
+    POST /packages/batch                    batched lookup, body {"ids": [...], "time": "HH:MM"}
+    GET  /statuses?time=HH:MM               every package status at the given time
+
+Responses for a given time are cached per time bucket,
+so repeated queries for the same minute are served from memory.
+"""
+
+import asyncio
+import datetime
+import json
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from lib.delivery_algorithm import (
+    delivery_status_at_time,
+    package_status_at_provided_time,
+)
+from lib.delivery_data_structure import DeliveryHashTable
+from models.package import Package
+
+
+END_OF_DAY = datetime.time(23, 59)
+MAX_REQUEST_BODY_BYTES = 1024 * 1024
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class StatusRequestError(Exception):
+    """Raised when a request cannot be answered, carrying the HTTP status code."""
+
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def _format_time(value: Optional[datetime.time]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def package_status_record(package: Package, current_time: datetime.time) -> dict:
+    """Build the JSON-serializable status of a package at the given time."""
+    status = delivery_status_at_time(package, current_time)
+    return {
+        "package_id": package.package_id,
+        "status": status.value,
+        "address": package.address,
+        "truck_id": package.truck_id,
+        "delivery_deadline": _format_time(package.delivery_deadline),
+        "time_loaded_onto_truck": _format_time(package.time_loaded_onto_truck),
+        "time_delivered": _format_time(package.time_delivered),
+        "special_notes": package.special_notes,
+        "summary": package_status_at_provided_time(package, current_time),
+    }
+
+
+class _TimeBucket:
+    """Cached responses for a single time bucket."""
+
+    def __init__(self, bucket_time: datetime.time) -> None:
+        self.bucket_time = bucket_time
+        self.records: dict[int, dict] = {}
+        self.all_statuses_body: Optional[bytes] = None
+
+
+class StatusServer:
+    """Serve package statuses from an in-memory `DeliveryHashTable`.
+
+    Query times are rounded down to the start of their `bucket_minutes` bucket,
+    and the most recent `max_cached_buckets` buckets are kept in an LRU cache.
+    """
+
+    def __init__(
+        self,
+        packages: DeliveryHashTable,
+        bucket_minutes: int = 1,
+        max_cached_buckets: int = 256,
+    ) -> None:
+        if bucket_minutes < 1:
+            raise ValueError("bucket_minutes must be a positive integer.")
+        if max_cached_buckets < 1:
+            raise ValueError("max_cached_buckets must be a positive integer.")
+        self.packages = packages
+        self.bucket_minutes = bucket_minutes
+        self.max_cached_buckets = max_cached_buckets
+        self._buckets: OrderedDict[int, _TimeBucket] = OrderedDict()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # --- caching -----------------------------------------------------------
+
+    def _bucket_for(self, current_time: datetime.time) -> _TimeBucket:
+        minutes = current_time.hour * 60 + current_time.minute
+        key = minutes - minutes % self.bucket_minutes
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+            return bucket
+        bucket = _TimeBucket(datetime.time(key // 60, key % 60))
+        self._buckets[key] = bucket
+        if len(self._buckets) > self.max_cached_buckets:
+            self._buckets.popitem(last=False)
+        return bucket
+
+    def clear_cache(self) -> None:
+        """Drop all cached responses, e.g. after the plan has been changed."""
+        self._buckets.clear()
+
+    # --- queries -----------------------------------------------------------
+
+    def package_status(self, package_id: int, current_time: datetime.time) -> dict:
+        """Return the status record of one package, raising 404 if it is unknown."""
+        bucket = self._bucket_for(current_time)
+        record = bucket.records.get(package_id)
+        if record is None:
+            package = self.packages.lookup(package_id) if package_id > 0 else None
+            if package is None:
+                raise StatusRequestError(404, f"Unknown package id: {package_id}")
+            record = package_status_record(package, bucket.bucket_time)
+            bucket.records[package_id] = record
+        return record
+
+    def batch_status(
+        self, package_ids: list[int], current_time: datetime.time
+    ) -> dict:
+        """Return the status records of many packages, listing unknown ids separately."""
+        statuses = []
+        missing = []
+        for package_id in package_ids:
+            try:
+                statuses.append(self.package_status(package_id, current_time))
+            except StatusRequestError:
+                missing.append(package_id)
+        return {"statuses": statuses, "missing": missing}
+
+    def all_statuses_body(self, current_time: datetime.time) -> bytes:
+        """Return the encoded response body listing every package status."""
+        bucket = self._bucket_for(current_time)
+        if bucket.all_statuses_body is None:
+            statuses = [
+                self.package_status(package_id, bucket.bucket_time)
+                for package_id in self.packages.package_ids
+            ]
+            bucket.all_statuses_body = json.dumps(
+                {"time": _format_time(bucket.bucket_time), "statuses": statuses}
+            ).encode()
+        return bucket.all_statuses_body
+
+    # --- HTTP handling -----------------------------------------------------
+
+    def dispatch(self, method: str, target: str, body: bytes) -> bytes:
+        """Route a request to its query and return the encoded JSON response body."""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        path = url.path.rstrip("/")
+
+        if method == "POST" and path == "/packages/batch":
+            try:
+                payload = json.loads(body or b"{}")
+                package_ids = [int(package_id) for package_id in payload["ids"]]
+            except (ValueError, KeyError, TypeError) as e:
+                raise StatusRequestError(400, "Body must be {\"ids\": [...]}") from e
+            time_str = payload.get("time")
+            if time_str is not None and not isinstance(time_str, str):
+                raise StatusRequestError(400, "time must be a string, as HH:MM")
+            current_time = _parse_query_time(time_str)
+            return json.dumps(self.batch_status(package_ids, current_time)).encode()
+
+        if method != "GET":
+            raise StatusRequestError(405, f"Unsupported method: {method}")
+
+        current_time = _parse_query_time(query.get("time", [None])[0])
+        if path == "/statuses":
+            return self.all_statuses_body(current_time)
+        if path == "/packages":
+            ids_param = ",".join(query.get("ids", []))
+            try:
+                package_ids = [int(i) for i in ids_param.split(",") if i]
+            except ValueError as e:
+                raise StatusRequestError(400, "ids must be integers") from e
+            return json.dumps(self.batch_status(package_ids, current_time)).encode()
+        if path.startswith("/packages/"):
+            try:
+                package_id = int(path.removeprefix("/packages/"))
+            except ValueError as e:
+                raise StatusRequestError(400, "Package id must be an integer") from e
+            return json.dumps(self.package_status(package_id, current_time)).encode()
+
+        raise StatusRequestError(404, f"Unknown path: {url.path}")
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve requests on one connection, honoring HTTP/1.1 keep-alive."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and (
+                    version == "HTTP/1.1"
+                    or headers.get("connection", "").lower() == "keep-alive"
+                )
+
+                status_code = 200
+                try:
+                    content_length = int(headers.get("content-length", 0))
+                    if content_length > MAX_REQUEST_BODY_BYTES:
+                        keep_alive = False
+                        raise StatusRequestError(413, "Request body too large")
+                    body = (
+                        await reader.readexactly(content_length)
+                        if content_length
+                        else b""
+                    )
+                    response_body = self.dispatch(method, target, body)
+                except StatusRequestError as e:
+                    status_code = e.status_code
+                    response_body = json.dumps({"error": e.message}).encode()
+                except ValueError:
+                    status_code = 400
+                    response_body = b'{"error": "Malformed request"}'
+                except Exception:
+                    # answer rather than drop the connection, which the client cannot tell apart
+                    # from a network failure
+                    status_code = 500
+                    keep_alive = False
+                    response_body = b'{"error": "Internal server error"}'
+
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status_code} {_REASONS[status_code]}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(response_body)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                        "\r\n"
+                    ).encode("latin-1")
+                    + response_body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """Start listening and return the `asyncio.Server`. Port 0 picks a free port."""
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        return self._server
+
+    @property
+    def port(self) -> Optional[int]:
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+
+def _parse_query_time(time_str: Optional[str]) -> datetime.time:
+    """Parse a `HH:MM` query time, defaulting to end of day."""
+    if time_str is None:
+        return END_OF_DAY
+    try:
+        return datetime.datetime.strptime(time_str, "%H:%M").time()
+    except ValueError as e:
+        raise StatusRequestError(400, f"Invalid time: {time_str}") from e
+
+
+async def serve(
+    packages: DeliveryHashTable, host: str = "127.0.0.1", port: int = 8080
+) -> None:
+    """Serve package statuses until cancelled."""
+    status_server = StatusServer(packages)
+    server = await status_server.start(host, port)
+    print(f"Serving package statuses on http://{host}:{status_server.port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    import argparse
+
+    from lib.csv_utils import csv_to_distances, csv_to_packages
+    from lib.delivery_algorithm import deliver_packages
+
+    parser = argparse.ArgumentParser(description="Serve WGUPS package statuses.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--packages", default="data/WGUPSPackageFile.csv")
+    parser.add_argument("--distances", default="data/WGUPSDistanceTable.csv")
+    args = parser.parse_args()
+
+    packages = csv_to_packages(args.packages)
+    distance_table = csv_to_distances(args.distances)
+    packages, _ = deliver_packages(packages, distance_table=distance_table)
+    try:
+        asyncio.run(serve(packages, host=args.host, port=args.port))
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Conversions between times of day and the numbers they are stored and planned as.
+
+Snapshots and the journal store times as whole microseconds since midnight,
+and the planners work in (fractional) minutes after midnight.
+"""
+
+import datetime
+import math
+from typing import Optional
+
+# stands for a missing time (such as a package not yet delivered) in microsecond columns
+NO_TIME = -1
+
+
+def time_to_micros(value: Optional[datetime.time]) -> int:
+    if value is None:
+        return NO_TIME
+    return (
+        (value.hour * 60 + value.minute) * 60 + value.second
+    ) * 1_000_000 + value.microsecond
+
+
+def micros_to_time(value: int) -> Optional[datetime.time]:
+    if value == NO_TIME:
+        return None
+    seconds, microsecond = divmod(value, 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return datetime.time(hour, minute, second, microsecond)
+
+
+def minutes_to_time(minutes: float) -> Optional[datetime.time]:
+    """The time `minutes` after midnight, to the microsecond, or None for infinity (never)."""
+    if minutes == math.inf:
+        return None
+    return micros_to_time(round(minutes * 60_000_000))
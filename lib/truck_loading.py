@@ -0,0 +1,400 @@
+"""Capacity-aware loading of packages onto trucks and trips.
+
+Filling each truck by repeatedly picking the nearest package
+ignores weight and tends to spread one truck's stops across the whole city.
+This module instead treats loading as a clustering / bin-packing problem:
+
+    1. Packages that must travel together (co-delivery groups) are merged into loading units.
+    2. Units are clustered around geographic medoids taken from the distance table
+       (a k-medoids style sweep, seeded with the farthest-first traversal from the hub),
+       respecting each load's package count and weight capacity, required trucks,
+       and earliest load times.
+    3. Each load is scheduled onto a truck as a trip, earliest deadline first.
+
+Compact clusters keep each truck's stops close together,
+which cuts both the mileage and the cost of routing each load.
+Loads only keep packages with incompatible time windows apart,
+so deadlines inside a load are only guaranteed when an exact on-time order exists.
+"""
+
+import datetime
+import math
+from dataclasses import dataclass, field
+from typing import Optional
+
+from lib.delivery_algorithm import correct_package_address, corrected_address
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.exact_route import exact_package_order, minutes_after_midnight
+from models.package import Package
+from models.truck import DEFAULT_HUB, TRUCK_SPEED_MPH, Truck
+
+MAX_PACKAGES_PER_TRUCK = 16
+START_OF_DAY = datetime.time(8, 0)
+MEDOID_ITERATIONS = 10
+
+
+def _add_hours(value: datetime.time, hours: float) -> datetime.time:
+    start = datetime.datetime.combine(datetime.date.today(), value)
+    return (start + datetime.timedelta(hours=hours)).time()
+
+
+@dataclass
+class LoadingUnit:
+    """Packages that must be loaded together: a co-delivery group or a single package."""
+
+    packages: list[Package]
+    release_time: datetime.time
+    deadline: datetime.time
+    required_truck_id: Optional[int]
+
+    @property
+    def weight(self) -> float:
+        return sum(package.package_weight for package in self.packages)
+
+    @property
+    def anchor(self) -> str:
+        """The address used to place the unit on the map, with any correction applied."""
+        return corrected_address(self.packages[0])
+
+
+@dataclass
+class TruckLoad:
+    """The packages carried by one truck on one trip.
+
+    `release_time` is when every package in the load is available to be loaded,
+    and `deadline` the earliest delivery deadline in the load.
+    `departure_time` and `estimated_return_time` are set when the load is scheduled.
+    """
+
+    medoid: str
+    units: list[LoadingUnit] = field(default_factory=list)
+    package_count: int = 0
+    weight: float = 0.0
+    release_time: datetime.time = START_OF_DAY
+    deadline: datetime.time = datetime.time.max
+    required_truck_id: Optional[int] = None
+    truck_id: Optional[int] = None
+    trip: int = 0
+    departure_time: Optional[datetime.time] = None
+    estimated_return_time: Optional[datetime.time] = None
+
+    @property
+    def packages(self) -> list[Package]:
+        return [package for unit in self.units for package in unit.packages]
+
+    @property
+    def addresses(self) -> list[str]:
+        return list(dict.fromkeys(corrected_address(package) for package in self.packages))
+
+    def fits(
+        self, unit: LoadingUnit, max_packages: int, max_weight: Optional[float]
+    ) -> bool:
+        """Whether the unit can join this load without breaking any constraint."""
+        if self.package_count + len(unit.packages) > max_packages:
+            return False
+        if max_weight is not None and self.weight + unit.weight > max_weight:
+            return False
+        if (
+            self.required_truck_id is not None
+            and unit.required_truck_id is not None
+            and self.required_truck_id != unit.required_truck_id
+        ):
+            return False
+        # never hold a package back past its deadline waiting for a later package,
+        # and never put a late-arriving package on a load that must leave before it arrives
+        if self.units and (
+            unit.deadline <= self.release_time or self.deadline <= unit.release_time
+        ):
+            return False
+        return True
+
+    def add(self, unit: LoadingUnit):
+        self.units.append(unit)
+        self.package_count += len(unit.packages)
+        self.weight += unit.weight
+        self.release_time = max(self.release_time, unit.release_time)
+        self.deadline = min(self.deadline, unit.deadline)
+        if unit.required_truck_id is not None:
+            self.required_truck_id = unit.required_truck_id
+
+
+def build_loading_units(packages: DeliveryHashTable) -> list[LoadingUnit]:
+    """Merge co-delivery groups into units, one unit per group or lone package.
+
+    Raises ValueError if a group requires two different trucks.
+    The packages are not changed: units are placed by their corrected addresses
+    (see `LoadingUnit.anchor`), and corrections are applied when the packages are loaded.
+    """
+    # union-find over package ids, joining every package with its co-delivery packages
+    parent: dict[int, int] = {package_id: package_id for package_id in packages.package_ids}
+
+    def find(package_id: int) -> int:
+        while parent[package_id] != package_id:
+            parent[package_id] = parent[parent[package_id]]
+            package_id = parent[package_id]
+        return package_id
+
+    for package_id in packages.package_ids:
+        for other_id in packages.lookup(package_id).co_delivery_package_ids:
+            if other_id in parent:
+                parent[find(other_id)] = find(package_id)
+
+    groups: dict[int, list[Package]] = {}
+    for package_id in packages.package_ids:
+        groups.setdefault(find(package_id), []).append(packages.lookup(package_id))
+
+    units = []
+    for group in groups.values():
+        required_trucks = {
+            package.required_truck_id
+            for package in group
+            if package.required_truck_id is not None
+        }
+        if len(required_trucks) > 1:
+            raise ValueError(
+                f"Packages {[p.package_id for p in group]} must be delivered together "
+                f"but require different trucks: {sorted(required_trucks)}"
+            )
+        units.append(
+            LoadingUnit(
+                packages=group,
+                release_time=max(
+                    package.earliest_load_time or START_OF_DAY for package in group
+                ),
+                deadline=min(package.delivery_deadline for package in group),
+                required_truck_id=required_trucks.pop() if required_trucks else None,
+            )
+        )
+    return units
+
+
+def _farthest_first_medoids(
+    units: list[LoadingUnit], distance_table, hub: str, count: int
+) -> list[str]:
+    """Pick `count` well-spread addresses, starting with the one farthest from the hub."""
+    anchors = list(dict.fromkeys(unit.anchor for unit in units))
+    nearest_medoid = {anchor: distance_table[hub][anchor] for anchor in anchors}
+    medoids: list[str] = []
+    while len(medoids) < min(count, len(anchors)):
+        medoid = max(anchors, key=nearest_medoid.__getitem__)
+        medoids.append(medoid)
+        for anchor in anchors:
+            nearest_medoid[anchor] = min(
+                nearest_medoid[anchor], distance_table[medoid][anchor]
+            )
+    return medoids
+
+
+def _assign_units(
+    units: list[LoadingUnit],
+    medoids: list[str],
+    distance_table,
+    max_packages: int,
+    max_weight: Optional[float],
+) -> list[TruckLoad]:
+    """Assign each unit to the nearest load with room, opening new loads if none fit.
+
+    Units with the biggest regret (the most to lose by not getting their nearest load)
+    and the tightest deadlines are placed first.
+    """
+    loads = [TruckLoad(medoid=medoid) for medoid in medoids]
+
+    def regret(unit: LoadingUnit) -> float:
+        distances = sorted(distance_table[unit.anchor][medoid] for medoid in medoids)
+        return distances[1] - distances[0] if len(distances) > 1 else 0.0
+
+    # constrained units (required trucks, release times, early deadlines) first
+    ordered_units = sorted(
+        units,
+        key=lambda unit: (
+            unit.required_truck_id is None,
+            unit.deadline,
+            -unit.release_time.hour * 60 - unit.release_time.minute,
+            -regret(unit),
+        ),
+    )
+    for unit in ordered_units:
+        # a unit that needs a particular truck prefers loads already bound to that truck,
+        # so required trucks don't end up tying every load to themselves
+        candidates = sorted(
+            loads,
+            key=lambda load: (
+                unit.required_truck_id is not None
+                and load.required_truck_id != unit.required_truck_id,
+                distance_table[unit.anchor][load.medoid],
+            ),
+        )
+        for load in candidates:
+            if load.fits(unit, max_packages, max_weight):
+                load.add(unit)
+                break
+        else:
+            load = TruckLoad(medoid=unit.anchor)
+            load.add(unit)
+            loads.append(load)
+    return [load for load in loads if load.units]
+
+
+def _update_medoid(load: TruckLoad, distance_table) -> str:
+    """Return the member address with the smallest total distance to the others."""
+    addresses = load.addresses
+    return min(
+        addresses,
+        key=lambda candidate: sum(
+            distance_table[candidate][address] for address in addresses
+        ),
+    )
+
+
+def estimate_trip_hours(addresses: list[str], distance_table, hub: str) -> float:
+    """Estimate a trip's duration with a nearest-neighbor tour from the hub and back."""
+    remaining = set(addresses)
+    location = hub
+    distance = 0.0
+    while remaining:
+        closest = min(remaining, key=distance_table[location].__getitem__)
+        distance += distance_table[location][closest]
+        remaining.remove(closest)
+        location = closest
+    distance += distance_table[location][hub]
+    return distance / TRUCK_SPEED_MPH
+
+
+def _schedule_loads(
+    loads: list[TruckLoad],
+    truck_ids: list[int],
+    distance_table,
+    hub: str,
+    start_time: datetime.time,
+):
+    """Schedule every load onto a truck, earliest deadline first.
+
+    Each load goes to the allowed truck that can leave soonest,
+    after its previous trip returns and once every package in the load has arrived.
+    """
+    available_at = {truck_id: start_time for truck_id in truck_ids}
+    trips = {truck_id: 0 for truck_id in truck_ids}
+    for load in sorted(loads, key=lambda load: (load.deadline, load.release_time)):
+        if load.required_truck_id is not None:
+            if load.required_truck_id not in available_at:
+                raise ValueError(
+                    f"Packages {[p.package_id for p in load.packages]} "
+                    f"require truck {load.required_truck_id}, which is not available"
+                )
+            candidates = [load.required_truck_id]
+        else:
+            candidates = truck_ids
+        truck_id = min(
+            candidates,
+            key=lambda truck_id: (max(available_at[truck_id], load.release_time), truck_id),
+        )
+        load.truck_id = truck_id
+        load.trip = trips[truck_id]
+        load.departure_time = max(available_at[truck_id], load.release_time)
+        load.estimated_return_time = _add_hours(
+            load.departure_time,
+            estimate_trip_hours(load.addresses, distance_table, hub),
+        )
+        available_at[truck_id] = load.estimated_return_time
+        trips[truck_id] += 1
+
+
+def assign_loads(
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    truck_ids: list[int],
+    max_packages: int = MAX_PACKAGES_PER_TRUCK,
+    max_weight: Optional[float] = None,
+    hub: str = DEFAULT_HUB,
+    start_time: datetime.time = START_OF_DAY,
+) -> list[TruckLoad]:
+    """Split the packages into truck loads and schedule each load as a truck trip.
+
+    Returns the loads ordered by scheduled departure time.
+    Raises ValueError if a single co-delivery group exceeds a truck's capacity
+    or requires a truck that is not in `truck_ids`.
+    """
+    units = build_loading_units(packages)
+    for unit in units:
+        if len(unit.packages) > max_packages or (
+            max_weight is not None and unit.weight > max_weight
+        ):
+            raise ValueError(
+                f"Packages {[p.package_id for p in unit.packages]} "
+                "do not fit on one truck"
+            )
+    if not units:
+        return []
+
+    total_weight = sum(unit.weight for unit in units)
+    load_count = max(
+        math.ceil(len(packages) / max_packages),
+        math.ceil(total_weight / max_weight) if max_weight else 1,
+    )
+
+    medoids = _farthest_first_medoids(units, distance_table, hub, load_count)
+    loads = _assign_units(units, medoids, distance_table, max_packages, max_weight)
+    for _ in range(MEDOID_ITERATIONS):
+        new_medoids = [_update_medoid(load, distance_table) for load in loads]
+        if new_medoids == medoids:
+            break
+        medoids = new_medoids
+        loads = _assign_units(units, medoids, distance_table, max_packages, max_weight)
+
+    _schedule_loads(loads, truck_ids, distance_table, hub, start_time)
+    return sorted(loads, key=lambda load: (load.departure_time, load.truck_id))
+
+
+def deliver_packages_in_loads(
+    packages: DeliveryHashTable,
+    distance_table: dict[str, dict[str, float]],
+    trucks: Optional[list[Truck]] = None,
+    max_packages: int = MAX_PACKAGES_PER_TRUCK,
+    max_weight: Optional[float] = None,
+    hub: str = DEFAULT_HUB,
+) -> tuple[DeliveryHashTable, float]:
+    """Deliver packages using capacity-aware loads.
+
+    Like `deliver_packages`, returns the delivered packages and the total mileage.
+    By default two trucks (two drivers) start at 8:00am;
+    each truck then runs its loads in order.
+    """
+    if trucks is None:
+        trucks = [
+            Truck(truck_id=1, distance_table=distance_table, hub=hub),
+            Truck(truck_id=2, distance_table=distance_table, hub=hub),
+        ]
+    trucks_by_id = {truck.truck_id: truck for truck in trucks}
+    loads = assign_loads(
+        packages,
+        distance_table,
+        truck_ids=list(trucks_by_id),
+        max_packages=max_packages,
+        max_weight=max_weight,
+        hub=hub,
+        start_time=min(truck.current_time for truck in trucks),
+    )
+    for load in loads:
+        truck = trucks_by_id[load.truck_id]
+        truck.current_time = max(truck.current_time, load.release_time)
+        # deliver in the exact shortest on-time order when the load has few enough stops,
+        # otherwise (or if no order meets every deadline) nearest-neighbor first
+        order = exact_package_order(
+            load.packages,
+            distance_table,
+            hub,
+            departure_time=minutes_after_midnight(truck.current_time),
+            deadline=lambda package: minutes_after_midnight(package.delivery_deadline),
+        )
+        for package in order or load.packages:
+            package = correct_package_address(
+                package, journal=truck.journal, package_table=truck.package_table
+            )
+            truck.load_package(package)
+        if order is not None:
+            truck.deliver_packages_in_load_order()
+        else:
+            truck.deliver_all_packages()
+
+    total_mileage = sum(truck.current_mileage for truck in trucks)
+    return packages, total_mileage
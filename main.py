@@ -43,33 +43,129 @@ Requirements:
         - [ ] Describe how each data structure identified in H1 is different from the data structure used in the solution.
 """
 
-from lib.delivery_algorithm import deliver_packages, package_status_at_provided_time
-from lib.delivery_data_structure import DeliveryHashTable
-from models import Package, Truck
-from datetime import datetime, timedelta, time
-from lib.csv_utils import csv_to_packages, csv_to_distances
+# Only lightweight standard library modules are imported up front.
+# The CSV parsers, hash table and delivery algorithm are imported where they are first needed,
+# so the prompt appears quickly, especially when opening a saved snapshot.
+import sys
+from datetime import datetime, time
 
+PACKAGE_FILE = "data/WGUPSPackageFile.csv"
+DISTANCE_FILE = "data/WGUPSDistanceTable.csv"
+
+
+class DeliverySession:
+    """Package data for the console UI, loaded only as far as each query needs it.
+
+    Opening a saved snapshot gives read-only access to a finished plan
+    without parsing the CSVs or running the delivery algorithm.
+    Otherwise only the package file is parsed up front (so the prompt can show the valid ids);
+    the distance table and the delivery algorithm wait until the first status query.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str | None = None,
+        package_file: str = PACKAGE_FILE,
+        distance_file: str = DISTANCE_FILE,
+    ) -> None:
+        self.read_only = snapshot_path is not None
+        self.snapshot_path = snapshot_path
+        self._packages = None
+        self.trucks = []
+        self._planned = False
+        self._total_mileage = 0.0
+
+        if snapshot_path is not None:
+            from lib.snapshot import read_state_header
+
+            # only the header is read now; the packages are loaded on the first query
+            self._package_count, self._total_mileage = read_state_header(snapshot_path)
+        else:
+            from lib.csv_utils import LazyDistanceTable, csv_to_packages
+
+            # gather package data from CSV into hash table
+            self._packages = csv_to_packages(package_file)
+            self._package_count = len(self._packages)
+            # the distance table is only read from its CSV once the algorithm needs it
+            self.distance_table = LazyDistanceTable(distance_file)
+
+    def __len__(self) -> int:
+        return self._package_count
+
+    @property
+    def packages(self):
+        """The packages after delivery, loading or planning them on first use."""
+        if self._planned:
+            return self._packages
+
+        if self.snapshot_path is not None:
+            from lib.snapshot import load_state
+
+            self._packages, self.trucks = load_state(self.snapshot_path)
+        else:
+            from lib.delivery_algorithm import default_trucks, deliver_packages
+
+            # this passes the packages DeliveryHashTable through the delivery algorithm,
+            # and returns them with their delivery times, statuses,
+            # and the total mileage driven by the delivery trucks
+            self.trucks = default_trucks(self.distance_table)
+            self._packages, self._total_mileage = deliver_packages(
+                self._packages, distance_table=self.distance_table, trucks=self.trucks
+            )
+        self._planned = True
+        return self._packages
+
+    @property
+    def total_mileage(self) -> float:
+        _ = self.packages
+        return self._total_mileage
+
+    def save_snapshot(self, filepath: str):
+        """Save the finished plan so it can later be opened with `--snapshot`."""
+        from lib.snapshot import save_state
+
+        save_state(filepath, self.packages, self.trucks)
 
-def main():
-    print("Welcome to the WGUPS delivery system!")
-    print("Loading package information...")
 
-    # gather package data from CSV into hash table
-    packages: DeliveryHashTable = csv_to_packages("data/WGUPSPackageFile.csv")
+def parse_args(argv: list[str]):
+    import argparse
 
-    # gather distance table into a two-dimensional dict for easy distance lookup
-    distance_table: dict[str, dict[str, float]] = csv_to_distances(
-        "data/WGUPSDistanceTable.csv"
+    parser = argparse.ArgumentParser(description="WGUPS package delivery status.")
+    parser.add_argument(
+        "--snapshot",
+        help="open a saved plan snapshot for read-only status queries",
     )
+    parser.add_argument(
+        "--save-snapshot",
+        help="run the delivery algorithm, save the plan to this file and exit",
+    )
+    parser.add_argument("--packages", default=PACKAGE_FILE)
+    parser.add_argument("--distances", default=DISTANCE_FILE)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    # argparse is only imported when options were actually passed
+    args = parse_args(argv) if argv else None
 
-    # deliver the packages
-    # this passes the packages DeliveryHashTable through the delivery algorithm,
-    # and returns them with their delivery times, statuses,
-    # and the total mileage driven by the delivery trucks
-    packages, total_mileage = deliver_packages(packages, distance_table=distance_table)
+    print("Welcome to the WGUPS delivery system!")
+    print("Loading package information...")
+    if args is None:
+        session = DeliverySession()
+    else:
+        session = DeliverySession(
+            snapshot_path=args.snapshot,
+            package_file=args.packages,
+            distance_file=args.distances,
+        )
+        if args.save_snapshot:
+            session.save_snapshot(args.save_snapshot)
+            print(f"Saved plan snapshot to {args.save_snapshot}")
+            return
 
     # Load Console-based UI
-    print("Package info loaded!")
+    print("Package info loaded!" + (" (read-only snapshot)" if session.read_only else ""))
     print("Press 'q' to quit at any time.")
     try:
         _input = ""
@@ -77,9 +173,10 @@ def main():
 
             # Get user's desired package
             _input = input(
-                f"Please enter a package id (1 - {len(packages)}) to view its status,\n"
+                f"Please enter a package id (1 - {len(session)}) to view its status,\n"
                 "-1 to print all package statuses at a given time,\n"
-                "or -2 to view all package statuses after delivery, along with total mileage\n"
+                "-2 to view all package statuses after delivery, along with total mileage,\n"
+                "or -3 to view each truck's position and the total mileage at a given time\n"
                 "\nEnter q to quit\n>> "
             )
             try:
@@ -88,6 +185,10 @@ def main():
                 # get the desired time user would like to see package status
                 current_time = ask_for_current_time() if package_id != -2 else time(23, 59)
 
+                from lib.delivery_algorithm import package_status_at_provided_time
+
+                packages = session.packages
+
                 # user selects valid ID, so print its status
                 if 1 <= package_id <= len(packages):
                     selected_package = packages.lookup(package_id)
@@ -99,26 +200,32 @@ def main():
                     )
 
                 # User wants to see all package statuses
+                # (rendered as one aligned table, in package id order)
                 elif -1 == package_id:
-                    for package_id in packages.package_ids:
-                        p = packages.lookup(package_id)
-                        print(
-                            package_status_at_provided_time(
-                                selected_package=p,
-                                current_time=current_time,
-                            )
-                        )
+                    print_status_table(packages, current_time)
                 # User wants to see all statuses and total mileage after delivery
                 elif -2 == package_id:
-                    for package_id in packages.package_ids:
-                        p = packages.lookup(package_id)
+                    print_status_table(packages, current_time)
+                    print(f"Total mileage for all trucks: {session.total_mileage}")
+                # User wants to see truck positions and mileage at a given time
+                elif -3 == package_id:
+                    from lib.delivery_algorithm import fleet_state_at
+
+                    states = fleet_state_at(session.trucks, current_time)
+                    for state in states:
+                        location = (
+                            f"driving from {state.location} to {state.destination}"
+                            if state.destination is not None
+                            else f"at {state.location}"
+                        )
                         print(
-                            package_status_at_provided_time(
-                                selected_package=p,
-                                current_time=current_time,
-                            )
+                            f"Truck {state.truck_id} - {location} "
+                            f"with {state.load} packages, {state.mileage:.1f} miles driven"
                         )
-                    print(f"Total mileage for all trucks: {total_mileage}")
+                    total_mileage = sum(state.mileage for state in states)
+                    print(
+                        f"Total mileage for all trucks at {current_time}: {total_mileage:.1f}"
+                    )
                 else:
                     print("Invalid option selected.")
 
@@ -133,6 +240,18 @@ def main():
     print("Goodbye!")
 
 
+def print_status_table(packages, current_time: time):
+    """Print the status of every package at the given time as an aligned table."""
+    from lib.report_writer import ReportFormat, write_status_report
+
+    write_status_report(
+        (packages.lookup(package_id) for package_id in packages.package_ids),
+        current_time,
+        sys.stdout,
+        report_format=ReportFormat.TABLE,
+    )
+
+
 def ask_for_current_time():
     """Ask user to input the time they would like to see package statuses for."""
     try:
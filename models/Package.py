@@ -39,6 +39,17 @@ class Package:
         ):
             return int(self.special_notes[-1])
 
+    @property
+    def co_delivery_package_ids(self) -> tuple[int, ...]:
+        """Return the ids of the packages that must be delivered with this one."""
+        if (
+            self.special_notes is not None
+            and "Must be delivered with" in self.special_notes
+        ):
+            ids = self.special_notes.split("with")[1]
+            return tuple(int(package_id) for package_id in ids.split(","))
+        return ()
+
     @property
     def earliest_load_time(self) -> Optional[datetime.time]:
         """Return the earliest time the package can be loaded onto a truck.
@@ -1,11 +1,57 @@
+import bisect
 import datetime
-from typing import Optional
+from typing import TYPE_CHECKING, Iterator, Optional
 from models.package import Package, DeliveryStatus
 from dataclasses import dataclass, field
 
+if TYPE_CHECKING:
+    from lib.delivery_data_structure import ConcurrentDeliveryHashTable
+    from lib.journal import DeliveryJournal
+    from lib.plan_state import PlanState
 
 TRUCK_SPEED_MPH: float = 18.0
 
+# the name of the depot in the distance table, unless a truck is given another hub
+DEFAULT_HUB: str = "HUB"
+
+
+def _seconds(value: datetime.time) -> float:
+    return value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+
+
+@dataclass
+class Leg:
+    """One drive between two locations, as recorded in a truck's leg log.
+
+    `load` is the number of packages on board while driving,
+    and `load_on_arrival` the number left after delivering at `to_location`.
+    Mileages are the truck's cumulative mileage at the start and end of the leg.
+    """
+
+    departure_time: datetime.time
+    arrival_time: datetime.time
+    from_location: str
+    to_location: str
+    start_mileage: float
+    end_mileage: float
+    load: int
+    load_on_arrival: int
+
+
+@dataclass
+class TruckState:
+    """Where a truck is at a point in time, reconstructed from its leg log.
+
+    `destination` is only set while the truck is driving between locations,
+    in which case `location` is where it departed from.
+    """
+
+    truck_id: int
+    location: str
+    load: int
+    mileage: float
+    destination: Optional[str] = None
+
 
 @dataclass
 class Truck:
@@ -14,11 +60,33 @@ class Truck:
     packages_to_deliver: list[Package] = field(default_factory=list)
     delivered_packages: list[Package] = field(default_factory=list)
     current_package: Optional[Package] = None
-    current_location: str = "HUB"
+    # defaults to the truck's hub
+    current_location: Optional[str] = None
     current_time: datetime.time = datetime.time(8, 0)
     active: bool = False
     current_mileage: float = 0.0
     total_trips: int = 0
+    legs: list[Leg] = field(default_factory=list)
+    hub: str = DEFAULT_HUB
+    speed_mph: float = TRUCK_SPEED_MPH
+    # when set, loads and deliveries are recorded here instead of on the packages
+    plan_state: Optional["PlanState"] = None
+    # when set, loads and deliveries are also recorded in this journal
+    journal: Optional["DeliveryJournal"] = None
+    # when set, loads and deliveries replace the packages in this table with updated copies
+    # (see `ConcurrentDeliveryHashTable.update`) instead of changing them in place
+    package_table: Optional["ConcurrentDeliveryHashTable"] = None
+
+    def __post_init__(self):
+        if self.current_location is None:
+            self.current_location = self.hub
+
+    def _update_in_table(self, package: Package, **changes) -> Package:
+        """Replace the package in `package_table` with an updated copy, and return the copy."""
+        updated = self.package_table.update(package.package_id, **changes)
+        if updated is None:
+            raise KeyError(f"Package {package.package_id} is not in the package table")
+        return updated
 
     def load_package(self, package: Package):
         """Load packages onto truck.
@@ -27,15 +95,37 @@ class Truck:
         which will be determined on the main algorithm.
         Marks the package as having been loaded onto this truck.
         """
-        package.time_loaded_onto_truck = self.current_time
-        package.truck_id = self.truck_id
-        package.delivery_status = DeliveryStatus.EN_ROUTE
+        if self.plan_state is not None:
+            self.plan_state.load(package, self.truck_id, self.current_time)
+        elif self.package_table is not None:
+            package = self._update_in_table(
+                package,
+                time_loaded_onto_truck=self.current_time,
+                truck_id=self.truck_id,
+                delivery_status=DeliveryStatus.EN_ROUTE,
+            )
+        else:
+            package.time_loaded_onto_truck = self.current_time
+            package.truck_id = self.truck_id
+            package.delivery_status = DeliveryStatus.EN_ROUTE
+        if self.journal is not None:
+            self.journal.record_load(package, self.truck_id, self.current_time)
         self.packages_to_deliver.append(package)
 
     def next_package(self) -> Optional[Package]:
         """Retrieve next package from queue, or return None if empty"""
         if len(self.packages_to_deliver) == 0:
             return None
+        # distance tables with a spatial index (`GeoDistanceTable`) find the closest address themselves
+        closest = getattr(self.distance_table, "closest", None)
+        if closest is not None:
+            address = closest(
+                self.current_location,
+                (package.address for package in self.packages_to_deliver),
+            )
+            return next(
+                package for package in self.packages_to_deliver if package.address == address
+            )
         min_distance = float("inf")
         selected_package = None
         for package in self.packages_to_deliver:
@@ -46,6 +136,39 @@ class Truck:
 
         return selected_package
 
+    def drive_to(self, location: str, load_on_arrival: int) -> Leg:
+        """Drive to a location, advancing the truck's clock and mileage.
+
+        The drive is appended to the truck's leg log and returned.
+        """
+        # get distance and time to the location
+        distance = self.distance_table[self.current_location][location]
+        elapsed_time = distance / self.speed_mph
+
+        current_datetime = datetime.datetime.combine(
+            datetime.date.today(), self.current_time
+        )
+        arrival_time = (
+            current_datetime + datetime.timedelta(hours=elapsed_time)
+        ).time()
+        leg = Leg(
+            departure_time=self.current_time,
+            arrival_time=arrival_time,
+            from_location=self.current_location,
+            to_location=location,
+            start_mileage=self.current_mileage,
+            end_mileage=self.current_mileage + distance,
+            load=len(self.packages_to_deliver),
+            load_on_arrival=load_on_arrival,
+        )
+        self.legs.append(leg)
+
+        # move truck through time and space to the location
+        self.current_location = location
+        self.current_mileage = leg.end_mileage
+        self.current_time = arrival_time
+        return leg
+
     def deliver_package(self, package: Package):
         """Deliver a package.
 
@@ -53,39 +176,96 @@ class Truck:
         calculate dilvery time to next address,
         and update truck and package fields to state after delivery.
         """
-        # get distance and time to delivery
-        distance = self.distance_table[self.current_location][package.address]
-        elapsed_time = distance / TRUCK_SPEED_MPH
-
         # move truck through time and space to delivery location
-        self.current_location = package.address
-        self.current_mileage += distance
-        current_datetime = datetime.datetime.combine(
-            datetime.date.today(), self.current_time
-        )
-        current_datetime = current_datetime + datetime.timedelta(hours=elapsed_time)
-        self.current_time = current_datetime.time()
+        self.drive_to(package.address, load_on_arrival=len(self.packages_to_deliver) - 1)
 
+        self.packages_to_deliver.remove(package)
         # set package status to delivered
-        package.delivery_status = DeliveryStatus.DELIVERED
-        package.time_delivered = self.current_time
+        if self.plan_state is not None:
+            self.plan_state.deliver(package, self.current_time)
+        elif self.package_table is not None:
+            package = self._update_in_table(
+                package, delivery_status=DeliveryStatus.DELIVERED, time_delivered=self.current_time
+            )
+        else:
+            package.delivery_status = DeliveryStatus.DELIVERED
+            package.time_delivered = self.current_time
+        if self.journal is not None:
+            self.journal.record_delivery(package, self.current_time)
         self.delivered_packages.append(package)
-        self.packages_to_deliver.remove(package)
 
-    def deliver_all_packages(self):
-        # one by one, dequeue and deliver packages
-        while (package := self.next_package()) is not None:
+    def drive_trip(self, in_load_order: bool = False) -> Iterator[tuple[Leg, Optional[Package]]]:
+        """Deliver the loaded packages and return to the hub, one stop at a time.
+
+        Yields each leg as it is driven, with the package delivered at its end
+        (None for the final leg back to the hub).
+        Packages are delivered nearest-first, or in the order they were loaded
+        if `in_load_order` is set. The truck only moves as the generator is advanced,
+        so several trucks' trips can be interleaved.
+        """
+        while self.packages_to_deliver:
+            if in_load_order:
+                package = self.packages_to_deliver[0]
+            else:
+                package = self.next_package()
             self.deliver_package(package=package)
+            yield self.legs[-1], package
 
         # return home
-        distance_home = self.distance_table[self.current_location]["HUB"]
-        elapsed_time = distance_home / TRUCK_SPEED_MPH
-        self.current_mileage += distance_home
-        self.current_location = "HUB"
-        current_datetime = datetime.datetime.combine(
-            datetime.date.today(), self.current_time
-        )
-        self.current_time = (
-            current_datetime + datetime.timedelta(hours=elapsed_time)
-        ).time()
+        leg = self.drive_to(self.hub, load_on_arrival=0)
         self.total_trips += 1
+        yield leg, None
+
+    def deliver_all_packages(self):
+        # one by one, dequeue and deliver packages, then return home
+        for _ in self.drive_trip():
+            pass
+
+    def deliver_packages_in_load_order(self):
+        """Deliver the loaded packages in the order they were loaded, then return to the hub.
+
+        Used when the delivery order was already planned,
+        instead of choosing the nearest package at each stop.
+        """
+        for _ in self.drive_trip(in_load_order=True):
+            pass
+
+    def state_at(self, current_time: datetime.time) -> TruckState:
+        """Reconstruct the truck's location, load and mileage at a given time.
+
+        Binary searches the leg log by departure time, so this takes O(log legs).
+        While driving, the mileage is interpolated along the current leg.
+        """
+        index = (
+            bisect.bisect_right(
+                self.legs, current_time, key=lambda leg: leg.departure_time
+            )
+            - 1
+        )
+        if index < 0:
+            # before the first departure, the truck is waiting at its starting point
+            location = self.legs[0].from_location if self.legs else self.current_location
+            mileage = self.legs[0].start_mileage if self.legs else self.current_mileage
+            return TruckState(self.truck_id, location, load=0, mileage=mileage)
+
+        leg = self.legs[index]
+        if current_time >= leg.arrival_time:
+            return TruckState(
+                self.truck_id,
+                leg.to_location,
+                load=leg.load_on_arrival,
+                mileage=leg.end_mileage,
+            )
+
+        elapsed = _seconds(current_time) - _seconds(leg.departure_time)
+        duration = _seconds(leg.arrival_time) - _seconds(leg.departure_time)
+        mileage = leg.start_mileage + (leg.end_mileage - leg.start_mileage) * (
+            elapsed / duration
+        )
+        return TruckState(
+            self.truck_id,
+            leg.from_location,
+            load=leg.load,
+            mileage=mileage,
+            destination=leg.to_location,
+        )
@@ -0,0 +1,34 @@
+"""Test configuration: the opt-in performance tier.
+
+Tests marked `performance` compare the time and memory of the core operations
+with the baselines in `performance_baselines.json`. They are slower and depend on
+the machine, so they only run when selected:
+    python -m pytest -m performance
+After an intended change in performance, rewrite the baselines with:
+    python -m pytest -m performance --update-performance-baselines
+"""
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-performance-baselines",
+        action="store_true",
+        help="Record the measured time and memory as the new performance baselines.",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "performance: time and memory budgets, run with `-m performance`"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if "performance" in (config.getoption("markexpr") or ""):
+        return
+    skip = pytest.mark.skip(reason="performance tier: run with `-m performance`")
+    for item in items:
+        if "performance" in item.keywords:
+            item.add_marker(skip)
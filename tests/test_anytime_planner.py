@@ -0,0 +1,125 @@
+import math
+import pytest
+import random
+from datetime import time
+from time import perf_counter
+from lib.anytime_planner import StopReason, plan_anytime
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.exact_route import EXACT_MAX_STOPS
+from lib.insertion_planner import deliver_routes, plan_routes
+from models.package import Package
+from models.truck import Truck
+
+START_TIMES = {1: time(8, 0), 2: time(9, 5)}
+
+
+@pytest.fixture(scope="module")
+def distance_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+def test_search_improves_on_the_first_plan(distance_table):
+    first_plan = plan_routes(
+        csv_to_packages("data/WGUPSPackageFile.csv"), distance_table, START_TIMES
+    )
+    packages = csv_to_packages("data/WGUPSPackageFile.csv")
+    reported = []
+    result = plan_anytime(
+        packages,
+        distance_table,
+        START_TIMES,
+        time_budget=None,
+        max_iterations=25,
+        seed=7,
+        on_progress=reported.append,
+    )
+
+    assert result.stop_reason == StopReason.MAX_ITERATIONS
+    assert result.iterations == 25
+    assert reported == result.history
+    assert result.history[0].mileage == pytest.approx(first_plan.total_mileage)
+    mileages = [progress.mileage for progress in result.history]
+    assert mileages == sorted(mileages, reverse=True)
+    assert result.mileage == pytest.approx(result.plan.total_mileage)
+    assert result.mileage <= first_plan.total_mileage
+    assert 0 < result.lower_bound <= result.mileage
+    assert result.gap == pytest.approx(1 - result.lower_bound / result.mileage)
+
+    # the improved plan still delivers every package once, on time
+    assert result.plan.late_package_ids == []
+    planned_ids = [package.package_id for route in result.plan for package in route.packages]
+    assert sorted(planned_ids) == list(range(1, 41))
+    trucks = [
+        Truck(truck_id=1, distance_table=distance_table),
+        Truck(truck_id=2, distance_table=distance_table, current_time=time(9, 5)),
+    ]
+    assert deliver_routes(result.plan, trucks) == pytest.approx(result.mileage)
+    assert all(package.time_delivered <= package.delivery_deadline for package in packages)
+
+
+def test_search_needs_a_stopping_rule(distance_table):
+    packages = csv_to_packages("data/WGUPSPackageFile.csv")
+    with pytest.raises(ValueError):
+        plan_anytime(packages, distance_table, START_TIMES, target_gap=0.0, time_budget=None)
+
+
+def test_search_stops_at_the_time_budget(distance_table):
+    packages = csv_to_packages("data/WGUPSPackageFile.csv")
+    started = perf_counter()
+    result = plan_anytime(packages, distance_table, START_TIMES, time_budget=0.2, seed=1)
+    assert result.stop_reason == StopReason.TIME_BUDGET
+    assert result.iterations > 0
+    # the last iteration may run past the budget, but not by much
+    assert perf_counter() - started < 1.0
+
+
+def test_exact_reordering_shares_the_time_budget():
+    # trips with as many stops as the exact solver takes: reordering them all
+    # takes far longer than the budget, so each may only use its share of it
+    rng = random.Random(3)
+    streets = [f"{i} Test St" for i in range(1, 6 * EXACT_MAX_STOPS + 1)]
+    locations = ["HUB"] + [f"{street} (84101)" for street in streets]
+    points = {location: (rng.uniform(0, 5), rng.uniform(0, 5)) for location in locations}
+    distance_table = {
+        a: {b: round(math.dist(points[a], points[b]), 1) for b in locations} for a in locations
+    }
+    packages = DeliveryHashTable(len(streets))
+    # ids from 100, clear of the manifest's address corrections
+    for package_id, street in enumerate(streets, start=100):
+        packages.insert(
+            package_id, Package(package_id, street, "City", "UT", "84101", 1.0, time(17, 0))
+        )
+
+    started = perf_counter()
+    result = plan_anytime(
+        packages,
+        distance_table,
+        {1: time(8, 0), 2: time(8, 0)},
+        time_budget=0.1,
+        max_packages=EXACT_MAX_STOPS,
+        exact_time_limit=None,
+    )
+    assert result.stop_reason in (StopReason.TIME_BUDGET, StopReason.TARGET_GAP)
+    assert perf_counter() - started < 0.4
+
+
+def test_search_stops_once_the_plan_is_within_the_target_gap():
+    A, B, C = "A St (84101)", "B St (84101)", "C St (84101)"
+    distance_table = {
+        "HUB": {"HUB": 0.0, A: 9.0, B: 9.0, C: 18.0},
+        A: {"HUB": 9.0, A: 0.0, B: 18.0, C: 9.0},
+        B: {"HUB": 9.0, A: 18.0, B: 0.0, C: 18.0},
+        C: {"HUB": 18.0, A: 9.0, B: 18.0, C: 0.0},
+    }
+    packages = DeliveryHashTable(3)
+    for package_id, street in enumerate(["A St", "B St", "C St"], start=1):
+        packages.insert(
+            package_id, Package(package_id, street, "City", "UT", "84101", 1.0, time(17, 0))
+        )
+    # the first plan already matches the lower bound, so no search is needed
+    result = plan_anytime(packages, distance_table, {1: time(8, 0)}, max_iterations=100)
+    assert result.stop_reason == StopReason.TARGET_GAP
+    assert result.iterations == 0
+    assert result.mileage == pytest.approx(45.0)
+    assert result.gap == pytest.approx(0.0)
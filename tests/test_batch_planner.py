@@ -0,0 +1,70 @@
+import json
+import os
+from lib import batch_planner
+from lib.batch_planner import PlanningJob, read_jobs, run_batch
+from lib.snapshot import load_state
+
+PACKAGE_FILE = "data/WGUPSPackageFile.csv"
+DISTANCE_FILE = "data/WGUPSDistanceTable.csv"
+
+
+def test_run_batch_with_custom_hub(tmp_path):
+    # the same depot, with its hub renamed in the distance table
+    renamed_hub_file = tmp_path / "distances.csv"
+    with open(DISTANCE_FILE, encoding="utf-8-sig") as distance_file:
+        renamed_hub_file.write_text(
+            distance_file.read().replace(",HUB,", ",Depot 2,", 1), encoding="utf-8"
+        )
+
+    jobs = [
+        PlanningJob("slc", PACKAGE_FILE, DISTANCE_FILE),
+        PlanningJob("slc-renamed", PACKAGE_FILE, str(renamed_hub_file), hub="Depot 2"),
+        PlanningJob("missing", str(tmp_path / "nope.csv"), DISTANCE_FILE),
+    ]
+    streamed = []
+    results = run_batch(jobs, tmp_path / "plans", max_workers=2, on_result=streamed.append)
+
+    assert streamed == results
+    by_name = {result.name: result for result in results}
+    assert by_name["slc"].error is None
+    assert by_name["slc"].package_count == 40
+    assert by_name["slc-renamed"].total_mileage == by_name["slc"].total_mileage
+    assert "FileNotFoundError" in by_name["missing"].error
+
+    _, trucks = load_state(by_name["slc-renamed"].snapshot_path)
+    assert {truck.hub for truck in trucks} == {"Depot 2"}
+    assert {truck.current_location for truck in trucks} == {"Depot 2"}
+
+    results_lines = (tmp_path / "plans" / "results.jsonl").read_text().splitlines()
+    assert sorted(json.loads(line)["name"] for line in results_lines) == sorted(by_name)
+
+
+def _crash(job, output_dir):
+    os._exit(1)
+
+
+def test_run_batch_survives_a_crashed_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_planner, "plan_job", _crash)
+    jobs = [
+        PlanningJob("a", PACKAGE_FILE, DISTANCE_FILE),
+        PlanningJob("b", PACKAGE_FILE, DISTANCE_FILE),
+    ]
+    results = run_batch(jobs, tmp_path / "plans", max_workers=1)
+
+    assert sorted(result.name for result in results) == ["a", "b"]
+    assert all("BrokenProcessPool" in result.error for result in results)
+    results_lines = (tmp_path / "plans" / "results.jsonl").read_text().splitlines()
+    assert len(results_lines) == 2
+
+
+def test_read_jobs(tmp_path):
+    jobs_file = tmp_path / "jobs.csv"
+    jobs_file.write_text(
+        "name,package_file,distance_file,hub\n"
+        f"a,{PACKAGE_FILE},{DISTANCE_FILE},\n"
+        f"b,{PACKAGE_FILE},{DISTANCE_FILE},Depot 2\n"
+    )
+    assert read_jobs(jobs_file) == [
+        PlanningJob("a", PACKAGE_FILE, DISTANCE_FILE, "HUB"),
+        PlanningJob("b", PACKAGE_FILE, DISTANCE_FILE, "Depot 2"),
+    ]
@@ -0,0 +1,48 @@
+import pytest
+from lib.bulk_csv import csv_to_distances_bulk, csv_to_package_columns, csv_to_packages_bulk
+from lib.csv_utils import csv_to_distances, csv_to_packages
+
+PACKAGE_FILE = "data/WGUPSPackageFile.csv"
+DISTANCE_FILE = "data/WGUPSDistanceTable.csv"
+
+
+def sorted_packages(packages):
+    return sorted(packages, key=lambda package: package.package_id)
+
+
+def test_bulk_packages_match_csv_to_packages():
+    expected = csv_to_packages(PACKAGE_FILE)
+    packages = csv_to_packages_bulk(PACKAGE_FILE)
+    assert sorted_packages(packages) == sorted_packages(expected)
+    assert packages.lookup(3) == expected.lookup(3)
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+@pytest.mark.parametrize("chunk_size", [1, 50, 1 << 20])
+def test_chunks_and_byte_ranges_keep_every_row_once(workers, chunk_size):
+    columns = csv_to_package_columns(PACKAGE_FILE, workers=workers, chunk_size=chunk_size)
+    assert list(columns.package_ids) == list(range(1, 41))
+    assert list(columns.packages()) == sorted_packages(csv_to_packages(PACKAGE_FILE))
+
+
+def test_bad_rows_are_skipped(tmp_path, capsys):
+    with open(PACKAGE_FILE) as package_file:
+        lines = package_file.read().splitlines()
+    lines.insert(3, "x,1 Bad Row,Salt Lake City,UT,84101,EOD,1,,,,,,")
+    lines.insert(5, "")
+    package_path = tmp_path / "packages.csv"
+    # Windows line endings, as the file may have been saved with
+    package_path.write_bytes("\r\n".join(lines).encode())
+
+    columns = csv_to_package_columns(str(package_path))
+    assert list(columns.package_ids) == list(range(1, 41))
+    assert "Error" in capsys.readouterr().out
+
+
+def test_bulk_distances_match_csv_to_distances(tmp_path):
+    assert csv_to_distances_bulk(DISTANCE_FILE) == csv_to_distances(DISTANCE_FILE)
+
+    # a full (square) matrix is read the same way as the original
+    full_path = tmp_path / "full.csv"
+    full_path.write_text("A,a,0,1,2\nB,b,1,0,3\nC,c,2,3,0\n")
+    assert csv_to_distances_bulk(str(full_path)) == csv_to_distances(str(full_path))
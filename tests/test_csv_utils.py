@@ -25,3 +25,11 @@ def test_distance_csv_load():
     filepath = "data\WGUPSDistanceTable.csv"
     distance_map = csv_utils.csv_to_distances(filepath)
     assert distance_map["6351 South 900 East (84121)"]["HUB"] == 3.6
+
+
+def test_lazy_distance_table_loads_on_first_use():
+    distance_table = csv_utils.LazyDistanceTable("data/WGUPSDistanceTable.csv")
+    assert not distance_table.is_loaded
+    assert distance_table["6351 South 900 East (84121)"]["HUB"] == 3.6
+    assert distance_table.is_loaded
+    assert "HUB" in distance_table
@@ -2,7 +2,12 @@ from typing import Optional
 import pytest
 from datetime import datetime, time
 from lib.csv_utils import csv_to_distances, csv_to_packages
-from lib.delivery_algorithm import package_status_at_provided_time, deliver_packages
+from lib.delivery_algorithm import (
+    deliver_packages,
+    fleet_state_at,
+    package_status_at_provided_time,
+    total_mileage_at,
+)
 from lib.delivery_data_structure import DeliveryHashTable
 from models.package import Package, DeliveryStatus
 from models.truck import Truck
@@ -79,3 +84,38 @@ def test_delivery_algorithm():
 
         assert len(late_packages) == 0, late_packages
         assert total_mileage < 140.0
+
+
+def test_fleet_state_at():
+    a, b = "A St (84101)", "B St (84101)"
+    distance_table = {
+        "HUB": {"HUB": 0.0, a: 9.0, b: 18.0},
+        a: {"HUB": 9.0, a: 0.0, b: 9.0},
+        b: {"HUB": 18.0, a: 9.0, b: 0.0},
+    }
+    truck = Truck(truck_id=1, distance_table=distance_table)
+    for package_id, street in [(1, "A St"), (2, "B St")]:
+        truck.load_package(
+            Package(package_id, street, "City", "UT", "84101", 1.0, time(12, 0))
+        )
+    truck.deliver_all_packages()
+
+    # 8:00 depart, A at 8:30, B at 9:00, back at the hub at 10:00
+    [before] = fleet_state_at([truck], time(7, 0))
+    assert (before.location, before.load, before.mileage) == ("HUB", 0, 0.0)
+
+    [driving] = fleet_state_at([truck], time(8, 15))
+    assert (driving.location, driving.destination) == ("HUB", a)
+    assert driving.load == 2
+    assert driving.mileage == pytest.approx(4.5)
+
+    # deliveries are instantaneous, so at 9:00 the truck is already leaving B
+    [leaving] = fleet_state_at([truck], time(9, 0))
+    assert (leaving.location, leaving.destination) == (b, "HUB")
+    assert (leaving.load, leaving.mileage) == (0, 18.0)
+
+    [returned] = fleet_state_at([truck], time(10, 30))
+    assert (returned.location, returned.load, returned.destination) == ("HUB", 0, None)
+
+    assert total_mileage_at([truck], time(9, 30)) == pytest.approx(27.0)
+    assert total_mileage_at([truck], time(23, 0)) == pytest.approx(36.0)
@@ -1,6 +1,16 @@
 from lib import delivery_data_structure
+import os
+import subprocess
+import sys
+import threading
 import pytest
-from lib.delivery_data_structure import DeliveryHashTable, DeliveryStatus, Package
+from lib.delivery_data_structure import (
+    ConcurrentDeliveryHashTable,
+    DeliveryHashTable,
+    DeliveryStatus,
+    KeyedDeliveryHashTable,
+    Package,
+)
 
 
 @pytest.mark.parametrize("length", [1, 2, 3])
@@ -308,3 +318,224 @@ def test_table_remove_nonexistent_package_id(length: int):
     assert len(ll) == 1
     assert ll.head.package == test_package
     assert ll.tail.package == test_package
+
+
+@pytest.mark.parametrize("length", [1, 3, 10])
+def test_table_iterates_all_packages(length: int):
+    hash_table = DeliveryHashTable(length)
+    for package_id in range(1, 8):
+        hash_table.insert(
+            package_id=package_id,
+            package=Package(
+                package_id=package_id,
+                delivery_address="123 thing st",
+                delivery_city="Coolsville",
+                delivery_state="CA",
+                delivery_zip_code="90210",
+                package_weight=7.0,
+                delivery_deadline="10am",
+            ),
+        )
+
+    assert sorted(package.package_id for package in hash_table) == list(range(1, 8))
+
+
+def make_package(package_id: int) -> Package:
+    return Package(
+        package_id=package_id,
+        delivery_address="123 thing st",
+        delivery_city="Coolsville",
+        delivery_state="CA",
+        delivery_zip_code="90210",
+        package_weight=7.0,
+        delivery_deadline="10am",
+    )
+
+
+@pytest.mark.parametrize("table_type", [DeliveryHashTable, ConcurrentDeliveryHashTable])
+def test_table_remove_tail_and_middle_of_bucket(table_type):
+    hash_table = table_type(1)
+    for package_id in range(1, 5):
+        hash_table.insert(package_id=package_id, package=make_package(package_id))
+
+    assert hash_table.remove(4).package_id == 4
+    assert hash_table.remove(2).package_id == 2
+    linked_list = hash_table.table[0]
+    assert linked_list.tail.package.package_id == 3
+    assert linked_list.tail.previous.package.package_id == 1
+    assert sorted(package.package_id for package in hash_table) == [1, 3]
+    assert hash_table.package_ids == [1, 3]
+
+
+def test_concurrent_table_update_replaces_the_package():
+    hash_table = ConcurrentDeliveryHashTable(10, stripes=4)
+    hash_table.insert(package_id=1, package=make_package(1))
+    before = hash_table.lookup(1)
+
+    after = hash_table.update(1, delivery_status=DeliveryStatus.EN_ROUTE, truck_id=2)
+    assert hash_table.lookup(1) is after
+    assert (after.delivery_status, after.truck_id) == (DeliveryStatus.EN_ROUTE, 2)
+    # a reader holding the old package still sees it unchanged
+    assert (before.delivery_status, before.truck_id) == (DeliveryStatus.AT_HUB, None)
+    assert hash_table.update(99, truck_id=1) is None
+
+    with pytest.raises(ValueError):
+        ConcurrentDeliveryHashTable(10, stripes=0)
+
+
+# rounds of updates each writer thread makes
+ROUNDS = 50
+
+
+def test_concurrent_table_under_contention():
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        hash_table = ConcurrentDeliveryHashTable(8, stripes=4)
+        stable_ids = range(1, 41)
+        churned_ids = range(41, 81)
+        all_ids = range(1, 81)
+        for package_id in all_ids:
+            hash_table.insert(package_id=package_id, package=make_package(package_id))
+
+        stop = threading.Event()
+        errors = []
+
+        def read():
+            while not stop.is_set():
+                for package_id in all_ids:
+                    package = hash_table.lookup(package_id)
+                    if package is None:
+                        errors.append(f"package {package_id} went missing")
+                    # status and truck are always updated together
+                    elif (package.delivery_status == DeliveryStatus.AT_HUB) != (
+                        package.truck_id is None
+                    ):
+                        errors.append(f"package {package_id} was seen half-updated")
+
+        def update_statuses(rounds: int):
+            for round_number in range(rounds):
+                for package_id in stable_ids:
+                    if round_number % 2:
+                        hash_table.update(
+                            package_id, delivery_status=DeliveryStatus.AT_HUB, truck_id=None
+                        )
+                    else:
+                        hash_table.update(
+                            package_id, delivery_status=DeliveryStatus.EN_ROUTE, truck_id=1
+                        )
+
+        def churn(package_ids, rounds: int):
+            # a new copy is added before the old one is removed,
+            # so every package is in the table at every moment
+            for _ in range(rounds):
+                for package_id in package_ids:
+                    hash_table.insert(package_id=package_id, package=make_package(package_id))
+                    hash_table.remove(package_id)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        writers = [threading.Thread(target=update_statuses, args=(ROUNDS,)) for _ in range(2)]
+        # each churning thread replaces its own half of the churned packages
+        writers += [
+            threading.Thread(target=churn, args=(churned_ids[half::2], ROUNDS)) for half in (0, 1)
+        ]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
+    assert sorted(hash_table.package_ids) == list(range(1, 81))
+    assert sorted(package.package_id for package in hash_table) == list(range(1, 81))
+    assert sum(len(linked_list) for linked_list in hash_table.table) == 80
+
+
+def test_bucket_stats():
+    hash_table = DeliveryHashTable(4)
+    for package_id in range(1, 7):
+        hash_table.insert(package_id=package_id, package=make_package(package_id))
+
+    stats = hash_table.bucket_stats()
+    # ids 1 to 6 modulo 4 fill the buckets with 1, 2, 2 and 1 packages
+    assert (stats.buckets, stats.entries, stats.empty_buckets, stats.max_chain) == (4, 6, 0, 2)
+    assert stats.mean_chain == pytest.approx(1.5)
+    assert stats.mean_probes_hit == pytest.approx(8 / 6)
+    assert stats.mean_probes_miss == pytest.approx(1.5)
+    assert stats.load_factor == pytest.approx(1.5)
+
+
+@pytest.mark.parametrize(
+    "keys",
+    [
+        ["1Z999AA10123456784", "1Z999AA10123456785", "TBA301234567000"],
+        [("SLC", 1), ("SLC", 2), ("PVU", 1)],
+        [3, 13, 1027],
+    ],
+)
+def test_keyed_table_insert_lookup_remove(keys):
+    hash_table = KeyedDeliveryHashTable(10)
+    # rounded up to a power of two
+    assert len(hash_table.table) == 16
+    for package_id, key in enumerate(keys, start=1):
+        hash_table.insert(package_id=key, package=make_package(package_id))
+
+    assert hash_table.package_ids == keys
+    assert [hash_table.lookup(key).package_id for key in keys] == [1, 2, 3]
+    assert hash_table.lookup("missing") is None
+    assert hash_table.remove(keys[1]).package_id == 2
+    assert hash_table.lookup(keys[1]) is None
+    assert hash_table.remove(keys[1]) is None
+    assert sorted(package.package_id for package in hash_table) == [1, 3]
+
+    with pytest.raises(ValueError):
+        KeyedDeliveryHashTable(0)
+
+
+def test_keyed_table_grows_and_spreads_patterned_keys():
+    # ids that are all multiples of the table size land in a single bucket when taken modulo
+    strided_ids = range(1024, 1024 * 1025, 1024)
+    modulo_table = DeliveryHashTable(1024)
+    keyed_table = KeyedDeliveryHashTable(4)
+    for package_id in strided_ids:
+        modulo_table.insert(package_id=package_id, package=make_package(package_id))
+        keyed_table.insert(package_id, make_package(package_id))
+
+    assert modulo_table.bucket_stats().max_chain == 1024
+    stats = keyed_table.bucket_stats()
+    assert stats.buckets == 1024
+    assert stats.load_factor <= 1
+    assert stats.max_chain <= 8
+    assert stats.mean_probes_hit < 2
+    assert all(
+        keyed_table.lookup(package_id).package_id == package_id for package_id in strided_ids
+    )
+
+
+def test_keyed_table_seed_changes_the_layout():
+    keys = [f"TRK{n:06d}" for n in range(64)]
+    first, second = KeyedDeliveryHashTable(64, seed=1), KeyedDeliveryHashTable(64, seed=2)
+    assert [first.hash_index(key) for key in keys] != [second.hash_index(key) for key in keys]
+
+
+def test_keyed_table_layout_is_the_same_in_every_process():
+    keys = ["1Z999AA10123456784", b"TBA301234567000", ("SLC", "route 1", 3), 1027]
+    script = (
+        "from lib.delivery_data_structure import KeyedDeliveryHashTable;"
+        f"print([KeyedDeliveryHashTable(64, seed=7).hash_index(key) for key in {keys!r}])"
+    )
+    layouts = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": hash_seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for hash_seed in ["1", "2"]
+    }
+    assert layouts == {f"{[KeyedDeliveryHashTable(64, seed=7).hash_index(key) for key in keys]}\n"}
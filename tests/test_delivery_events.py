@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from itertools import islice
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import default_trucks, deliver_packages
+from lib.delivery_events import EventFanOut, EventType, stream_deliveries
+from models.package import DeliveryStatus
+
+
+@pytest.fixture(scope="module")
+def distance_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+@pytest.fixture
+def packages():
+    return csv_to_packages("data/WGUPSPackageFile.csv")
+
+
+def test_events_match_deliver_packages(packages, distance_table):
+    trucks = default_trucks(distance_table)
+    events = list(stream_deliveries(packages, distance_table, trucks=trucks))
+
+    times = [event.time for event in events]
+    assert times == sorted(times)
+    counts = {event_type: 0 for event_type in EventType}
+    for event in events:
+        counts[event.event_type] += 1
+    assert counts[EventType.PACKAGE_LOADED] == counts[EventType.PACKAGE_DELIVERED] == 40
+    assert counts[EventType.TRUCK_DEPARTED] == counts[EventType.TRUCK_RETURNED]
+    assert counts[EventType.TRUCK_RETURNED] == sum(truck.total_trips for truck in trucks)
+
+    _, mileage = deliver_packages(
+        csv_to_packages("data/WGUPSPackageFile.csv"), distance_table=distance_table
+    )
+    assert sum(truck.current_mileage for truck in trucks) == pytest.approx(mileage)
+    assert {package.delivery_status for package in packages} == {DeliveryStatus.DELIVERED}
+
+    delivered = {
+        event.package_id: event.time
+        for event in events
+        if event.event_type == EventType.PACKAGE_DELIVERED
+    }
+    assert all(package.time_delivered == delivered[package.package_id] for package in packages)
+
+
+def test_events_are_generated_lazily(packages, distance_table):
+    trucks = default_trucks(distance_table)
+    events = stream_deliveries(packages, distance_table, trucks=trucks)
+    first = list(islice(events, 20))
+
+    assert first[0].event_type == EventType.PACKAGE_LOADED
+    # the day has only just started: most packages are still waiting
+    statuses = [package.delivery_status for package in packages]
+    assert statuses.count(DeliveryStatus.AT_HUB) > 0
+    assert statuses.count(DeliveryStatus.DELIVERED) < 20
+
+
+def test_fan_out_delivers_every_event_to_every_subscriber(packages, distance_table):
+    async def run():
+        fan_out = EventFanOut(maxsize=2)
+        fast, slow, leaving = fan_out.subscribe(), fan_out.subscribe(), fan_out.subscribe()
+        received = {"fast": [], "slow": [], "leaving": []}
+        generated = []
+        lead = []
+
+        def tracked(events):
+            for event in events:
+                generated.append(event)
+                lead.append(len(generated) - len(received["slow"]))
+                yield event
+
+        async def consume(name, subscription, delay=0.0, stop_after=None):
+            async with subscription:
+                async for event in subscription:
+                    received[name].append(event)
+                    if stop_after is not None and len(received[name]) == stop_after:
+                        subscription.close()
+                    await asyncio.sleep(delay)
+
+        published, *_ = await asyncio.gather(
+            fan_out.publish(tracked(stream_deliveries(packages, distance_table))),
+            consume("fast", fast),
+            consume("slow", slow, delay=0.001),
+            consume("leaving", leaving, stop_after=5),
+        )
+        return published, received, max(lead)
+
+    published, received, max_lead = asyncio.run(run())
+    # the stream never runs more than a full queue (plus the event being put) ahead
+    assert max_lead <= 2 + 2
+    assert len(received["fast"]) == len(received["slow"]) == published
+    assert received["fast"] == received["slow"]
+    assert received["leaving"] == received["fast"][:5]
+
+
+def test_subscribers_that_stop_reading_do_not_stall_the_stream(packages, distance_table):
+    async def run():
+        fan_out = EventFanOut(maxsize=1)
+        reader, breaking, failing = fan_out.subscribe(), fan_out.subscribe(), fan_out.subscribe()
+        received = []
+
+        async def read():
+            async with reader:
+                async for event in reader:
+                    received.append(event)
+                    await asyncio.sleep(0)
+
+        async def stop_early():
+            async with breaking:
+                async for _ in breaking:
+                    break
+
+        async def fail():
+            async with failing:
+                async for _ in failing:
+                    raise RuntimeError("analytics crashed")
+
+        published, *_ = await asyncio.wait_for(
+            asyncio.gather(
+                fan_out.publish(stream_deliveries(packages, distance_table)),
+                read(),
+                stop_early(),
+                fail(),
+                return_exceptions=True,
+            ),
+            timeout=10,
+        )
+        return published, received, breaking.closed and failing.closed
+
+    published, received, both_closed = asyncio.run(run())
+    assert len(received) == published
+    assert both_closed
@@ -0,0 +1,115 @@
+import pytest
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import default_trucks, deliver_packages
+from lib.distance_provider import CachedDistanceProvider, distances_from, distances_to
+
+
+@pytest.fixture(scope="module")
+def dense_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+class RecordingSource:
+    """Stand-in for a routing engine, recording every bulk request it receives."""
+
+    def __init__(self, dense_table):
+        self.dense_table = dense_table
+        self.requests: list[list[tuple[str, str]]] = []
+
+    def __call__(self, pairs):
+        self.requests.append(list(pairs))
+        return [self.dense_table[a][b] for a, b in pairs]
+
+
+def test_planning_with_provider_matches_dense_table(dense_table):
+    _, dense_mileage = deliver_packages(
+        csv_to_packages("data/WGUPSPackageFile.csv"), distance_table=dense_table
+    )
+
+    source = RecordingSource(dense_table)
+    provider = CachedDistanceProvider(dense_table, source)
+    trucks = default_trucks(provider)
+    _, mileage = deliver_packages(
+        csv_to_packages("data/WGUPSPackageFile.csv"), distance_table=provider, trucks=trucks
+    )
+    assert mileage == pytest.approx(dense_mileage)
+
+    # only part of the table is ever fetched, and each pair only once
+    location_count = len(dense_table)
+    fetched = [pair for request in source.requests for pair in request]
+    assert len(fetched) == len(set(fetched)) == provider.stats.misses
+    assert len(fetched) < location_count * (location_count - 1) / 2
+    assert provider.stats.fetches == len(source.requests)
+    assert provider.stats.hits > provider.stats.misses
+    assert 0.5 < provider.stats.hit_rate < 1.0
+
+
+def test_misses_are_batched(dense_table):
+    source = RecordingSource(dense_table)
+    provider = CachedDistanceProvider(dense_table, source, batch_size=4)
+    hub, *locations = list(dense_table)
+    destinations = locations[:10]
+
+    assert provider.distances_from(hub, destinations) == [
+        dense_table[hub][location] for location in destinations
+    ]
+    assert [len(request) for request in source.requests] == [4, 4, 2]
+
+    # the reverse direction shares the cached pairs
+    assert provider.distances_from(locations[0], [hub]) == [dense_table[hub][locations[0]]]
+    assert len(source.requests) == 3
+    assert provider.stats.hits == 1
+
+    assert distances_from(dense_table, hub, destinations[:2]) == distances_from(
+        provider, hub, destinations[:2]
+    )
+
+
+def test_one_way_distances_are_fetched_by_direction():
+    locations = ["HUB", "A", "B"]
+    # each distance depends on the direction: 1 going forwards through the list, 10 backwards
+    source = RecordingSource(
+        {
+            a: {b: 1.0 if i < j else 10.0 for j, b in enumerate(locations)}
+            for i, a in enumerate(locations)
+        }
+    )
+    provider = CachedDistanceProvider(locations, source, symmetric=False)
+
+    assert provider.distances_from("A", locations) == [10.0, 0.0, 1.0]
+    assert provider.distances_to("A", locations) == [1.0, 0.0, 10.0]
+    assert distances_to(provider, "A", ["HUB"]) == [1.0]
+    assert [len(request) for request in source.requests] == [2, 2]
+
+
+def test_least_recently_used_pairs_are_evicted(dense_table):
+    source = RecordingSource(dense_table)
+    provider = CachedDistanceProvider(dense_table, source, max_cached_pairs=3)
+    hub, a, b, c, d = list(dense_table)[:5]
+
+    for location in (a, b, c):
+        provider[hub][location]
+    provider[hub][a]  # a is now the most recently used
+    provider[hub][d]  # evicts b
+    assert provider.cached_pairs == 3
+    assert provider.stats.evictions == 1
+
+    request_count = len(source.requests)
+    assert provider[hub][a] == dense_table[hub][a]
+    assert len(source.requests) == request_count
+    assert provider[hub][b] == dense_table[hub][b]
+    assert len(source.requests) == request_count + 1
+
+
+def test_provider_behaves_like_a_distance_table(dense_table):
+    provider = CachedDistanceProvider(dense_table, RecordingSource(dense_table))
+    hub, a, b = list(dense_table)[:3]
+    assert hub in provider
+    assert "Nowhere (00000)" not in provider
+    assert provider[a][a] == 0.0
+    assert len(provider) == len(dense_table)
+    assert provider.closest(hub, [a, b]) == min(a, b, key=dense_table[hub].__getitem__)
+    with pytest.raises(KeyError):
+        provider["Nowhere (00000)"]
+    with pytest.raises(KeyError):
+        provider[hub]["Nowhere (00000)"]
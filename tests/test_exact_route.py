@@ -0,0 +1,81 @@
+import itertools
+import math
+import pytest
+from lib.csv_utils import csv_to_distances
+from lib.exact_route import EXACT_MAX_STOPS, MINUTES_PER_MILE, shortest_stop_order
+
+
+@pytest.fixture(scope="module")
+def distance_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+def tour_length(order, distance_table, hub="HUB"):
+    stops = [hub, *order, hub]
+    return sum(distance_table[a][b] for a, b in zip(stops, stops[1:]))
+
+
+def arrival_times(order, distance_table, departure_time, hub="HUB"):
+    arrivals, clock, location = {}, departure_time, hub
+    for stop in order:
+        clock += distance_table[location][stop] * MINUTES_PER_MILE
+        arrivals[stop] = clock
+        location = stop
+    return arrivals
+
+
+def test_matches_brute_force(distance_table):
+    stops = [location for location in distance_table if location != "HUB"][:7]
+    order = shortest_stop_order(stops, distance_table, "HUB")
+    assert sorted(order) == sorted(stops)
+    best = min(
+        tour_length(permutation, distance_table)
+        for permutation in itertools.permutations(stops)
+    )
+    assert tour_length(order, distance_table) == pytest.approx(best)
+
+
+def test_respects_deadlines(distance_table):
+    stops = [location for location in distance_table if location != "HUB"][:7]
+    unconstrained = shortest_stop_order(stops, distance_table, "HUB")
+    # force the last stop of the shortest tour to be visited first
+    departure_time = 8 * 60
+    deadlines = [math.inf] * len(stops)
+    last = stops.index(unconstrained[-1])
+    deadlines[last] = (
+        departure_time + distance_table["HUB"][stops[last]] * MINUTES_PER_MILE + 1e-6
+    )
+
+    order = shortest_stop_order(
+        stops, distance_table, "HUB", departure_time=departure_time, deadlines=deadlines
+    )
+    assert order[0] == stops[last]
+    arrivals = arrival_times(order, distance_table, departure_time)
+    assert all(arrivals[stop] <= deadline for stop, deadline in zip(stops, deadlines))
+
+    best = min(
+        tour_length(permutation, distance_table)
+        for permutation in itertools.permutations(stops)
+        if permutation[0] == stops[last]
+    )
+    assert tour_length(order, distance_table) == pytest.approx(best)
+
+
+def test_infeasible_deadlines(distance_table):
+    stops = [location for location in distance_table if location != "HUB"][:3]
+    assert shortest_stop_order(stops, distance_table, "HUB", deadlines=[0.0, 0.0, 0.0]) is None
+    assert shortest_stop_order(stops, distance_table, "HUB", latest_return=0.0) is None
+
+
+def test_falls_back_on_large_or_slow_trips(distance_table):
+    locations = [location for location in distance_table if location != "HUB"]
+    assert shortest_stop_order(locations[: EXACT_MAX_STOPS + 1], distance_table, "HUB") is None
+    assert (
+        shortest_stop_order(
+            locations[:EXACT_MAX_STOPS], distance_table, "HUB", time_limit=0.0
+        )
+        is None
+    )
+    assert shortest_stop_order([], distance_table, "HUB") == []
+    with pytest.raises(ValueError):
+        shortest_stop_order(locations[:1] * 2, distance_table, "HUB")
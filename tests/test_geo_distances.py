@@ -0,0 +1,115 @@
+import random
+import pytest
+from datetime import time
+from lib.delivery_algorithm import get_next_closest_package
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.geo_distances import (
+    DistanceMetric,
+    GeoDistanceTable,
+    KDTree,
+    csv_to_coordinates,
+)
+from models.package import Package
+from models.truck import Truck
+
+
+def random_coordinates(count: int, seed: int = 0) -> dict[str, tuple[float, float]]:
+    rng = random.Random(seed)
+    # roughly the Salt Lake valley
+    return {
+        f"{i} Main St (84{i % 1000:03d})": (
+            rng.uniform(40.5, 40.9),
+            rng.uniform(-112.1, -111.7),
+        )
+        for i in range(count)
+    }
+
+
+@pytest.mark.parametrize("metric", list(DistanceMetric))
+def test_nearest_matches_brute_force(metric):
+    table = GeoDistanceTable(random_coordinates(500), metric=metric)
+    locations = list(table)
+    rng = random.Random(1)
+    for location in rng.sample(locations, 20):
+        expected = sorted(
+            (table[location][other], other) for other in locations if other != location
+        )[:5]
+        nearest = table.nearest(location, k=5)
+        assert [other for _, other in nearest] == [other for _, other in expected]
+        assert [distance for distance, _ in nearest] == pytest.approx(
+            [distance for distance, _ in expected]
+        )
+
+
+def test_nearest_with_predicate():
+    table = GeoDistanceTable(random_coordinates(500))
+    locations = list(table)
+    allowed = set(locations[::7])
+    origin = locations[1]
+    [(distance, closest)] = table.nearest(origin, predicate=allowed.__contains__)
+    assert closest == min(allowed, key=table[origin].__getitem__)
+    assert distance == pytest.approx(table[origin][closest])
+
+    # large candidate sets are searched through the index, small ones directly
+    assert table.closest(origin, allowed) == closest
+    assert table.closest(origin, locations[2:5]) == min(
+        locations[2:5], key=table[origin].__getitem__
+    )
+    assert table.closest(origin, []) is None
+
+
+def test_distance_table_interface():
+    table = GeoDistanceTable(
+        {"A": (0.0, 0.0), "B": (3.0, 4.0)}, metric=DistanceMetric.EUCLIDEAN, road_factor=2.0
+    )
+    assert table["A"]["B"] == table["B"]["A"] == pytest.approx(10.0)
+    assert table["A"]["A"] == 0.0
+    assert set(table) == {"A", "B"}
+    assert len(table["A"]) == 2
+    with pytest.raises(KeyError):
+        table["C"]
+
+    # one degree of latitude is about 69 miles
+    haversine = GeoDistanceTable(
+        {"A": (40.0, -111.0), "B": (41.0, -111.0)}, road_factor=1.0
+    )
+    assert haversine["A"]["B"] == pytest.approx(69.1, abs=0.1)
+
+
+def test_kd_tree_empty_and_single():
+    assert KDTree({}).nearest((0.0, 0.0)) == []
+    assert KDTree({"A": (1.0, 1.0)}).nearest((0.0, 0.0)) == [(2.0, "A")]
+
+
+def test_truck_and_planner_use_spatial_index():
+    coordinates = {"HUB": (0.0, 0.0)}
+    coordinates.update({f"Stop {i} (84101)": (float(i), 0.0) for i in range(1, 6)})
+    table = GeoDistanceTable(coordinates, metric=DistanceMetric.EUCLIDEAN, road_factor=1.0)
+
+    packages = DeliveryHashTable(5)
+    for i in (3, 1, 5, 2, 4):
+        packages.insert(i, Package(i, f"Stop {i}", "City", "UT", "84101", 1.0, time(17, 0)))
+
+    closest = get_next_closest_package(
+        current_package=None,
+        packages=packages,
+        distance_table=table,
+        current_time=time(8, 0),
+        truck_id=1,
+    )
+    assert closest.package_id == 1
+
+    truck = Truck(truck_id=1, distance_table=table)
+    for package_id in packages.package_ids:
+        truck.load_package(packages.lookup(package_id))
+    truck.deliver_all_packages()
+    assert [package.package_id for package in truck.delivered_packages] == [1, 2, 3, 4, 5]
+    assert truck.current_mileage == pytest.approx(10.0)
+
+
+def test_csv_to_coordinates(tmp_path):
+    path = tmp_path / "coordinates.csv"
+    path.write_text("location,latitude,longitude\nHUB,40.68,-111.87\nB St,40.7,-111.9\n")
+    table = csv_to_coordinates(path)
+    assert set(table) == {"HUB", "B St"}
+    assert table["HUB"]["B St"] > 0
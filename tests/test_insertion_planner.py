@@ -0,0 +1,148 @@
+import pytest
+from datetime import time
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_data_structure import ConcurrentDeliveryHashTable, DeliveryHashTable
+from lib.insertion_planner import Route, _InsertionPlanner, deliver_routes, plan_routes
+from models.package import DeliveryStatus, Package
+from models.truck import Truck
+
+A, B, C = "A St (84101)", "B St (84101)", "C St (84101)"
+DISTANCE_TABLE = {
+    "HUB": {"HUB": 0.0, A: 9.0, B: 9.0, C: 18.0},
+    A: {"HUB": 9.0, A: 0.0, B: 18.0, C: 9.0},
+    B: {"HUB": 9.0, A: 18.0, B: 0.0, C: 18.0},
+    C: {"HUB": 18.0, A: 9.0, B: 18.0, C: 0.0},
+}
+
+
+def make_packages(*packages: Package) -> DeliveryHashTable:
+    table = DeliveryHashTable(len(packages))
+    for package in packages:
+        table.insert(package.package_id, package)
+    return table
+
+
+def test_plan_meets_every_window():
+    packages = csv_to_packages("data/WGUPSPackageFile.csv")
+    distance_table = csv_to_distances("data/WGUPSDistanceTable.csv")
+    plan = plan_routes(
+        packages, distance_table, truck_start_times={1: time(8, 0), 2: time(9, 5)}
+    )
+    assert plan.late_package_ids == []
+
+    trucks = [
+        Truck(truck_id=1, distance_table=distance_table),
+        Truck(truck_id=2, distance_table=distance_table, current_time=time(9, 5)),
+    ]
+    total_mileage = deliver_routes(plan, trucks)
+    assert total_mileage == pytest.approx(plan.total_mileage)
+    assert total_mileage < 140.0
+
+    for package_id in packages.package_ids:
+        package = packages.lookup(package_id)
+        assert package.time_delivered <= package.delivery_deadline
+        if package.earliest_load_time is not None:
+            assert package.time_loaded_onto_truck >= package.earliest_load_time
+        if package.required_truck_id is not None:
+            assert package.truck_id == package.required_truck_id
+
+    for route in plan:
+        assert len(route.packages) <= 16
+        ids = [package.package_id for package in route.packages]
+        if 13 in ids:
+            assert {14, 15, 16, 19, 20} <= set(ids)
+
+
+def test_trucks_write_through_a_concurrent_table():
+    packages = csv_to_packages("data/WGUPSPackageFile.csv")
+    distance_table = csv_to_distances("data/WGUPSDistanceTable.csv")
+    table = ConcurrentDeliveryHashTable(len(packages))
+    for package in packages:
+        table.insert(package.package_id, package)
+    plan = plan_routes(table, distance_table, truck_start_times={1: time(8, 0), 2: time(9, 5)})
+
+    trucks = [
+        Truck(truck_id=1, distance_table=distance_table, package_table=table),
+        Truck(
+            truck_id=2, distance_table=distance_table, current_time=time(9, 5), package_table=table
+        ),
+    ]
+    deliver_routes(plan, trucks)
+
+    # every change replaced a package in the table; the packages read before are untouched
+    for package in packages:
+        assert package.delivery_status == DeliveryStatus.AT_HUB
+        delivered = table.lookup(package.package_id)
+        assert delivered.delivery_status == DeliveryStatus.DELIVERED
+        assert delivered.time_delivered <= delivered.delivery_deadline
+    assert packages.lookup(9).delivery_address != "410 S State St"
+    assert table.lookup(9).delivery_address == "410 S State St"
+    delivered_by_trucks = [package for truck in trucks for package in truck.delivered_packages]
+    assert all(package is table.lookup(package.package_id) for package in delivered_by_trucks)
+
+
+def test_deadline_decides_the_delivery_order():
+    # B is due first, so the truck goes there before chaining C and A on the way back
+    packages = make_packages(
+        Package(1, "A St", "City", "UT", "84101", 1.0, time(17, 0)),
+        Package(2, "B St", "City", "UT", "84101", 1.0, time(8, 30)),
+        Package(3, "C St", "City", "UT", "84101", 1.0, time(17, 0)),
+    )
+    plan = plan_routes(packages, DISTANCE_TABLE, truck_start_times={1: time(8, 0)})
+    assert plan.late_package_ids == []
+    assert [[package.package_id for package in route.packages] for route in plan] == [
+        [2, 3, 1]
+    ]
+    assert plan.total_mileage == pytest.approx(45.0)
+
+
+def test_insertion_follows_one_way_distances():
+    # going out through A and back through B is short, the other way round is long
+    one_way = {
+        "HUB": {"HUB": 0.0, A: 1.0, B: 10.0},
+        A: {"HUB": 10.0, A: 0.0, B: 1.0},
+        B: {"HUB": 1.0, A: 10.0, B: 0.0},
+    }
+    package_a = Package(1, "A St", "City", "UT", "84101", 1.0, time(17, 0))
+    package_b = Package(2, "B St", "City", "UT", "84101", 1.0, time(17, 0))
+    planner = _InsertionPlanner(one_way, "HUB")
+    route = Route(truck_id=1, ready_time=480.0, packages=[package_a])
+    planner.update_truck([route], 480.0)
+
+    # after A: A -> B -> HUB replaces A -> HUB
+    assert planner.best_position(route, package_b, 480.0) == (pytest.approx(-8.0), 1)
+
+
+def test_capacity_opens_new_trips():
+    packages = make_packages(
+        *(
+            Package(package_id, "A St", "City", "UT", "84101", 1.0, time(17, 0))
+            for package_id in range(1, 6)
+        )
+    )
+    plan = plan_routes(
+        packages, DISTANCE_TABLE, truck_start_times={1: time(8, 0)}, max_packages=2
+    )
+    assert [len(route.packages) for route in plan] == [2, 2, 1]
+    trips = plan.routes[1]
+    for previous, following in zip(trips, trips[1:]):
+        assert following.departure_time >= previous.return_time
+
+
+def test_infeasible_packages_are_reported():
+    # C is an hour away, so it cannot be delivered by 8:30
+    packages = make_packages(
+        Package(1, "A St", "City", "UT", "84101", 1.0, time(17, 0)),
+        Package(2, "C St", "City", "UT", "84101", 1.0, time(8, 30)),
+    )
+    plan = plan_routes(packages, DISTANCE_TABLE, truck_start_times={1: time(8, 0)})
+    assert plan.late_package_ids == [2]
+    assert sorted(package.package_id for route in plan for package in route.packages) == [1, 2]
+
+
+def test_missing_required_truck_is_rejected():
+    packages = make_packages(
+        Package(1, "A St", "City", "UT", "84101", 1.0, time(17, 0), "Can only be on truck 2"),
+    )
+    with pytest.raises(ValueError):
+        plan_routes(packages, DISTANCE_TABLE, truck_start_times={1: time(8, 0)})
@@ -0,0 +1,123 @@
+import datetime
+import os
+import pytest
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import default_trucks, deliver_packages
+from lib.journal import (
+    _ADDRESS_FRAME,
+    _HEADER,
+    _LOADED,
+    _RECORD,
+    JOURNAL_FILENAME,
+    DeliveryJournal,
+    _frames,
+    _read_journal,
+    recover,
+)
+from models.package import DeliveryStatus
+
+
+@pytest.fixture(scope="module")
+def distance_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+@pytest.fixture
+def packages():
+    return csv_to_packages("data/WGUPSPackageFile.csv")
+
+
+def checkpoint_names(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("checkpoint-"))
+
+
+def test_recover_rebuilds_the_delivered_day(tmp_path, packages, distance_table):
+    with DeliveryJournal(tmp_path, packages, batch_size=8) as journal:
+        deliver_packages(packages, distance_table=distance_table, journal=journal)
+
+    recovered, _ = recover(tmp_path)
+    assert recovered.package_ids == packages.package_ids
+    for package_id in packages.package_ids:
+        assert recovered.lookup(package_id) == packages.lookup(package_id)
+    assert recovered.lookup(9).delivery_address == "410 S State St"
+    # only the checkpoint taken when the journal was opened: the day is replayed from it
+    assert len(checkpoint_names(tmp_path)) == 1
+
+
+def test_address_correction_is_journaled_when_the_package_is_loaded(
+    tmp_path, packages, distance_table
+):
+    with DeliveryJournal(tmp_path, packages, batch_size=1) as journal:
+        deliver_packages(packages, distance_table=distance_table, journal=journal)
+
+    buffer = _read_journal(tmp_path / JOURNAL_FILENAME)
+    frames = [(kind, bytes(payload)) for kind, payload, _ in _frames(buffer, _HEADER.size)]
+    kinds = [kind for kind, _ in frames]
+    correction = kinds.index(_ADDRESS_FRAME)
+    assert kinds.count(_ADDRESS_FRAME) == 1
+    # the day's first loads come before it, and package 9's load right after it
+    assert correction > 0
+    record_type, package_id, micros, _ = _RECORD.unpack(frames[correction + 1][1])
+    assert (record_type, package_id) == (_LOADED, 9)
+    assert micros >= 10 * 3600 * 1_000_000 + 20 * 60 * 1_000_000
+
+
+def test_periodic_checkpoints_leave_only_the_tail_to_replay(tmp_path, packages, distance_table):
+    with DeliveryJournal(tmp_path, packages, batch_size=4, checkpoint_interval=20) as journal:
+        deliver_packages(packages, distance_table=distance_table, journal=journal)
+        last_checkpoint = journal.checkpoint()
+
+    assert checkpoint_names(tmp_path) == [os.path.basename(last_checkpoint)]
+    recovered, offset = recover(tmp_path)
+    assert offset == os.path.getsize(tmp_path / JOURNAL_FILENAME)
+    assert all(package.delivery_status == DeliveryStatus.DELIVERED for package in recovered)
+
+
+def test_crash_loses_only_the_unfinished_batch(tmp_path, packages, distance_table):
+    journal = DeliveryJournal(tmp_path, packages, batch_size=10, checkpoint_interval=None)
+    truck = default_trucks(distance_table)[0]
+    truck.journal = journal
+    for package_id in [1, 2, 4]:
+        truck.load_package(packages.lookup(package_id))
+    journal.commit()
+    truck.deliver_package(packages.lookup(1))
+    # the process dies before the delivery's batch is written
+    journal._file.close()
+
+    recovered, _ = recover(tmp_path)
+    assert recovered.lookup(1).delivery_status == DeliveryStatus.EN_ROUTE
+    assert recovered.lookup(1).time_delivered is None
+    assert recovered.lookup(4).truck_id == 1
+    assert recovered.lookup(4).time_loaded_onto_truck == datetime.time(8, 0)
+    assert recovered.lookup(3).delivery_status == DeliveryStatus.AT_HUB
+
+
+def test_torn_batch_is_ignored_and_cut_off_on_reopen(tmp_path, packages):
+    journal = DeliveryJournal(tmp_path, packages, batch_size=1, checkpoint_interval=None)
+    truck = default_trucks({})[0]
+    truck.journal = journal
+    truck.load_package(packages.lookup(1))
+    truck.load_package(packages.lookup(2))
+    journal.close()
+    journal_path = tmp_path / JOURNAL_FILENAME
+    # the last batch was only partly written
+    os.truncate(journal_path, os.path.getsize(journal_path) - 3)
+
+    recovered, offset = recover(tmp_path)
+    assert recovered.lookup(1).delivery_status == DeliveryStatus.EN_ROUTE
+    assert recovered.lookup(2).delivery_status == DeliveryStatus.AT_HUB
+
+    with DeliveryJournal(tmp_path, recovered, batch_size=1) as reopened:
+        assert os.path.getsize(journal_path) == offset
+        truck = default_trucks({})[0]
+        truck.journal = reopened
+        truck.load_package(recovered.lookup(3))
+
+    recovered, _ = recover(tmp_path)
+    assert recovered.lookup(2).delivery_status == DeliveryStatus.AT_HUB
+    assert recovered.lookup(3).delivery_status == DeliveryStatus.EN_ROUTE
+
+
+def test_recover_without_checkpoint(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        recover(tmp_path)
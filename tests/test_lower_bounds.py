@@ -0,0 +1,72 @@
+import itertools
+import pytest
+from datetime import time
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.insertion_planner import plan_routes
+from lib.lower_bounds import (
+    mileage_lower_bound,
+    optimality_gap,
+    spanning_tree_bound,
+    spanning_tree_edges,
+    trip_tree_bound,
+)
+from models.package import Package
+
+A, B, C = "A St (84101)", "B St (84101)", "C St (84101)"
+DISTANCE_TABLE = {
+    "HUB": {"HUB": 0.0, A: 9.0, B: 9.0, C: 18.0},
+    A: {"HUB": 9.0, A: 0.0, B: 18.0, C: 9.0},
+    B: {"HUB": 9.0, A: 18.0, B: 0.0, C: 18.0},
+    C: {"HUB": 18.0, A: 9.0, B: 18.0, C: 0.0},
+}
+
+
+@pytest.fixture(scope="module")
+def distance_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+def make_packages(*addresses: str) -> DeliveryHashTable:
+    table = DeliveryHashTable(len(addresses))
+    for package_id, address in enumerate(addresses, start=1):
+        street, zip_code = address[:-8], address[-6:-1]
+        table.insert(
+            package_id, Package(package_id, street, "City", "UT", zip_code, 1.0, time(17, 0))
+        )
+    return table
+
+
+def test_bounds_on_a_small_map():
+    packages = make_packages(A, B, C)
+    assert sorted(spanning_tree_edges(["HUB", A, B, C], DISTANCE_TABLE)) == [9.0, 9.0, 9.0]
+    assert spanning_tree_bound(packages, DISTANCE_TABLE) == pytest.approx(27.0)
+    # one trip: the tree A-C, A-B plus two legs from the hub, as long as the best tour
+    assert trip_tree_bound(packages, DISTANCE_TABLE) == pytest.approx(45.0)
+    # three single-package trips drop both tree edges, but need six legs from the hub
+    assert trip_tree_bound(packages, DISTANCE_TABLE, max_packages=1) == pytest.approx(54.0)
+    assert mileage_lower_bound(packages, DISTANCE_TABLE) == pytest.approx(45.0)
+
+
+def test_bound_never_exceeds_the_shortest_tour(distance_table):
+    stops = [location for location in distance_table if location != "HUB"][:7]
+    packages = make_packages(*stops)
+    shortest = min(
+        sum(distance_table[a][b] for a, b in zip(["HUB", *order], [*order, "HUB"]))
+        for order in itertools.permutations(stops)
+    )
+    assert 0 < mileage_lower_bound(packages, distance_table) <= shortest + 1e-9
+
+
+def test_bound_and_gap_for_the_daily_plan(distance_table):
+    packages = csv_to_packages("data/WGUPSPackageFile.csv")
+    plan = plan_routes(packages, distance_table, truck_start_times={1: time(8), 2: time(9, 5)})
+    lower_bound = mileage_lower_bound(packages, distance_table)
+    assert 0 < lower_bound <= plan.total_mileage
+    assert 0 < optimality_gap(plan.total_mileage, lower_bound) < 1
+
+
+def test_optimality_gap():
+    assert optimality_gap(100.0, 80.0) == pytest.approx(0.2)
+    assert optimality_gap(100.0, 100.0) == 0.0
+    assert optimality_gap(0.0, 0.0) == 0.0
@@ -0,0 +1,324 @@
+"""Time and memory budgets for the core operations, on fixed seeded synthetic inputs.
+
+Each operation's best wall time over `REPEATS` runs and its peak traced memory
+(from `tracemalloc`, measured in a separate run so tracing does not skew the timing)
+are compared with `performance_baselines.json`. Times are scaled by how fast this machine
+runs a fixed calibration workload compared with the run that recorded each baseline,
+so re-recording some of the operations (with `-k`) leaves the others' budgets alone.
+Only selected with `python -m pytest -m performance` (see `conftest.py`).
+"""
+
+import datetime
+import json
+import math
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import (
+    default_trucks,
+    deliver_packages,
+    delivery_status_at_time,
+    fleet_state_at,
+    get_next_closest_package,
+)
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.insertion_planner import plan_routes
+from models.package import Package
+
+pytestmark = pytest.mark.performance
+
+SEED = 1950
+BASELINE_FILE = Path(__file__).with_name("performance_baselines.json")
+REPEATS = 3
+# a run fails once it is this many times slower, or uses this many times more memory,
+# plus a little slack so the shortest and smallest operations are not flaky
+TIME_TOLERANCE = 2.0
+TIME_SLACK_SECONDS = 0.005
+MEMORY_TOLERANCE = 1.25
+MEMORY_SLACK_BYTES = 64 * 1024
+
+PACKAGE_ROWS = 20_000
+DISTANCE_LOCATIONS = 500
+TABLE_PACKAGES = 20_000
+PLAN_PACKAGES = 300
+PLAN_LOCATIONS = 80
+STATUS_TIMES = 540
+
+DEADLINES = ["9:00 AM", "10:30 AM", "EOD", "EOD", "EOD"]
+
+
+@dataclass
+class Measurement:
+    seconds: float
+    peak_bytes: int
+
+
+def _calibrate() -> float:
+    """Time a fixed pure-Python workload, to compare this machine's speed with the baseline's."""
+    best = math.inf
+    for _ in range(5):
+        start = time.perf_counter()
+        table: dict[int, list[int]] = {}
+        for i in range(200_000):
+            table.setdefault(i % 997, []).append(i * 31 % 1009)
+        for values in table.values():
+            values.sort()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(operation, setup=lambda: None) -> Measurement:
+    """Run `operation(setup())`, timing it `REPEATS` times, then once more under tracemalloc."""
+    seconds = math.inf
+    for _ in range(REPEATS):
+        state = setup()
+        start = time.perf_counter()
+        operation(state)
+        seconds = min(seconds, time.perf_counter() - start)
+    state = setup()
+    tracemalloc.start()
+    try:
+        operation(state)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(seconds, peak_bytes)
+
+
+@pytest.fixture(scope="module")
+def budget(request):
+    """Check measurements against their baselines, or record them as the new baselines."""
+    update = request.config.getoption("--update-performance-baselines")
+    baselines = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    calibration = _calibrate()
+    recorded: dict[str, dict] = {}
+
+    def check(name: str, measurement: Measurement):
+        if update:
+            recorded[name] = {
+                "seconds": round(measurement.seconds, 6),
+                "peak_bytes": measurement.peak_bytes,
+                "calibration_seconds": round(calibration, 6),
+            }
+            return
+        baseline = baselines.get("operations", {}).get(name)
+        if baseline is None:
+            pytest.fail(f"No baseline for {name}: record one with --update-performance-baselines")
+        speed = calibration / baseline["calibration_seconds"]
+        allowed_seconds = baseline["seconds"] * speed * TIME_TOLERANCE + TIME_SLACK_SECONDS
+        allowed_bytes = baseline["peak_bytes"] * MEMORY_TOLERANCE + MEMORY_SLACK_BYTES
+        assert measurement.seconds <= allowed_seconds, (
+            f"{name} took {measurement.seconds:.4f}s, over its budget of {allowed_seconds:.4f}s"
+        )
+        assert measurement.peak_bytes <= allowed_bytes, (
+            f"{name} peaked at {measurement.peak_bytes:,} bytes, "
+            f"over its budget of {allowed_bytes:,.0f}"
+        )
+
+    yield check
+
+    if update and recorded:
+        operations = baselines.get("operations", {})
+        operations.update(recorded)
+        BASELINE_FILE.write_text(
+            json.dumps({"operations": operations}, indent=2, sort_keys=True) + "\n"
+        )
+
+
+def synthetic_locations(rng: random.Random, count: int) -> tuple[list[str], dict]:
+    """Place `count` addresses and the hub at random on a 20 x 20 mile map.
+
+    Planning corrects package 9's address, as in the real manifest,
+    so the corrected address is placed on the map too.
+    """
+    locations = ["HUB", "410 S State St (84111)"] + [
+        f"{i} Test St (84101)" for i in range(1, count + 1)
+    ]
+    points = [(rng.uniform(0, 20), rng.uniform(0, 20)) for _ in locations]
+    distance_table = {
+        location: {
+            other: round(math.dist(point, other_point), 1)
+            for other, other_point in zip(locations, points)
+        }
+        for location, point in zip(locations, points)
+    }
+    return locations, distance_table
+
+
+def synthetic_packages(rng: random.Random, count: int, locations: int) -> DeliveryHashTable:
+    packages = DeliveryHashTable(count)
+    for package_id in range(1, count + 1):
+        hour, minute = rng.choice([(9, 0), (10, 30), (17, 0), (17, 0), (17, 0)])
+        packages.insert(
+            package_id,
+            Package(
+                package_id,
+                f"{rng.randint(1, locations)} Test St",
+                "Salt Lake City",
+                "UT",
+                "84101",
+                float(rng.randint(1, 50)),
+                datetime.time(hour, minute),
+            ),
+        )
+    return packages
+
+
+@pytest.fixture(scope="module")
+def package_file(tmp_path_factory):
+    rng = random.Random(SEED)
+    path = tmp_path_factory.mktemp("performance") / "packages.csv"
+    lines = ["PackageID,Address,City,State,Zip,DeliveryDeadline,Weight KILO,Special Notes"]
+    for package_id in range(1, PACKAGE_ROWS + 1):
+        lines.append(
+            f"{package_id},{rng.randint(1, 500)} Test St,Salt Lake City,UT,84101,"
+            f"{rng.choice(DEADLINES)},{rng.randint(1, 50)},"
+        )
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def distance_file(tmp_path_factory):
+    rng = random.Random(SEED)
+    path = tmp_path_factory.mktemp("performance") / "distances.csv"
+    lines = []
+    for i in range(DISTANCE_LOCATIONS):
+        distances = [f"{rng.uniform(0.5, 15):.1f}" for _ in range(i)] + ["0.0"]
+        lines.append(f"Location {i},{i} Test St (84101)," + ",".join(distances))
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_ingest_packages(budget, package_file):
+    budget("ingest_packages", measure(lambda _: csv_to_packages(package_file)))
+
+
+def test_ingest_distances(budget, distance_file):
+    budget("ingest_distances", measure(lambda _: csv_to_distances(distance_file)))
+
+
+@pytest.fixture(scope="module")
+def table_packages():
+    rng = random.Random(SEED)
+    packages = list(synthetic_packages(rng, TABLE_PACKAGES, 500))
+    shuffled_ids = [package.package_id for package in packages]
+    rng.shuffle(shuffled_ids)
+    return packages, shuffled_ids
+
+
+def filled_table(packages) -> DeliveryHashTable:
+    table = DeliveryHashTable(TABLE_PACKAGES // 2)
+    for package in packages:
+        table.insert(package.package_id, package)
+    return table
+
+
+def test_hash_table_insert(budget, table_packages):
+    packages, _ = table_packages
+    budget("hash_table_insert", measure(lambda _: filled_table(packages)))
+
+
+def test_hash_table_lookup(budget, table_packages):
+    packages, shuffled_ids = table_packages
+    table = filled_table(packages)
+
+    def lookup_all(_):
+        for _ in range(4):
+            for package_id in shuffled_ids:
+                table.lookup(package_id)
+
+    budget("hash_table_lookup", measure(lookup_all))
+
+
+def test_hash_table_remove(budget, table_packages):
+    packages, shuffled_ids = table_packages
+
+    def remove_all(table):
+        for package_id in shuffled_ids:
+            table.remove(package_id)
+
+    budget("hash_table_remove", measure(remove_all, setup=lambda: filled_table(packages)))
+
+
+@pytest.fixture(scope="module")
+def plan_distance_table():
+    _, distance_table = synthetic_locations(random.Random(SEED), PLAN_LOCATIONS)
+    return distance_table
+
+
+def test_next_closest_package(budget, plan_distance_table):
+    distance_table = plan_distance_table
+    rng = random.Random(SEED)
+    packages = synthetic_packages(rng, PLAN_PACKAGES, PLAN_LOCATIONS)
+    current_ids = [rng.randint(1, PLAN_PACKAGES) for _ in range(100)]
+
+    def choose_next(_):
+        for current_id in current_ids:
+            get_next_closest_package(
+                current_package=packages.lookup(current_id),
+                packages=packages,
+                distance_table=distance_table,
+                current_time=datetime.time(9, 0),
+                truck_id=1,
+                priority_deadline=datetime.time(10, 30),
+            )
+
+    budget("next_closest_package", measure(choose_next))
+
+
+def test_plan_routes(budget, plan_distance_table):
+    distance_table = plan_distance_table
+
+    def plan(packages):
+        plan_routes(
+            packages,
+            distance_table,
+            truck_start_times={1: datetime.time(8, 0), 2: datetime.time(9, 5)},
+            exact_time_limit=0,
+        )
+
+    budget(
+        "plan_routes",
+        measure(
+            plan,
+            setup=lambda: synthetic_packages(random.Random(SEED), PLAN_PACKAGES, PLAN_LOCATIONS),
+        ),
+    )
+
+
+def test_deliver_packages(budget):
+    distance_table = csv_to_distances("data/WGUPSDistanceTable.csv")
+    budget(
+        "deliver_packages",
+        measure(
+            lambda packages: deliver_packages(packages, distance_table=distance_table),
+            setup=lambda: csv_to_packages("data/WGUPSPackageFile.csv"),
+        ),
+    )
+
+
+def test_status_at_time(budget):
+    distance_table = csv_to_distances("data/WGUPSDistanceTable.csv")
+    trucks = default_trucks(distance_table)
+    packages, _ = deliver_packages(
+        csv_to_packages("data/WGUPSPackageFile.csv"), distance_table, trucks=trucks
+    )
+    # every package at every few minutes of the working day, and the fleet alongside
+    times = [
+        datetime.time(8 + minutes // 60, minutes % 60)
+        for minutes in range(0, 9 * 60, 9 * 60 // STATUS_TIMES)
+    ]
+
+    def query_all(_):
+        for current_time in times:
+            for package in packages:
+                delivery_status_at_time(package, current_time)
+            fleet_state_at(trucks, current_time)
+
+    budget("status_at_time", measure(query_all))
@@ -0,0 +1,105 @@
+import pytest
+from dataclasses import FrozenInstanceError
+from datetime import time
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import default_trucks, deliver_packages
+from lib.plan_state import Manifest, PlanState, plan_manifest
+from lib.plan_validation import validate_plan_state
+from models.package import DeliveryStatus
+from models.truck import Truck
+
+
+@pytest.fixture(scope="module")
+def distance_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+@pytest.fixture
+def manifest():
+    return Manifest(csv_to_packages("data/WGUPSPackageFile.csv"))
+
+
+def test_many_plans_share_one_manifest(manifest, distance_table):
+    before = [vars(package).copy() for package in manifest]
+
+    first, first_mileage = plan_manifest(manifest, distance_table)
+    second, second_mileage = plan_manifest(manifest, distance_table, max_packages=10)
+
+    # the manifest is never changed by planning
+    assert [vars(package) for package in manifest] == before
+    assert {first.delivery_status(package_id) for package_id in manifest.package_ids} == {
+        DeliveryStatus.DELIVERED
+    }
+    assert first_mileage != second_mileage
+    assert first.truck_ids != second.truck_ids
+
+
+def test_deliver_packages_leaves_a_shared_manifest_unchanged(manifest, distance_table):
+    before = [vars(package).copy() for package in manifest]
+
+    planned, mileage = deliver_packages(manifest, distance_table=distance_table)
+
+    assert [vars(package) for package in manifest] == before
+    assert planned is not manifest
+    assert {package.delivery_status for package in planned} == {DeliveryStatus.DELIVERED}
+    _, expected_mileage = plan_manifest(manifest, distance_table)
+    assert mileage == pytest.approx(expected_mileage)
+
+
+def test_manifest_packages_are_read_only(manifest, distance_table):
+    package = manifest.lookup(1)
+    with pytest.raises(FrozenInstanceError):
+        package.delivery_status = DeliveryStatus.DELIVERED
+    # a truck without a plan state cannot record its loads on the manifest
+    with pytest.raises(FrozenInstanceError):
+        Truck(truck_id=1, distance_table=distance_table).load_package(package)
+    assert package.delivery_status == DeliveryStatus.AT_HUB
+    assert package.truck_id is None
+
+
+def test_plan_matches_deliver_packages(manifest, distance_table):
+    state, mileage = plan_manifest(manifest, distance_table)
+    packages, expected_mileage = deliver_packages(
+        csv_to_packages("data/WGUPSPackageFile.csv"), distance_table=distance_table
+    )
+    assert mileage == pytest.approx(expected_mileage)
+
+    planned = state.packages()
+    for package in packages:
+        assert planned.lookup(package.package_id) == package
+
+
+def test_plan_state_validates(manifest, distance_table):
+    trucks = default_trucks(distance_table)
+    state, _ = plan_manifest(manifest, distance_table, trucks=trucks)
+    assert validate_plan_state(state, trucks).is_valid
+
+    late = state.copy()
+    late.delivery_times[manifest.row(1)] = 23 * 60
+    assert not validate_plan_state(late, trucks).is_valid
+    assert validate_plan_state(state, trucks).is_valid
+
+
+def test_plan_state_round_trips_times(manifest):
+    state = PlanState(manifest)
+    package = manifest.lookup(6)
+    state.load(package, 2, time(9, 5, 30, 250))
+    state.deliver(package, time(9, 47, 12, 345678))
+
+    planned = state.package(6)
+    assert planned.delivery_status == DeliveryStatus.DELIVERED
+    assert planned.truck_id == 2
+    assert planned.time_loaded_onto_truck == time(9, 5, 30, 250)
+    assert planned.time_delivered == time(9, 47, 12, 345678)
+    assert state.package(1).truck_id is None
+    assert state.package(1).time_delivered is None
+
+
+def test_manifest_lookup(manifest):
+    assert len(manifest) == 40
+    assert list(manifest.package_ids) == sorted(manifest.package_ids)
+    assert manifest.lookup(9).delivery_address == "410 S State St"
+    assert manifest.lookup(41) is None
+    assert 41 not in manifest
+    with pytest.raises(ValueError):
+        Manifest([manifest.lookup(1), manifest.lookup(1)])
@@ -0,0 +1,90 @@
+import pytest
+from datetime import time
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import default_trucks, deliver_packages
+from lib.plan_validation import PlanColumns, PlanRules, Rule, validate_plan
+from models.package import DeliveryStatus
+from models.truck import Truck
+
+
+@pytest.fixture
+def planned():
+    distance_table = csv_to_distances("data/WGUPSDistanceTable.csv")
+    trucks = default_trucks(distance_table)
+    packages, _ = deliver_packages(
+        csv_to_packages("data/WGUPSPackageFile.csv"),
+        distance_table=distance_table,
+        trucks=trucks,
+    )
+    return packages, trucks, distance_table
+
+
+def test_planned_day_is_valid(planned):
+    packages, trucks, _ = planned
+    report = validate_plan(packages, trucks)
+    assert report.is_valid, report.violations
+
+
+def test_package_violations(planned):
+    packages, trucks, _ = planned
+
+    undelivered = packages.lookup(1)
+    undelivered.delivery_status = DeliveryStatus.EN_ROUTE
+
+    late = packages.lookup(2)
+    late.time_delivered = time(23, 59, 30)
+
+    # package 6 does not arrive at the depot until 9:05
+    early = packages.lookup(6)
+    early.time_loaded_onto_truck = time(9, 0)
+
+    # package 3 can only be on truck 2
+    wrong_truck = packages.lookup(3)
+    wrong_truck.truck_id = 1
+
+    # packages 13, 14, 15, 16, 19 and 20 must be delivered together
+    split = packages.lookup(19)
+    split.time_loaded_onto_truck = time(8, 1)
+
+    report = validate_plan(packages, trucks)
+    assert report.package_ids(Rule.UNDELIVERED) == [1]
+    assert report.package_ids(Rule.LATE) == [2]
+    assert report.package_ids(Rule.LOADED_EARLY) == [6]
+    assert report.package_ids(Rule.WRONG_TRUCK) == [3]
+    assert Rule.CO_DELIVERY in report.counts()
+    assert not report.is_valid
+
+
+def test_fleet_violations(planned):
+    packages, trucks, distance_table = planned
+
+    # a third truck on the road at the same time as the other two
+    third = Truck(truck_id=3, distance_table=distance_table, current_time=time(9, 0))
+    for package in packages:
+        if package.truck_id == 1 and package.time_loaded_onto_truck == time(8, 0):
+            third.load_package(package)
+    third.deliver_all_packages()
+
+    report = validate_plan(
+        packages, trucks + [third], PlanRules(max_packages_per_trip=4, max_total_mileage=50.0)
+    )
+    counts = report.counts()
+    assert counts[Rule.DRIVER_LIMIT] >= 1
+    assert counts[Rule.OVER_CAPACITY] >= 1
+    assert counts[Rule.MILEAGE] == 1
+
+    relaxed = PlanRules(max_packages_per_trip=None, drivers=3, max_total_mileage=None)
+    assert not {Rule.DRIVER_LIMIT, Rule.OVER_CAPACITY, Rule.MILEAGE} & set(
+        validate_plan(packages, trucks + [third], relaxed).counts()
+    )
+
+
+def test_trip_columns(planned):
+    packages, trucks, _ = planned
+    columns = PlanColumns.from_plan(packages, trucks)
+    assert len(columns.package_ids) == len(packages)
+    assert len(columns.trip_starts) == sum(truck.total_trips for truck in trucks)
+    assert all(start < end for start, end in zip(columns.trip_starts, columns.trip_ends))
+    assert columns.total_mileage == pytest.approx(
+        sum(truck.current_mileage for truck in trucks)
+    )
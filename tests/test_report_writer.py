@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+from datetime import time
+
+import pytest
+
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.report_writer import (
+    REPORT_COLUMNS,
+    ReportFormat,
+    write_status_report,
+    write_status_report_file,
+)
+from models.package import DeliveryStatus, Package
+
+
+@pytest.fixture
+def planned_packages() -> DeliveryHashTable:
+    """Packages as they would look after the delivery algorithm has run."""
+    packages = DeliveryHashTable(10)
+    for package_id, truck_id, deadline, delivered in [
+        (1, 1, time(10, 30), time(9, 0)),
+        (2, 1, time(9, 0), time(9, 30)),  # delivered late
+        (3, 2, time(23, 59), time(11, 0)),
+    ]:
+        package = Package(
+            package_id, "1 Main St, Apt 2", "City", "UT", "84101", 2.0, deadline
+        )
+        package.delivery_status = DeliveryStatus.DELIVERED
+        package.time_loaded_onto_truck = time(8, 0)
+        package.time_delivered = delivered
+        package.truck_id = truck_id
+        packages.insert(package_id=package_id, package=package)
+    return packages
+
+
+def _render(packages, current_time, report_format, **filters) -> str:
+    stream = io.StringIO()
+    write_status_report(
+        packages, current_time, stream, report_format=report_format, chunk_size=2, **filters
+    )
+    return stream.getvalue()
+
+
+def test_csv_report(planned_packages):
+    rows = list(csv.reader(io.StringIO(_render(planned_packages, time(10, 0), "csv"))))
+    assert tuple(rows[0]) == REPORT_COLUMNS
+    assert rows[1:] == [
+        ["1", "DELIVERED", "1", "1 Main St, Apt 2 (84101)", "10:30:00", "09:00:00", "no"],
+        ["2", "DELIVERED", "1", "1 Main St, Apt 2 (84101)", "09:00:00", "09:30:00", "yes"],
+        ["3", "EN_ROUTE", "2", "1 Main St, Apt 2 (84101)", "23:59:00", "", "no"],
+    ]
+
+
+def test_jsonl_report(planned_packages):
+    lines = _render(planned_packages, time(8, 30), ReportFormat.JSONL).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [r["status"] for r in records] == [DeliveryStatus.EN_ROUTE] * 3
+    assert records[0]["time_delivered"] is None
+    assert records[2]["truck_id"] == 2
+
+
+def test_table_report_is_aligned(planned_packages):
+    lines = _render(planned_packages, time(12, 0), ReportFormat.TABLE).splitlines()
+    assert lines[0].split() == list(REPORT_COLUMNS)
+    assert len(lines) == 2 + len(planned_packages)
+    assert lines[3].endswith("LATE")
+    # every column starts at the same offset on every row
+    assert len({line.index("DELIVERED") for line in lines[2:]}) == 1
+
+
+@pytest.mark.parametrize(
+    "filters, expected_ids",
+    [
+        ({"truck_id": 2}, [3]),
+        ({"status": DeliveryStatus.EN_ROUTE}, [3]),
+        ({"late_only": True}, [2]),
+        ({"truck_id": 1, "status": DeliveryStatus.DELIVERED}, [1, 2]),
+    ],
+)
+def test_report_filters(planned_packages, filters, expected_ids):
+    lines = _render(planned_packages, time(10, 0), "jsonl", **filters).splitlines()
+    assert [json.loads(line)["package_id"] for line in lines] == expected_ids
+
+
+def test_undelivered_package_is_late_once_deadline_passes(planned_packages):
+    lines = _render(planned_packages, time(9, 15), "jsonl", late_only=True).splitlines()
+    assert [json.loads(line)["package_id"] for line in lines] == [2]
+
+
+def test_report_file(tmp_path, planned_packages):
+    path = tmp_path / "report.csv"
+    written = write_status_report_file(path, planned_packages, time(12, 0))
+    assert written == 3
+    assert path.read_text().startswith(",".join(REPORT_COLUMNS))
+
+
+def test_unknown_report_format(planned_packages):
+    with pytest.raises(ValueError):
+        _render(planned_packages, time(12, 0), "xml")
@@ -0,0 +1,87 @@
+import pytest
+from datetime import time
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import deliver_packages
+from lib.scenarios import Scenario, format_comparison, run_scenarios, scenario_grid
+from models.package import DeliveryStatus
+from models.truck import Truck
+
+
+@pytest.fixture(scope="module")
+def distance_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+@pytest.fixture
+def packages():
+    return csv_to_packages("data/WGUPSPackageFile.csv")
+
+
+def test_scenario_grid():
+    scenarios = scenario_grid(fleet_size=[1, 3], speed_mph=[18.0, 25.0])
+    assert [scenario.name for scenario in scenarios] == [
+        "fleet_size=1, speed_mph=18",
+        "fleet_size=1, speed_mph=25",
+        "fleet_size=3, speed_mph=18",
+        "fleet_size=3, speed_mph=25",
+    ]
+    assert scenarios[0].truck_start_times == (time(8, 0),)
+    assert scenarios[2].truck_start_times == (time(8, 0), time(9, 5), time(8, 0))
+
+    [early] = scenario_grid(truck_start_times=[(time(8, 0), time(8, 45))])
+    assert early.name == "truck_start_times=08:00/08:45"
+    assert early.max_packages == Scenario().max_packages
+
+    with pytest.raises(ValueError):
+        scenario_grid(drivers=[3])
+
+
+def test_base_scenario_matches_deliver_packages(packages, distance_table):
+    [result] = run_scenarios([Scenario()], packages, distance_table)
+    _, mileage = deliver_packages(
+        csv_to_packages("data/WGUPSPackageFile.csv"), distance_table=distance_table
+    )
+    assert result.error is None
+    assert result.total_mileage == pytest.approx(mileage)
+    assert result.late_package_ids == []
+    assert result.finish_time is not None
+
+    # the manifest itself is never planned
+    assert {package.delivery_status for package in packages} == {DeliveryStatus.AT_HUB}
+
+
+def test_parallel_results_match_serial_in_scenario_order(packages, distance_table):
+    scenarios = [Scenario()] + scenario_grid(
+        fleet_size=[1, 3], max_packages=[8, 16], speed_mph=[12.0, 25.0]
+    )
+    parallel = run_scenarios(scenarios, packages, distance_table, max_workers=2)
+    serial = run_scenarios(scenarios, packages, distance_table, max_workers=1)
+
+    assert [result.scenario for result in parallel] == scenarios
+    assert [
+        (result.total_mileage, result.late_package_ids, result.finish_time, result.error)
+        for result in parallel
+    ] == [
+        (result.total_mileage, result.late_package_ids, result.finish_time, result.error)
+        for result in serial
+    ]
+
+    by_name = {result.scenario.name: result for result in parallel}
+    # packages that must go on truck 2 cannot be planned with a single truck
+    assert "require truck 2" in by_name["fleet_size=1, max_packages=16, speed_mph=12"].error
+    slow = by_name["fleet_size=3, max_packages=8, speed_mph=12"]
+    fast = by_name["fleet_size=3, max_packages=8, speed_mph=25"]
+    assert fast.finish_time < slow.finish_time
+
+    table = format_comparison(parallel).splitlines()
+    assert table[0].split()[:2] == ["Scenario", "Trucks"]
+    assert any(line.startswith("fleet_size=1") and "failed" in line for line in table)
+
+
+def test_truck_speed(distance_table):
+    slow = Truck(truck_id=1, distance_table=distance_table, speed_mph=9.0)
+    fast = Truck(truck_id=2, distance_table=distance_table)
+    location = next(location for location in distance_table if location != "HUB")
+    slow.drive_to(location, load_on_arrival=0)
+    fast.drive_to(location, load_on_arrival=0)
+    assert slow.current_time > fast.current_time
@@ -0,0 +1,103 @@
+import struct
+import pytest
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.delivery_algorithm import default_trucks, deliver_packages
+from lib.snapshot import (
+    _HEADER,
+    SnapshotReader,
+    load_state,
+    read_package,
+    read_state_header,
+    save_state,
+)
+from models.package import DeliveryStatus
+
+
+@pytest.fixture(scope="module")
+def planned_state():
+    packages = csv_to_packages("data/WGUPSPackageFile.csv")
+    distance_table = csv_to_distances("data/WGUPSDistanceTable.csv")
+    trucks = default_trucks(distance_table)
+    packages, total_mileage = deliver_packages(
+        packages, distance_table=distance_table, trucks=trucks
+    )
+    return packages, trucks, total_mileage
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, planned_state):
+    packages, trucks, _ = planned_state
+    path = tmp_path / "plan.snap"
+    save_state(path, packages, trucks)
+    return path
+
+
+def test_snapshot_header(snapshot_path, planned_state):
+    packages, _, total_mileage = planned_state
+    package_count, snapshot_mileage = read_state_header(snapshot_path)
+    assert package_count == len(packages)
+    assert snapshot_mileage == pytest.approx(total_mileage)
+
+
+def test_snapshot_round_trip(snapshot_path, planned_state):
+    packages, trucks, _ = planned_state
+    loaded_packages, loaded_trucks = load_state(snapshot_path)
+
+    assert loaded_packages.package_ids == packages.package_ids
+    assert len(loaded_packages.table) == len(packages.table)
+    for package_id in packages.package_ids:
+        assert loaded_packages.lookup(package_id) == packages.lookup(package_id)
+
+    assert len(loaded_trucks) == len(trucks)
+    for loaded_truck, truck in zip(loaded_trucks, trucks):
+        assert loaded_truck.truck_id == truck.truck_id
+        assert loaded_truck.current_location == truck.current_location
+        assert loaded_truck.current_time == truck.current_time
+        assert loaded_truck.current_mileage == truck.current_mileage
+        assert loaded_truck.total_trips == truck.total_trips
+        assert loaded_truck.legs == truck.legs
+        assert loaded_truck.hub == truck.hub
+        assert [p.package_id for p in loaded_truck.delivered_packages] == [
+            p.package_id for p in truck.delivered_packages
+        ]
+        # trucks share the loaded package objects rather than copies
+        for package in loaded_truck.delivered_packages:
+            assert package is loaded_packages.lookup(package.package_id)
+
+
+def test_snapshot_partial_read(snapshot_path, planned_state):
+    packages, _, _ = planned_state
+    package = read_package(snapshot_path, 9)
+    assert package == packages.lookup(9)
+    assert package.delivery_status == DeliveryStatus.DELIVERED
+
+    with SnapshotReader(snapshot_path) as reader:
+        assert reader.package_count == len(packages)
+        for package_id in packages.package_ids:
+            assert reader.lookup(package_id) == packages.lookup(package_id)
+        assert reader.lookup(0) is None
+        assert reader.lookup(len(packages) + 1) is None
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    not_a_snapshot = tmp_path / "packages.csv"
+    not_a_snapshot.write_text("PackageID,Address\n")
+    with pytest.raises(ValueError):
+        read_state_header(not_a_snapshot)
+    with pytest.raises(ValueError):
+        load_state(not_a_snapshot)
+    with pytest.raises(ValueError):
+        SnapshotReader(not_a_snapshot)
+
+
+def test_snapshot_rejects_missing_sections(tmp_path, snapshot_path):
+    with open(snapshot_path, "rb") as snapshot_file:
+        header = bytearray(snapshot_file.read(_HEADER.size))
+    # a valid header that lists no sections
+    struct.pack_into("<H", header, 10, 0)
+    truncated = tmp_path / "truncated.snap"
+    truncated.write_bytes(bytes(header))
+    with pytest.raises(ValueError, match="Not a snapshot file"):
+        SnapshotReader(truncated)
+    with pytest.raises(ValueError, match="Not a snapshot file"):
+        load_state(truncated)
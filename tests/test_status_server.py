@@ -0,0 +1,142 @@
+import asyncio
+import json
+from datetime import time
+
+import pytest
+
+from lib.delivery_data_structure import DeliveryHashTable
+from lib.status_server import StatusRequestError, StatusServer
+from models.package import DeliveryStatus, Package
+
+
+@pytest.fixture
+def planned_packages() -> DeliveryHashTable:
+    """Two packages as they would look after the delivery algorithm has run."""
+    packages = DeliveryHashTable(10)
+    for package_id, delivered in [(1, time(9, 0)), (2, time(11, 0))]:
+        package = Package(
+            package_id, "Test Address", "City", "State", "12345", 2.0, time(12, 0)
+        )
+        package.delivery_status = DeliveryStatus.DELIVERED
+        package.time_loaded_onto_truck = time(8, 0)
+        package.time_delivered = delivered
+        package.truck_id = 1
+        packages.insert(package_id=package_id, package=package)
+    return packages
+
+
+async def _request(port: int, raw_requests: list[bytes]) -> list[tuple[int, dict]]:
+    """Send requests over a single keep-alive connection and decode the responses."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    for raw_request in raw_requests:
+        writer.write(raw_request)
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode().split("\r\n")
+        headers = dict(
+            line.split(": ", 1) for line in header_lines if ": " in line
+        )
+        body = await reader.readexactly(int(headers["Content-Length"]))
+        responses.append((int(status_line.split()[1]), json.loads(body)))
+    writer.close()
+    return responses
+
+
+def _serve_and_request(
+    packages: DeliveryHashTable, raw_requests: list[bytes]
+) -> list[tuple[int, dict]]:
+    async def run():
+        status_server = StatusServer(packages)
+        server = await status_server.start()
+        async with server:
+            return await _request(status_server.port, raw_requests)
+
+    return asyncio.run(run())
+
+
+def test_single_lookup(planned_packages):
+    [(status_code, body)] = _serve_and_request(
+        planned_packages, [b"GET /packages/1?time=10:00 HTTP/1.1\r\n\r\n"]
+    )
+    assert status_code == 200
+    assert body["package_id"] == 1
+    assert body["status"] == DeliveryStatus.DELIVERED
+    assert body["time_delivered"] == "09:00:00"
+
+
+def test_batch_lookups_on_one_connection(planned_packages):
+    payload = json.dumps({"ids": [2, 99], "time": "08:30"}).encode()
+    responses = _serve_and_request(
+        planned_packages,
+        [
+            b"GET /packages?ids=1,2&time=10:00 HTTP/1.1\r\n\r\n",
+            b"POST /packages/batch HTTP/1.1\r\nContent-Length: "
+            + str(len(payload)).encode()
+            + b"\r\n\r\n"
+            + payload,
+        ],
+    )
+    (get_status, get_body), (post_status, post_body) = responses
+    assert get_status == 200
+    assert [s["status"] for s in get_body["statuses"]] == [
+        DeliveryStatus.DELIVERED,
+        DeliveryStatus.EN_ROUTE,
+    ]
+    assert post_status == 200
+    assert post_body["statuses"][0]["status"] == DeliveryStatus.EN_ROUTE
+    assert post_body["missing"] == [99]
+
+
+def test_all_statuses_at_time(planned_packages):
+    [(status_code, body)] = _serve_and_request(
+        planned_packages, [b"GET /statuses?time=07:00 HTTP/1.1\r\n\r\n"]
+    )
+    assert status_code == 200
+    assert body["time"] == "07:00:00"
+    assert {s["status"] for s in body["statuses"]} == {DeliveryStatus.AT_HUB}
+    assert body["statuses"][0]["summary"].startswith("Package 01 - AT_HUB")
+
+
+@pytest.mark.parametrize(
+    "raw_request, expected_status",
+    [
+        (b"GET /packages/42 HTTP/1.1\r\n\r\n", 404),
+        (b"GET /packages/abc HTTP/1.1\r\n\r\n", 400),
+        (b"GET /statuses?time=noon HTTP/1.1\r\n\r\n", 400),
+        (b"DELETE /packages/1 HTTP/1.1\r\n\r\n", 405),
+        (b"GET /nowhere HTTP/1.1\r\n\r\n", 404),
+        (
+            b"POST /packages/batch HTTP/1.1\r\nContent-Length: 23\r\n\r\n"
+            b'{"ids": [1], "time": 5}',
+            400,
+        ),
+    ],
+)
+def test_error_responses(planned_packages, raw_request, expected_status):
+    [(status_code, body)] = _serve_and_request(planned_packages, [raw_request])
+    assert status_code == expected_status
+    assert "error" in body
+
+
+def test_unexpected_errors_are_answered(planned_packages, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(StatusServer, "package_status", fail)
+    [(status_code, body)] = _serve_and_request(
+        planned_packages, [b"GET /packages/1 HTTP/1.1\r\n\r\n"]
+    )
+    assert status_code == 500
+    assert "error" in body
+
+
+def test_responses_are_cached_per_time_bucket(planned_packages):
+    status_server = StatusServer(planned_packages, bucket_minutes=15)
+    first = status_server.all_statuses_body(time(10, 1))
+    # a later minute in the same 15 minute bucket reuses the cached body
+    assert status_server.all_statuses_body(time(10, 14)) is first
+    assert status_server.all_statuses_body(time(10, 15)) is not first
+
+    with pytest.raises(StatusRequestError):
+        status_server.package_status(0, time(10, 0))
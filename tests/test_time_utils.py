@@ -0,0 +1,20 @@
+import math
+import pytest
+from datetime import time
+from lib.time_utils import NO_TIME, micros_to_time, minutes_to_time, time_to_micros
+
+
+@pytest.mark.parametrize("value", [time(0, 0), time(8, 0), time(10, 20, 5, 17), time(23, 59)])
+def test_micros_round_trip(value: time):
+    assert micros_to_time(time_to_micros(value)) == value
+
+
+def test_missing_times():
+    assert time_to_micros(None) == NO_TIME
+    assert micros_to_time(NO_TIME) is None
+    assert minutes_to_time(math.inf) is None
+
+
+def test_minutes_to_time():
+    assert minutes_to_time(545) == time(9, 5)
+    assert minutes_to_time(8 * 60 + 1 / 3) == time(8, 0, 20)
@@ -0,0 +1,91 @@
+import pytest
+from datetime import time
+from lib.csv_utils import csv_to_distances, csv_to_packages
+from lib.truck_loading import assign_loads, build_loading_units, deliver_packages_in_loads
+from models.package import DeliveryStatus
+
+
+@pytest.fixture
+def packages():
+    return csv_to_packages("data/WGUPSPackageFile.csv")
+
+
+@pytest.fixture(scope="module")
+def distance_table():
+    return csv_to_distances("data/WGUPSDistanceTable.csv")
+
+
+def test_co_delivery_groups_form_one_unit(packages):
+    units = build_loading_units(packages)
+    assert sum(len(unit.packages) for unit in units) == len(packages)
+
+    unit_of = {
+        package.package_id: index
+        for index, unit in enumerate(units)
+        for package in unit.packages
+    }
+    # 13, 14, 15, 16, 19 and 20 are chained together by their "Must be delivered with" notes
+    assert len({unit_of[package_id] for package_id in (13, 14, 15, 16, 19, 20)}) == 1
+
+
+def test_planning_leaves_the_address_correction_to_loading(packages, distance_table):
+    wrong_address = packages.lookup(9).address
+    units = build_loading_units(packages)
+    assign_loads(packages, distance_table, truck_ids=[1, 2])
+
+    assert packages.lookup(9).address == wrong_address
+    unit = next(unit for unit in units if 9 in [package.package_id for package in unit.packages])
+    assert unit.anchor == "410 S State St (84111)"
+
+
+def test_loads_respect_constraints(packages, distance_table):
+    loads = assign_loads(packages, distance_table, truck_ids=[1, 2])
+
+    loaded_ids = [package.package_id for load in loads for package in load.packages]
+    assert sorted(loaded_ids) == sorted(packages.package_ids)
+    for load in loads:
+        assert load.package_count <= 16
+        assert load.departure_time >= load.release_time
+        for package in load.packages:
+            if package.required_truck_id is not None:
+                assert load.truck_id == package.required_truck_id
+            if package.earliest_load_time is not None:
+                assert load.departure_time >= package.earliest_load_time
+
+
+def test_loads_respect_weight_capacity(packages, distance_table):
+    loads = assign_loads(packages, distance_table, truck_ids=[1, 2], max_weight=300)
+    assert all(load.weight <= 300 for load in loads)
+    assert len(loads) >= 3
+
+
+def test_trips_do_not_overlap(packages, distance_table):
+    loads = assign_loads(packages, distance_table, truck_ids=[1, 2])
+    for truck_id in (1, 2):
+        trips = [load for load in loads if load.truck_id == truck_id]
+        assert [load.trip for load in trips] == list(range(len(trips)))
+        for previous, following in zip(trips, trips[1:]):
+            assert following.departure_time >= previous.estimated_return_time
+
+
+def test_oversized_group_is_rejected(packages, distance_table):
+    with pytest.raises(ValueError):
+        assign_loads(packages, distance_table, truck_ids=[1, 2], max_packages=4)
+
+
+def test_missing_required_truck_is_rejected(packages, distance_table):
+    with pytest.raises(ValueError):
+        assign_loads(packages, distance_table, truck_ids=[1])
+
+
+def test_deliver_packages_in_loads(packages, distance_table):
+    packages, total_mileage = deliver_packages_in_loads(packages, distance_table)
+    for package_id in packages.package_ids:
+        package = packages.lookup(package_id)
+        assert package.delivery_status == DeliveryStatus.DELIVERED
+        if package.earliest_load_time is not None:
+            assert package.time_loaded_onto_truck >= package.earliest_load_time
+    assert packages.lookup(9).delivery_address == "410 S State St"
+
+    assert total_mileage < 140.0
+    assert packages.lookup(1).time_delivered < time(17, 0)